@@ -8,6 +8,7 @@ from datetime import datetime, timezone
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -85,6 +86,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.on_event("startup")
+async def _open_http_client():
+    """Shared async HTTP pool for handlers running on the event loop."""
+    import httpx
+    app.state.http = httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    )
+    try:
+        from agents import fbp_agent
+        fbp_agent.set_async_client(app.state.http)
+    except ImportError as e:
+        logger.warning(f"FBP agent async client not registered: {e}")
+
+
+@app.on_event("shutdown")
+async def _close_http_client():
+    http = getattr(app.state, "http", None)
+    if http is not None:
+        await http.aclose()
+
 # =============================================================================
 # WebSocket streams (simple, no overengineering)
 # =============================================================================
@@ -280,7 +303,7 @@ def is_agent_active(agent_name: str, state: Dict[str, Any]) -> bool:
 def save_state(state: Dict[str, Any]):
     try:
         with open(STATE_FILE, 'w') as f:
-            json.dump(state, f, indent=4)
+            json.dump(state, f)
     except Exception as e:
         logger.error(f"Failed to save state: {e}")
 
@@ -543,6 +566,14 @@ MANUAL_COMMAND_QUEUE = {
 # Global Chat Sessions
 CHAT_SESSIONS: Dict[str, Any] = {}
 
+
+def _chat_turn_lock(agent: Any) -> asyncio.Lock:
+    """Per-session lock: process_message mutates agent.history, so turns must not overlap."""
+    lock = getattr(agent, "_turn_lock", None)
+    if lock is None:  # only touched on the event loop thread, so no creation race
+        lock = agent._turn_lock = asyncio.Lock()
+    return lock
+
 # --- Endpoints ---
 
 class ChatRequest(BaseModel):
@@ -571,10 +602,58 @@ async def chat_endpoint(session_id: str, req: ChatRequest):
          return {"response": "Waiting for user input...", "tool_calls": []}
          
     user_input = last_msg.get("content", "")
-    response_data = agent.process_message(user_input)
+    # process_message blocks on the OpenAI/tool round trips; keep it off the event loop,
+    # one turn at a time per session (double submits, stream + POST)
+    async with _chat_turn_lock(agent):
+        response_data = await asyncio.to_thread(agent.process_message, user_input)
     
     return response_data
 
+@app.post("/api/chat/{session_id}/stream")
+async def chat_stream_endpoint(session_id: str, req: ChatRequest):
+    """Chat with the FBP Agent, streaming reply text as plain-text chunks."""
+    if not FBPAgent:
+        raise HTTPException(status_code=503, detail="FBP Agent logic not loaded")
+    
+    if session_id not in CHAT_SESSIONS:
+        CHAT_SESSIONS[session_id] = FBPAgent(session_id=session_id)
+    
+    agent = CHAT_SESSIONS[session_id]
+    agent.last_active = time.time()
+    
+    if not req.messages or req.messages[-1].get("role") != "user":
+        raise HTTPException(status_code=400, detail="Last message must be from the user")
+    user_input = req.messages[-1].get("content", "")
+    
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    turn_lock = _chat_turn_lock(agent)
+    
+    streamed = False
+    
+    def on_token(text: str):
+        nonlocal streamed
+        streamed = True
+        loop.call_soon_threadsafe(queue.put_nowait, text)
+    
+    async def run():
+        try:
+            async with turn_lock:
+                result = await asyncio.to_thread(agent.process_message, user_input, on_token)
+            # Errors are returned rather than streamed; send them as the whole reply
+            if not streamed and result.get("response"):
+                await queue.put(result["response"])
+        finally:
+            await queue.put(None)
+    
+    async def stream():
+        task = asyncio.create_task(run())
+        while (chunk := await queue.get()) is not None:
+            yield chunk
+        await task
+    
+    return StreamingResponse(stream(), media_type="text/plain")
+
 @app.delete("/api/chat/{session_id}")
 def clear_chat_session(session_id: str):
     """Reset a chat session."""
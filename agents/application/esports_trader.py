@@ -16,12 +16,14 @@ Target: 0.5-2% profit per trade, hundreds of trades per match
 """
 
 import os
+import re
 import sys
 import time
 import json
 import asyncio
 import requests
 import datetime
+import numpy as np
 from typing import Optional, Dict, List, Tuple
 from dataclasses import dataclass
 from dotenv import load_dotenv
@@ -100,6 +102,18 @@ POLL_INTERVAL_LIVE = 15         # Poll every 15s (was 30s) for faster response
 POLL_INTERVAL_IDLE = 60         # Poll every 1m when idle (was 2m)
 EXIT_EDGE_THRESHOLD = 0.01      # Exit when edge drops below 1%
 
+# Scan price screens
+ARB_MAX_SUM = 0.985             # Yes + No below this is internal arbitrage (1.5% profit buffer)
+MAX_SIDE_PRICE = 0.95           # Either side above this: too expensive
+MIN_SIDE_PRICE = 0.08           # Either side below this: too cheap/lotto
+
+# Team-name patterns for _extract_teams, compiled once at import
+_GAME_VS_RE = re.compile(r"(?:counter-strike|lol|dota|valorant):\s*(.+?)\s+vs\s+(.+?)(?:\s*[\(\-]|$)", re.IGNORECASE)
+_BO_SUFFIX_RE = re.compile(r'\s*\(BO\d\).*')
+_MAP_SUFFIX_RE = re.compile(r'\s*-\s*Map.*')
+_GENERIC_VS_RE = re.compile(r"(.+?)\s+vs\.?\s+(.+?)(?:\s*[\(\?\-]|$)", re.IGNORECASE)
+_BEAT_RE = re.compile(r"will\s+(.+?)\s+beat\s+(.+?)[\?\.]", re.IGNORECASE)
+
 # API Rate Limiting (Gamma API is generous - no strict limits for reads)
 # API Rate Limiting (PandaScore Free Tier = 1000/hour)
 MAX_REQUESTS_PER_HOUR = 1000    # Hard limit for PandaScore
@@ -173,6 +187,13 @@ class GameState:
         return None
 
 
+def _screen_prices(yes: np.ndarray, no: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Scan price checks over all markets at once: (arb, garbage) boolean masks."""
+    arb = (yes + no) < ARB_MAX_SUM
+    garbage = (np.maximum(yes, no) > MAX_SIDE_PRICE) | (np.minimum(yes, no) < MIN_SIDE_PRICE)
+    return arb, garbage
+
+
 @dataclass 
 class PolymarketMatch:
     """A Polymarket esports market."""
@@ -1628,26 +1649,24 @@ class PolymarketEsports:
     
     def _extract_teams(self, question: str) -> Tuple[str, str]:
         """Extract team names from market question."""
-        import re
-        
         # Pattern: "Counter-Strike: Team1 vs Team2 (BO3)"
         # Or: "Counter-Strike: Team1 vs Team2 - Map X Winner"
-        match = re.search(r"(?:counter-strike|lol|dota|valorant):\s*(.+?)\s+vs\s+(.+?)(?:\s*[\(\-]|$)", question, re.IGNORECASE)
+        match = _GAME_VS_RE.search(question)
         if match:
             team1 = match.group(1).strip()
             team2 = match.group(2).strip()
             # Clean up team names
-            team2 = re.sub(r'\s*\(BO\d\).*', '', team2).strip()
-            team2 = re.sub(r'\s*-\s*Map.*', '', team2).strip()
+            team2 = _BO_SUFFIX_RE.sub('', team2).strip()
+            team2 = _MAP_SUFFIX_RE.sub('', team2).strip()
             return team1, team2
         
         # Try generic "X vs Y" pattern  
-        match = re.search(r"(.+?)\s+vs\.?\s+(.+?)(?:\s*[\(\?\-]|$)", question, re.IGNORECASE)
+        match = _GENERIC_VS_RE.search(question)
         if match:
             return match.group(1).strip(), match.group(2).strip()
         
         # Try "X beat Y" pattern
-        match = re.search(r"will\s+(.+?)\s+beat\s+(.+?)[\?\.]", question, re.IGNORECASE)
+        match = _BEAT_RE.search(question)
         if match:
             return match.group(1).strip(), match.group(2).strip()
         
@@ -1984,6 +2003,8 @@ class EsportsTrader:
         "0x204f72f35326db932158cba6adff0b9a1da95e14", # swisstony
         "0xe90bec87d9ef430f27f9dcfe72c34b76967d5da2", # gmanas
     ]
+    # Lowercased once for O(1) holder lookups
+    KNOWN_PROS_SET = frozenset(p.lower() for p in KNOWN_PROS)
     
     def get_market_whales(self, token_id: str) -> bool:
         """
@@ -2009,7 +2030,7 @@ class EsportsTrader:
                 percent = float(holder.get('percentage', 0))
                 
                 # Logic A: Known Pro
-                if address in self.KNOWN_PROS:
+                if address in self.KNOWN_PROS_SET:
                     print(f"   🐋 WHALE DETECTED (Known Pro): {address[:8]}...")
                     return True
                 
@@ -2045,14 +2066,14 @@ class EsportsTrader:
             for holder in yes_holders[:15]:
                 address = holder.get('address', '').lower()
                 value = float(holder.get('value', 0))
-                if address in [p.lower() for p in self.KNOWN_PROS]:
+                if address in self.KNOWN_PROS_SET:
                     yes_whale_value += value
                     print(f"      🐋 Whale on YES: {address[:8]}... (${value:.0f})")
             
             for holder in no_holders[:15]:
                 address = holder.get('address', '').lower()
                 value = float(holder.get('value', 0))
-                if address in [p.lower() for p in self.KNOWN_PROS]:
+                if address in self.KNOWN_PROS_SET:
                     no_whale_value += value
                     print(f"      🐋 Whale on NO: {address[:8]}... (${value:.0f})")
             
@@ -2560,7 +2581,7 @@ Then a confidence score 0-1 on a new line."""
                 pass
             
             with open(state_file, "w") as f:
-                json.dump(state_update, f, indent=2)
+                json.dump(state_update, f)
         except Exception as e:
             print(f"Error saving state: {e}")
 
@@ -2730,15 +2751,21 @@ Then a confidence score 0-1 on a new line."""
                     game = match.get("game_type", "unknown")
                     print(f"      {i+1}. {t1} vs {t2} ({game})")
 
-        for market in markets:
+        # Price screens for every market in one pass (market columns as arrays)
+        arb, garbage = _screen_prices(
+            np.fromiter((m.yes_price for m in markets), dtype=np.float64, count=len(markets)),
+            np.fromiter((m.no_price for m in markets), dtype=np.float64, count=len(markets)),
+        )
+
+        for idx, market in enumerate(markets):
             question = market.question
             yes_price = market.yes_price
             no_price = market.no_price
             
             # --- CHECK 1: INTERNAL ARBITRAGE ---
             # If Yes + No < 0.99, it's free money (rare but happens)
-            spread_sum = yes_price + no_price
-            if spread_sum < 0.985: # 1.5% profit buffer
+            if arb[idx]:
+                spread_sum = yes_price + no_price
                 print(f"\n   🚨 ARBITRAGE DETECTED: {question[:40]}...")
                 print(f"      Yes({yes_price}) + No({no_price}) = {spread_sum:.3f}")
                 # Buy both sides? Or just the cheaper one?
@@ -2761,8 +2788,7 @@ Then a confidence score 0-1 on a new line."""
                 continue
 
             # --- CHECK 2: FILTER GARBAGE ---
-            if yes_price > 0.95 or no_price > 0.95: continue # Too expensive
-            if yes_price < 0.08 or no_price < 0.08: continue # Too cheap/lotto
+            if garbage[idx]: continue # Too expensive or too cheap/lotto
 
             # --- CHECK 3: HYBRID TRADING LOGIC ---
 
@@ -2785,7 +2811,7 @@ Then a confidence score 0-1 on a new line."""
                     print(f"      📊 Series: {ps_team1} {results[0].get('score', 0)} - {results[1].get('score', 0)} {ps_team2}")
             else:
                 # DEBUG: Show why first market didn't match (helps diagnose)
-                if markets.index(market) == 0 and live_matches:
+                if idx == 0 and live_matches:
                     print(f"   🔍 DEBUG: Market '{market.team1}' vs '{market.team2}' not found in:")
                     for i, lm in enumerate(live_matches[:3]):
                         opps = lm.get("opponents", [])
@@ -1,11 +1,16 @@
 import os
 import time
 import json
+import atexit
+import threading
 import logging
 import datetime
 import requests
 import ast
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from py_clob_client.clob_types import OrderArgs
 from py_clob_client.order_builder.constants import BUY
@@ -16,6 +21,8 @@ from agents.utils.context import get_context, Position, Trade
 from agents.utils.config import load_config
 from agents.application.smart_context import SmartContext
 from agents.utils.TradeRecorder import record_trade, update_agent_activity
+from agents.utils.state_file import load_state, write_snapshot, append_journal, rotate_journal
+from agents.utils.log_queue import configure_logging
 
 # Import Supabase state manager
 try:
@@ -27,17 +34,20 @@ except ImportError:
 
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("copy_bot.log"),
-        logging.StreamHandler()
-    ]
-)
+configure_logging("copy_bot.log")
 logger = logging.getLogger("CopyBot")
 
 
+# Copy orders cross the book at a fixed aggressive price with a hard-capped
+# notional, so share sizes for the standard bets are fixed at import.
+MAX_COPY_BET_USD = 5.0
+AGGRESSIVE_PRICE = 0.999
+ORDER_SIZES = {
+    MAX_COPY_BET_USD: MAX_COPY_BET_USD / AGGRESSIVE_PRICE,
+    MAX_COPY_BET_USD / 2: (MAX_COPY_BET_USD / 2) / AGGRESSIVE_PRICE,
+}
+
+
 class CopyConfig(SharedConfig):
     pass
 
@@ -46,6 +56,10 @@ class CopyTrader:
     AGENT_NAME = "copy"
     
     AGENT_NAME = "copy"
+    STATE_FLUSH_DELAY = 1.0  # seconds; coalesces bursts of save_state calls
+    VALIDATION_TTL = 1800    # seconds a validator verdict is reused for the same position
+    VALIDATION_CACHE_SIZE = 2048
+    BALANCE_POLL_INTERVAL = 5.0
     
     def __init__(self):
         self.config = load_config("copy_trader")
@@ -70,7 +84,30 @@ class CopyTrader:
                 self.LLMActivity = None
 
         self.state_file = "copy_state.json"
+        self._state = load_state(self.state_file)  # this process is the only writer
+        self._state_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._state_timer = None
+        atexit.register(self.flush_state)
         self.DATA_API_URL = "https://data-api.polymarket.com"
+        # Keep-alive pool for data-api polling (one leaderboard + N users per scan)
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = "gzip"
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504]),
+        ))
+        self._executor = ThreadPoolExecutor(max_workers=8)
+        self._positions_cache: Dict[str, tuple] = {}  # address -> (etag, last_modified, positions)
+        self._bot_state_mtime = None
+        self._bot_state_cache = (False, True)  # (copy_trader_running, dry_run)
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        # (question, outcome, price rounded to 1c) -> (timestamp, validator result)
+        self._validation_cache: Dict[tuple, tuple] = {}
+        self._validation_hits = 0
+        self._validation_misses = 0
         self.MAX_POSITIONS_PER_USER = 3
         self.initial_balance = 0.0
         try:
@@ -79,6 +116,7 @@ class CopyTrader:
             logger.info(f"Initial Balance: ${self.initial_balance:.2f}")
         except:
             pass
+        self._balance = self.initial_balance  # refreshed by _poll_balance
         
         # Initialize Auto-Redeemer for Compounding
         self.redeemer = None
@@ -146,28 +184,82 @@ class CopyTrader:
         return fallback_whales[:limit]
 
     def fetch_user_positions(self, address):
-        """Fetch active positions for a user"""
+        """Fetch active positions for a user (conditional GET; 304 reuses the last body)"""
         try:
             url = f"{self.DATA_API_URL}/positions?user={address}"
-            resp = requests.get(url, timeout=10)
+            cached = self._positions_cache.get(address)
+            headers = {}
+            if cached:
+                etag, last_modified, _ = cached
+                if etag:
+                    headers["If-None-Match"] = etag
+                if last_modified:
+                    headers["If-Modified-Since"] = last_modified
+            resp = self.session.get(url, headers=headers, timeout=(3.05, 10))
+            if resp.status_code == 304 and cached:
+                return cached[2]
             if resp.status_code == 200:
-                return resp.json()
+                positions = resp.json()
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+                if etag or last_modified:
+                    self._positions_cache[address] = (etag, last_modified, positions)
+                return positions
             return []
         except Exception as e:
             logger.error(f"Fetch Positions Error: {e}")
             return []
 
+    def validate_cached(self, question: str, outcome: str, price: float, additional_context: str = ""):
+        """
+        validator.validate with a TTL cache. Top gainers hold the same positions
+        across scans, so identical (question, outcome, price) checks recur.
+        """
+        key = (question, outcome, round(price, 2))
+        now = time.monotonic()
+        hit = self._validation_cache.get(key)
+        if hit and now - hit[0] < self.VALIDATION_TTL:
+            self._validation_hits += 1
+            return hit[1]
+        self._validation_misses += 1
+        result = self.validator.validate(question, outcome, price, additional_context=additional_context)
+        self._validation_cache.pop(key, None)
+        if len(self._validation_cache) >= self.VALIDATION_CACHE_SIZE:
+            # Dicts keep insertion order: drop the oldest entry
+            self._validation_cache.pop(next(iter(self._validation_cache)))
+        self._validation_cache[key] = (now, result)
+        return result
+
     def save_state(self, update: Dict):
-        try:
-            current = {}
-            if os.path.exists(self.state_file):
-                with open(self.state_file, "r") as f:
-                    current = json.load(f)
-            current.update(update)
-            with open(self.state_file, "w") as f:
-                json.dump(current, f)
-        except:
-            pass
+        """Merge into the in-memory state; the file is written at most once per STATE_FLUSH_DELAY."""
+        with self._state_lock:
+            # Appended under the lock so flush_state's rotate_journal sees a consistent cut
+            try:
+                append_journal(self.state_file, update)
+            except (OSError, TypeError) as e:
+                logger.warning(f"State journal append failed: {e}")
+            self._state.update(update)
+            if self._state_timer is None:
+                self._state_timer = threading.Timer(self.STATE_FLUSH_DELAY, self.flush_state)
+                self._state_timer.daemon = True
+                self._state_timer.start()
+
+    def flush_state(self):
+        """Atomically write the in-memory state to copy_state.json."""
+        with self._flush_lock:  # one snapshot at a time, so an older copy never lands last
+            with self._state_lock:
+                if self._state_timer is not None:
+                    self._state_timer.cancel()
+                    self._state_timer = None
+                state = dict(self._state)
+                try:
+                    rotate_journal(self.state_file)  # lines so far are covered by `state`
+                except OSError as e:
+                    logger.warning(f"State journal rotate failed: {e}")
+            try:
+                write_snapshot(self.state_file, state)
+            except OSError as e:
+                logger.warning(f"State write failed: {e}")
 
     def check_run_state(self):
         # 1. Try Supabase
@@ -184,12 +276,15 @@ class CopyTrader:
             except Exception as e:
                 pass
 
-        # 2. Local Fallback
+        # 2. Local Fallback (re-parsed only when bot_state.json's mtime changes)
         try:
-            if os.path.exists("bot_state.json"):
+            mtime = os.stat("bot_state.json").st_mtime_ns
+            if mtime != self._bot_state_mtime:
                 with open("bot_state.json", "r") as f:
                     state = json.load(f)
-                return state.get("copy_trader_running", False), state.get("dry_run", True)
+                self._bot_state_cache = (state.get("copy_trader_running", False), state.get("dry_run", True))
+                self._bot_state_mtime = mtime
+            return self._bot_state_cache
         except:
             pass
         return False, True
@@ -197,23 +292,23 @@ class CopyTrader:
     def get_dynamic_max_bet(self) -> float:
         """Read dynamic max bet from bot_state.json"""
         # SECURITY OVERRIDE: Hard cap at $5.00
-        return 5.0
+        return MAX_COPY_BET_USD
 
     def execute_trade(self, token_id: str, amount_usd: float, outcome: str, market_id: str = "", question: str = ""):
         """Execute a copy trade using CLOB API"""
         try:
             balance = self.pm.get_usdc_balance()
+            self._balance = balance
             if balance < 3.0:
                 logger.warning(f"Low balance (${balance:.2f} < $3.0). Skipping trade.")
                 return None
             
             # Aggressive price to ensure fill
-            agg_price = 0.999
-            size = amount_usd / agg_price
+            size = ORDER_SIZES.get(amount_usd) or amount_usd / AGGRESSIVE_PRICE
             
             order_args = OrderArgs(
                 token_id=token_id,
-                price=agg_price,
+                price=AGGRESSIVE_PRICE,
                 size=size,
                 side=BUY
             )
@@ -249,7 +344,7 @@ class CopyTrader:
                 market_question=question or "Copy Trade",
                 agent=self.AGENT_NAME,
                 outcome=outcome,
-                entry_price=agg_price,
+                entry_price=AGGRESSIVE_PRICE,
                 size_usd=amount_usd,
                 timestamp=datetime.datetime.now().isoformat(),
                 token_id=token_id
@@ -259,8 +354,8 @@ class CopyTrader:
                 agent_name=self.AGENT_NAME,
                 market=question,
                 side=outcome,
-                amount=amount,
-                price=price,
+                amount=amount_usd,
+                price=AGGRESSIVE_PRICE,
                 token_id=market_id or token_id,
                 reasoning=f"Copied Trade from Top Gainer"
             )
@@ -272,8 +367,8 @@ class CopyTrader:
                 extra_data={
                     "market": question,
                     "side": outcome,
-                    "size": amount,
-                    "price": price
+                    "size": amount_usd,
+                    "price": AGGRESSIVE_PRICE
                 }
             )
             
@@ -290,8 +385,8 @@ class CopyTrader:
                 agent_name=self.AGENT_NAME,
                 market=question,
                 side=outcome,
-                amount=amount,
-                price=price,
+                amount=amount_usd,
+                price=AGGRESSIVE_PRICE,
                 token_id=market_id or token_id,
                 reasoning=f"Copied Trade from Top Gainer"
             )
@@ -303,21 +398,57 @@ class CopyTrader:
                 extra_data={
                     "market": question,
                     "side": outcome,
-                    "size": amount,
-                    "price": price
+                    "size": amount_usd,
+                    "price": AGGRESSIVE_PRICE
                 }
             )
             self.save_state({"last_trade_error": str(e)})
             return None
 
+    def _sleep(self, seconds: float) -> bool:
+        """Sleep up to `seconds`, waking early on a bot_state.json change. True if stopping."""
+        self._wake.wait(seconds)
+        self._wake.clear()
+        return self._stop.is_set()
+
+    def _watch_bot_state(self):
+        """Wake the run loop as soon as bot_state.json changes (pause/resume/dry-run toggles)."""
+        last = None
+        while not self._stop.wait(2):
+            try:
+                mtime = os.stat("bot_state.json").st_mtime_ns
+            except OSError:
+                continue
+            if last is not None and mtime != last:
+                self._wake.set()
+            last = mtime
+
+    def _poll_balance(self):
+        """Refresh self._balance in the background so the scan loop never waits on RPC."""
+        while True:
+            try:
+                self._balance = self.pm.get_usdc_balance()
+            except Exception as e:
+                logger.debug(f"Balance poll failed: {e}")
+            if self._stop.wait(self.BALANCE_POLL_INTERVAL):
+                return
+
+    def stop(self):
+        """Stop the run loop at its next wait."""
+        self._stop.set()
+        self._wake.set()
+
     def run(self):
         logger.info("Starting Copy Trader...")
+        threading.Thread(target=self._watch_bot_state, daemon=True).start()
+        threading.Thread(target=self._poll_balance, daemon=True).start()
         
         while True:
             is_running, is_dry_run = self.check_run_state()
             if not is_running:
                 logger.info("Copy Trader Paused. Sleeping 60s...")
-                time.sleep(60)
+                if self._sleep(60):
+                    break
                 continue
 
             try:
@@ -338,12 +469,14 @@ class CopyTrader:
                 gainers = self.fetch_top_gainers(limit=5)
                 logger.info(f"Scanning {len(gainers)} top gainers...")
                 
-                for user in gainers:
-                    address = user.get("address")
-                    if not address:
-                        continue
-                    
-                    positions = self.fetch_user_positions(address)
+                # Fetch every gainer's positions concurrently; validate each as it arrives
+                futures = {
+                    self._executor.submit(self.fetch_user_positions, u["address"]): u
+                    for u in gainers if u.get("address")
+                }
+                for fut in as_completed(futures):
+                    address = futures[fut]["address"]
+                    positions = fut.result()
                     logger.info(f"User {address[:6]}... has {len(positions)} positions.")
                     
                     for pos in positions[:self.MAX_POSITIONS_PER_USER]:
@@ -355,6 +488,7 @@ class CopyTrader:
                         
                         if not question or not outcome or price <= 0:
                             continue
+                        q_short = question[:30]  # log/status label, sliced once per position
                         
                         # Skip extreme odds
                         if price > 0.95 or price < 0.05:
@@ -375,7 +509,7 @@ class CopyTrader:
 
                                 # Narrowed from 24h to 2h
                                 if datetime.datetime.now(datetime.timezone.utc) - pos_time > datetime.timedelta(hours=2):
-                                    logger.info(f"Skipping stale position (>2h): {question[:30]}")
+                                    logger.info(f"Skipping stale position (>2h): {q_short}")
                                     continue
                                     
                                 # Slippage Check
@@ -389,24 +523,19 @@ class CopyTrader:
                                 logger.debug(f"Timestamp check error: {e}")
                         
                         # === CONTEXT CHECK: Can we trade this market? ===
-                        balance = self.initial_balance
-                        try:
-                            balance = self.pm.get_usdc_balance()
-                        except:
-                            pass
-                        
+                        balance = self._balance
                         max_bet = self.get_dynamic_max_bet()
                         can_trade, ctx_reason = self.context.can_trade(
                             self.AGENT_NAME, market_id, max_bet, balance
                         )
                         if not can_trade:
-                            logger.info(f"Skipping {question[:30]}... - {ctx_reason}")
+                            logger.info(f"Skipping {q_short}... - {ctx_reason}")
                             continue
                         
                         self.context.update_agent_status(self.AGENT_NAME, f"Analyzing: {question[:25]}...")
                         
                         ctx_info = f"This position is held by a top gainer on the 24h leaderboard (User: {address[:6]})."
-                        is_valid, reason, conf = self.validator.validate(question, outcome, price, additional_context=ctx_info)
+                        is_valid, reason, conf = self.validate_cached(question, outcome, price, additional_context=ctx_info)
                         
                         if is_valid:
                             # FADE LOGIC: Check if we want to bet against the whale
@@ -420,7 +549,7 @@ class CopyTrader:
                                 logger.info(f"🔄 FADE MODE: Switching {outcome} -> {final_outcome}")
 
                             logger.info(f"SIGNAL: {question} ({final_outcome}) @ {price}")
-                            self.save_state({"last_signal": f"{'FADE' if fade_mode else 'COPY'} {final_outcome}: {question[:30]}..."})
+                            self.save_state({"last_signal": f"{'FADE' if fade_mode else 'COPY'} {final_outcome}: {q_short}..."})
                              
                             if not is_dry_run:
                                 if token_id:
@@ -439,7 +568,7 @@ class CopyTrader:
                                     if result:
                                         self.context.broadcast(
                                             self.AGENT_NAME,
-                                            f"{'Faded' if fade_mode else 'Copied'} trade: {final_outcome} on {question[:30]}",
+                                            f"{'Faded' if fade_mode else 'Copied'} trade: {final_outcome} on {q_short}",
                                             {"market_id": market_id, "whale": address[:10], "price": price}
                                         )
                                 else:
@@ -447,20 +576,29 @@ class CopyTrader:
                             else:
                                 logger.info(f"[DRY RUN] Would {'Fade' if fade_mode else 'Copy'} Trade: {final_outcome}")
                         
+                lookups = self._validation_hits + self._validation_misses
                 self.save_state({
                     "last_scan": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "status": "Scanning Complete"
+                    "status": "Scanning Complete",
+                    "validation_cache": {
+                        "hits": self._validation_hits,
+                        "misses": self._validation_misses,
+                        "hit_ratio": round(self._validation_hits / lookups, 3) if lookups else 0.0,
+                        "size": len(self._validation_cache),
+                    },
                 })
                 
                 # Self-Learning Cycle
                 self.run_learning_cycle()
 
                 logger.info("Sleeping 60s before next scan...")
-                time.sleep(60)
+                if self._sleep(60):
+                    break
                 
             except Exception as e:
                 logger.error(f"Copy Loop Error: {e}")
-                time.sleep(60)
+                if self._sleep(60):
+                    break
 
 
 if __name__ == "__main__":
@@ -18,7 +18,7 @@ import requests
 import os
 from collections import deque
 from dotenv import load_dotenv
-from py_clob_client.clob_types import OrderArgs, OrderType
+from py_clob_client.clob_types import OrderArgs, OrderType, PostOrdersArgs
 from py_clob_client.order_builder.constants import BUY, SELL
 
 # Local Imports
@@ -36,6 +36,16 @@ except ImportError:
 
 load_dotenv()
 
+# Exit reason builders keyed by the signal bit set in manage_positions
+EXIT_REASONS = {
+    1: lambda pnl, held: f"WIN (+{pnl*100:.1f}%)",               # Take Profit
+    2: lambda pnl, held: f"STOP LOSS ({pnl*100:.1f}%)",          # Stop Loss
+    4: lambda pnl, held: f"TIME LIMIT ({held:.0f}s)",            # Time Decay (before expiration chaos)
+}
+
+# Interval gates use the monotonic clock: immune to NTP steps, integer compares
+SCAN_INTERVAL_NS = 10_000_000_000
+
 class SniperScalper:
     AGENT_NAME = "scalper_sniper"
 
@@ -58,7 +68,11 @@ class SniperScalper:
         # State
         self.active_positions = {}      # token_id -> {entry_price, time, ...}
         self.binance_history = {}       # symbol -> deque of prices
-        self.last_scan = 0
+        self.last_scan = None           # time.monotonic_ns() of the last market scan
+
+        # Entries/exits are latency-sensitive FOK posts; keep the CLOB connection hot
+        if not self.dry_run:
+            self.pm.keep_clob_warm()
 
         print(f"🦅 SNIPER SCALPER INITIALIZED")
         print(f"   Mode: {'DRY RUN' if self.dry_run else '🔴 LIVE MONEY'}")
@@ -71,7 +85,7 @@ class SniperScalper:
             url = f"https://api.binance.com/api/v3/ticker/price?symbol={symbol}"
             resp = requests.get(url, timeout=2).json()
             return float(resp["price"])
-        except:
+        except (requests.RequestException, KeyError, ValueError):
             return 0.0
 
     def update_momentum(self, asset):
@@ -86,7 +100,7 @@ class SniperScalper:
             self.binance_history[symbol] = deque(maxlen=20) # Keep last 20 checks
         
         history = self.binance_history[symbol]
-        history.append((time.time(), price))
+        history.append((time.monotonic_ns(), price))
 
         # Need at least 60 seconds of data to judge trend
         if len(history) < 2: return 0.0
@@ -99,8 +113,8 @@ class SniperScalper:
 
     def scan_markets(self):
         """Find 15-min markets and check for SNIPE signals."""
-        now = time.time()
-        if now - self.last_scan < 10: return # Scan every 10s
+        now = time.monotonic_ns()
+        if self.last_scan is not None and now - self.last_scan < SCAN_INTERVAL_NS: return # Scan every 10s
         self.last_scan = now
 
         markets = self.gamma.discover_15min_crypto_markets()
@@ -144,14 +158,7 @@ class SniperScalper:
 
             if not self.dry_run:
                 # LIVE EXECUTION
-                order = self.pm.client.create_order(OrderArgs(
-                    price=best_ask + 0.01, # Slippage tolerance
-                    size=self.BET_SIZE_USD / best_ask,
-                    side=BUY,
-                    token_id=token_id,
-                    fee_rate_bps=1000
-                ))
-                resp = self.pm.client.post_orders([PostOrdersArgs(order=order, orderType=OrderType.FOK)])
+                resp = self.post_fok(token_id, BUY, best_ask + 0.01, self.BET_SIZE_USD / best_ask)  # +1c slippage tolerance
                 if resp and resp[0].success:
                     self.register_position(token_id, market, direction, best_ask)
             else:
@@ -162,12 +169,23 @@ class SniperScalper:
         except Exception as e:
             print(f"   ❌ ENTRY FAILED: {e}")
 
+    def post_fok(self, token_id, side, price, size):
+        """Sign and post a fill-or-kill taker order (15-min markets charge 1000 bps)."""
+        order = self.pm.client.create_order(OrderArgs(
+            price=price,
+            size=size,
+            side=side,
+            token_id=token_id,
+            fee_rate_bps=1000
+        ))
+        return self.pm.client.post_orders([PostOrdersArgs(order=order, orderType=OrderType.FOK)])
+
     def register_position(self, token_id, market, direction, price):
         self.active_positions[token_id] = {
             "asset": market["asset"],
             "direction": direction,
             "entry_price": price,
-            "entry_time": time.time(),
+            "entry_time": time.monotonic_ns(),
             "market_id": market["id"]
         }
         print(f"   ✅ POSITION OPEN: {market['asset']} {direction} @ {price}")
@@ -183,35 +201,26 @@ class SniperScalper:
 
                 # PnL Calc
                 pnl_pct = (current_bid - pos["entry_price"]) / pos["entry_price"]
-                held_time = time.time() - pos["entry_time"]
-
-                exit_reason = None
-                
-                # 1. Take Profit
-                if pnl_pct >= self.TAKE_PROFIT:
-                    exit_reason = f"WIN (+{pnl_pct*100:.1f}%)"
-                
-                # 2. Stop Loss
-                elif pnl_pct <= self.STOP_LOSS:
-                    exit_reason = f"STOP LOSS ({pnl_pct*100:.1f}%)"
-                
-                # 3. Time Decay (Get out before expiration chaos)
-                elif held_time > self.MAX_HOLD_TIME:
-                    exit_reason = f"TIME LIMIT ({held_time:.0f}s)"
+                held_time = (time.monotonic_ns() - pos["entry_time"]) / 1e9
+
+                # Pack the exit checks into one int; the common "hold" tick is a single test
+                signal = (
+                    (pnl_pct >= self.TAKE_PROFIT)
+                    | ((pnl_pct <= self.STOP_LOSS) << 1)
+                    | ((held_time > self.MAX_HOLD_TIME) << 2)
+                )
+                if not signal:
+                    continue
+
+                # Lowest set bit wins: Take Profit > Stop Loss > Time Decay
+                exit_reason = EXIT_REASONS[signal & -signal](pnl_pct, held_time)
 
                 if exit_reason:
                     print(f"   👋 EXITING {pos['asset']} {pos['direction']}: {exit_reason} @ {current_bid}")
                     
                     if not self.dry_run:
-                        # MARKET SELL
-                        order = self.pm.client.create_order(OrderArgs(
-                            price=current_bid - 0.01, # Ensure fill
-                            size=self.BET_SIZE_USD / pos["entry_price"], # Approx size
-                            side=SELL,
-                            token_id=token_id,
-                            fee_rate_bps=1000
-                        ))
-                        self.pm.client.post_orders([PostOrdersArgs(order=order, orderType=OrderType.FOK)])
+                        # MARKET SELL: -1c to ensure fill, approx size from entry
+                        self.post_fok(token_id, SELL, current_bid - 0.01, self.BET_SIZE_USD / pos["entry_price"])
                     else:
                         record_trade(self.AGENT_NAME, pos["asset"], "EXIT", 0, current_bid, token_id, exit_reason)
                     
@@ -1,27 +1,25 @@
 
 import os
 import time
+import atexit
+import threading
 import ast
 import json
 import logging
 import datetime
 import requests
+import numpy as np
 from dotenv import load_dotenv
 from typing import List, Dict, Tuple
 
 from agents.polymarket.polymarket import Polymarket
 from agents.utils.objects import SimpleMarket
 from agents.utils.context import get_context, Position, Trade
+from agents.utils.state_file import load_state, write_snapshot, append_journal, rotate_journal
+from agents.utils.log_queue import configure_logging
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("bot.log"),
-        logging.StreamHandler()
-    ]
-)
+configure_logging("bot.log")
 logger = logging.getLogger("PyMLBot")
 
 class SafePolymarket(Polymarket):
@@ -47,11 +45,37 @@ except ImportError:
     HAS_ANALYZER = False
 from agents.utils.risk_engine import calculate_ev, kelly_size, check_drawdown
 
+def _parse_list(raw) -> list:
+    """Parse a Gamma JSON-array field; literal_eval only for non-JSON reprs."""
+    if not raw:
+        return []
+    if not isinstance(raw, str):
+        return raw
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return ast.literal_eval(raw)
+
+SIDE_NONE, SIDE_YES, SIDE_NO = 0, 1, 2
+ARB_MAX_SUM = 0.98
+
+def _classify_prices(yes: np.ndarray, no: np.ndarray, high_prob: float, arb_max: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scanner decision kernel over all markets at once.
+    Returns (side, arb): side is SIDE_YES/SIDE_NO for high-probability
+    outcomes (YES wins ties), arb marks yes+no below arb_max.
+    """
+    side = np.where(yes >= high_prob, SIDE_YES, np.where(no >= high_prob, SIDE_NO, SIDE_NONE))
+    arb = (yes + no) < arb_max
+    return side, arb
+
 class Scanner:
     """Scans Polymarket for trading opportunities."""
     def __init__(self, pm, config):
         self.pm = pm
         self.config = config
+        # market.id -> (raw outcome_prices, parsed floats); reparsed only when the raw string changes
+        self._parse_cache: Dict[str, Tuple[str, List[float]]] = {}
         # Risk Limits
         self.MAX_POSITIONS_PER_USER = 3
         self.min_volume = getattr(config, 'MIN_VOLUME', 1000)
@@ -61,6 +85,7 @@ class Scanner:
         """Returns (high_prob_opportunities, arbitrage_opportunities)"""
         high_prob = []
         arb_opportunities = []
+        rows = []  # (market, yes_price, no_price) for live, liquid markets
         
         try:
             # Increase limit to 100 to catch more niche Sports markets (mimic 0p0jogggg coverage)
@@ -74,9 +99,7 @@ class Scanner:
                     
                 try:
                     # Parse prices
-                    import ast
-                    prices_str = market.outcome_prices
-                    prices = ast.literal_eval(prices_str) if prices_str else []
+                    prices = self._parse_prices(market)
                     if len(prices) < 2:
                         continue
                         
@@ -93,48 +116,55 @@ class Scanner:
                             if end_dt < now_utc:
                                 # Market is expired
                                 continue
-                        except: pass
-                    
-                    yes_price = float(prices[0])
-                    no_price = float(prices[1])
-                    
-                    # High probability opportunities (outcome likely to win)
-                    if yes_price >= self.high_prob_threshold:
-                        high_prob.append({
-                            'market': market,
-                            'outcome': 'Yes',
-                            'price': yes_price
-                        })
-                    elif no_price >= self.high_prob_threshold:
-                        high_prob.append({
-                            'market': market,
-                            'outcome': 'No',
-                            'price': no_price
-                        })
-                    
-                    # Arbitrage check: if sum of prices < 1.0 or > 1.0
-                    price_sum = yes_price + no_price
+                        except (ValueError, TypeError):
+                            pass  # unparseable or naive end date: keep the market
                     
-                    # SAFETY: Exclude "Up or Down" crypto markets (3% fee kills this arb)
-                    is_crypto_fee_market = "Up or Down" in market.question or "Above" in market.question
-                    
-                    if price_sum < 0.98 and not is_crypto_fee_market:  
-                        arb_opportunities.append({
-                            'market': market,
-                            'sum_price': price_sum,
-                            'yes_price': yes_price,
-                            'no_price': no_price
-                        })
+                    rows.append((market, prices[0], prices[1]))
                         
                 except Exception as e:
                     logger.debug(f"Error parsing market {market.question[:30]}: {e}")
                     continue
+
+            if rows:
+                yes = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+                no = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+                side, arb = _classify_prices(yes, no, self.high_prob_threshold, ARB_MAX_SUM)
+
+                # High probability opportunities (outcome likely to win)
+                for i in np.flatnonzero(side):
+                    market, yes_price, no_price = rows[i]
+                    if side[i] == SIDE_YES:
+                        high_prob.append({'market': market, 'outcome': 'Yes', 'price': yes_price})
+                    else:
+                        high_prob.append({'market': market, 'outcome': 'No', 'price': no_price})
+
+                # Arbitrage: sum of prices below ARB_MAX_SUM
+                for i in np.flatnonzero(arb):
+                    market, yes_price, no_price = rows[i]
+                    # SAFETY: Exclude "Up or Down" crypto markets (3% fee kills this arb)
+                    if "Up or Down" in market.question or "Above" in market.question:
+                        continue
+                    arb_opportunities.append({
+                        'market': market,
+                        'sum_price': yes_price + no_price,
+                        'yes_price': yes_price,
+                        'no_price': no_price
+                    })
                     
         except Exception as e:
             logger.error(f"Scanner error: {e}")
             
         return high_prob, arb_opportunities
 
+    def _parse_prices(self, market) -> List[float]:
+        raw = market.outcome_prices
+        cached = self._parse_cache.get(market.id)
+        if cached is not None and cached[0] == raw:
+            return cached[1]
+        prices = [float(p) for p in _parse_list(raw)]
+        self._parse_cache[market.id] = (raw, prices)
+        return prices
+
 # Import Supabase state manager
 try:
     from agents.utils.supabase_client import get_supabase_state
@@ -148,6 +178,7 @@ class Config(SharedConfig):
 
 class Bot:
     AGENT_NAME = "safe"
+    STATE_FLUSH_DELAY = 0.5  # seconds; per-decision save_state calls share one snapshot write
     
     def __init__(self):
         self.config = Config()
@@ -155,6 +186,14 @@ class Bot:
         self.scanner = Scanner(self.pm, self.config)
         self.validator = Validator(self.config, agent_name=self.AGENT_NAME)
         self.context = get_context()  # Shared context
+        self.state_file = "safe_state.json"
+        self._state = load_state(self.state_file)  # this process is the only writer
+        self._state_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._state_timer = None
+        atexit.register(self.flush_state)
+        self._bot_state: Dict = {}
+        self._bot_state_mtime = None
         self.initial_balance = 0.0
         try:
              self.initial_balance = self.pm.get_usdc_balance()
@@ -212,7 +251,7 @@ class Bot:
                             try:
                                 size_usd = float(pos.get('size_usd', 0))
                                 shares = size_usd / entry
-                            except:
+                            except (TypeError, ValueError):
                                 shares = 0
                             
                             if shares > 0:
@@ -283,20 +322,15 @@ class Bot:
 
             # 2. Local Fallback
             try:
-                if os.path.exists("bot_state.json"):
-                    with open("bot_state.json", "r") as f:
-                        state = json.load(f)
-                    return state.get("safe_running", True), state.get("dry_run", True)
-            except: 
-                pass
+                state = self._get_bot_state()
+                return state.get("safe_running", True), state.get("dry_run", True)
+            except (OSError, ValueError) as e:
+                logger.debug(f"bot_state.json unreadable: {e}")
             return True, True
 
         def record_activity(action, endpoint="Gamma"):
             try:
-                state = {}
-                if os.path.exists("bot_state.json"):
-                    with open("bot_state.json", "r") as f:
-                        state = json.load(f)
+                state = dict(self._get_bot_state())
                 state["safe_last_activity"] = f"{action} ({datetime.datetime.now().strftime('%H:%M:%S')})"
                 state["safe_last_endpoint"] = endpoint
                 state["safe_heartbeat"] = datetime.datetime.now().isoformat()  # Heartbeat
@@ -304,7 +338,8 @@ class Bot:
                 # atomic-ish write
                 with open("bot_state.json", "w") as f:
                     json.dump(state, f)
-            except: pass
+            except (OSError, ValueError) as e:
+                logger.debug(f"Activity heartbeat not written: {e}")
                 
         while True:
             # Check pause state
@@ -346,8 +381,8 @@ class Bot:
                 balance = self.initial_balance
                 try:
                     balance = self.pm.get_usdc_balance()
-                except:
-                    pass
+                except Exception as e:
+                    logger.debug(f"Balance check failed, using initial balance: {e}")
                 
                 # Process High Prob
                 for opp in high_prob:
@@ -402,11 +437,9 @@ class Bot:
                                     # Check Dynamic Config for Cap
                                     dynamic_max = 0.50 # Default
                                     try:
-                                        if os.path.exists("bot_state.json"):
-                                            with open("bot_state.json", "r") as f:
-                                                state = json.load(f)
-                                            dynamic_max = float(state.get("dynamic_max_bet", 0.50))
-                                    except: pass
+                                        dynamic_max = float(self._get_bot_state().get("dynamic_max_bet", 0.50))
+                                    except (OSError, ValueError, TypeError):
+                                        pass
                                     
                                     bet_size = min(bet_size, dynamic_max)
                                     
@@ -452,18 +485,48 @@ class Bot:
                 self.save_state({"status": f"Error: {str(e)}"})
                 time.sleep(60)
 
-    def save_state(self, update: Dict):
-        state_file = "safe_state.json"
+    def _get_bot_state(self) -> Dict:
+        """bot_state.json, re-read only when its mtime changes ({} if missing)."""
         try:
-            current = {}
-            if os.path.exists(state_file):
-                with open(state_file, "r") as f:
-                    current = json.load(f)
-            current.update(update)
-            with open(state_file, "w") as f:
-                json.dump(current, f)
-        except Exception as e:
-            logger.error(f"Failed to save state: {e}")
+            mtime = os.stat("bot_state.json").st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime != self._bot_state_mtime:
+            with open("bot_state.json", "r") as f:
+                self._bot_state = json.load(f)
+            self._bot_state_mtime = mtime
+        return self._bot_state
+
+    def save_state(self, update: Dict):
+        """Journal the update and merge it in memory; the snapshot is written at most every STATE_FLUSH_DELAY."""
+        with self._state_lock:
+            # Appended under the lock so flush_state's rotate_journal sees a consistent cut
+            try:
+                append_journal(self.state_file, update)
+            except Exception as e:
+                logger.error(f"Failed to save state: {e}")
+            self._state.update(update)
+            if self._state_timer is None:
+                self._state_timer = threading.Timer(self.STATE_FLUSH_DELAY, self.flush_state)
+                self._state_timer.daemon = True
+                self._state_timer.start()
+
+    def flush_state(self):
+        """Atomically write the in-memory state to safe_state.json."""
+        with self._flush_lock:  # one snapshot at a time, so an older copy never lands last
+            with self._state_lock:
+                if self._state_timer is not None:
+                    self._state_timer.cancel()
+                    self._state_timer = None
+                state = dict(self._state)
+                try:
+                    rotate_journal(self.state_file)  # lines so far are covered by `state`
+                except OSError as e:
+                    logger.error(f"State journal rotate failed: {e}")
+            try:
+                write_snapshot(self.state_file, state)
+            except Exception as e:
+                logger.error(f"Failed to save state: {e}")
 
     def execute_trade(self, opportunity, amount_usd=None):
         """Execute a trade based on === validated opportunity"""
@@ -496,7 +559,7 @@ class Bot:
             )
             
             # Get token ID for the outcome
-            token_ids = ast.literal_eval(market.clob_token_ids)
+            token_ids = _parse_list(market.clob_token_ids)
             token_id = token_ids[0] if outcome.lower() == "yes" else token_ids[1]
             
             # Calculate size
@@ -506,11 +569,9 @@ class Bot:
                  # Fallback - Check Dynamic Config
                  dynamic_max_bet = float(os.getenv("MAX_BET_USD", "0.50"))
                  try:
-                     if os.path.exists("bot_state.json"):
-                         with open("bot_state.json", "r") as f:
-                             state = json.load(f)
-                         dynamic_max_bet = float(state.get("dynamic_max_bet", dynamic_max_bet))
-                 except: pass
+                     dynamic_max_bet = float(self._get_bot_state().get("dynamic_max_bet", dynamic_max_bet))
+                 except (OSError, ValueError, TypeError):
+                     pass
                  
                  bet_amount = min(dynamic_max_bet, 0.50)  
 
@@ -2,6 +2,7 @@ import json
 import os
 import time
 import logging
+import numpy as np
 from typing import Dict, Any, List
 
 # Setup paths (assuming this file is in agents/application/)
@@ -131,29 +132,36 @@ class SmartContext:
         bids = market_data.get('bids', [])
         asks = market_data.get('asks', [])
         
-        # Simple volume sum of top 3 levels
-        bid_vol = sum(float(b['size']) for b in bids[:3]) if bids else 0
-        ask_vol = sum(float(a['size']) for a in asks[:3]) if asks else 0
+        # Top 3 levels as (price, size) rows: volume and VWAP in one pass each
+        bid_levels = self._top_levels(bids)
+        ask_levels = self._top_levels(asks)
+        bid_vol = float(bid_levels[:, 1].sum())
+        ask_vol = float(ask_levels[:, 1].sum())
         
         pressure = "BALANCED"
         if bid_vol > ask_vol * 1.5: pressure = "BUY_PRESSURE"
         if ask_vol > bid_vol * 1.5: pressure = "SELL_PRESSURE"
         
         spread = 0.0
-        if bids and asks:
-            try:
-                best_bid = float(bids[0]['price'])
-                best_ask = float(asks[0]['price'])
-                spread = best_ask - best_bid
-            except: pass
+        if len(bid_levels) and len(ask_levels):
+            spread = float(ask_levels[0, 0] - bid_levels[0, 0])
         
         return {
             "spread": spread,
             "liquidity_pressure": pressure,
             "bid_volume_top3": bid_vol,
-            "ask_volume_top3": ask_vol
+            "ask_volume_top3": ask_vol,
+            "bid_vwap_top3": float(bid_levels[:, 0] @ bid_levels[:, 1]) / bid_vol if bid_vol else 0.0,
+            "ask_vwap_top3": float(ask_levels[:, 0] @ ask_levels[:, 1]) / ask_vol if ask_vol else 0.0
         }
 
+    @staticmethod
+    def _top_levels(levels: List[Dict], depth: int = 3) -> np.ndarray:
+        """First `depth` book levels as a float64 (n, 2) array of price, size."""
+        return np.array(
+            [(float(l['price']), float(l['size'])) for l in levels[:depth]], dtype=np.float64
+        ).reshape(-1, 2)
+
     def _get_whale_positions(self, market_data: Dict) -> Dict[str, Any]:
         """
         Analyze whale positions from market data.
@@ -13,6 +13,7 @@ Strategy:
 """
 
 import os
+import re
 import sys
 import time
 import json
@@ -67,6 +68,23 @@ except ImportError:
 from agents.utils.config import load_config
 from agents.application.smart_context import SmartContext
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+def _parse_list(raw) -> list:
+    """Parse a Gamma JSON-array field (clobTokenIds, outcomePrices); literal_eval only for non-JSON reprs."""
+    if not isinstance(raw, str):
+        return raw
+    try:
+        return _json_loads(raw)
+    except ValueError:
+        import ast
+        return ast.literal_eval(raw)
+
 load_dotenv()
 
 
@@ -125,6 +143,17 @@ EXCLUDE_KEYWORDS = [
     "esports", "lol:", "dota", "counter-strike", "valorant", "bo1", "bo3", "bo5"
 ]
 
+# Sports are handled by the Sports Trader
+EXCLUDE_SPORTS = [
+    "nba", "nfl", "nhl", "mlb", "soccer", "tennis", "ufc", 
+    "basketball", "football", "hockey", "baseball", 
+    " vs ", "premier league", "champions league"
+]
+
+# One case-insensitive C-level scan per field instead of a Python loop of
+# `keyword in text.lower()` checks
+_EXCLUDE_RE = re.compile("|".join(map(re.escape, EXCLUDE_KEYWORDS + EXCLUDE_SPORTS)), re.IGNORECASE)
+
 # Market categories to focus on (fee-free)
 FOCUS_CATEGORIES = [
     "politics",
@@ -166,6 +195,7 @@ class SmartTrader:
         # Track positions
         self.positions = {}  # market_id -> position data
         self.traded_markets = set()
+        self.market_tokens: Dict[str, Tuple[str, str]] = {}  # market id -> (yes_token, no_token)
         
         # Stats
         self.session_start = datetime.datetime.now()
@@ -211,25 +241,11 @@ class SmartTrader:
 
     def is_fee_free_market(self, market: Dict) -> bool:
         """Check if market is fee-free (not 15-min crypto) and NOT sports (handled by Sports Trader)."""
-        question = market.get("question", "").lower()
-        description = market.get("description", "").lower()
-        
-        # 1. Exclude 15-min crypto markets (Legacy)
-        for keyword in EXCLUDE_KEYWORDS:
-            if keyword in question or keyword in description:
-                return False
-
-        # 2. Exclude SPORTS (Handled by Sports Trader now)
-        EXCLUDE_SPORTS = [
-            "nba", "nfl", "nhl", "mlb", "soccer", "tennis", "ufc", 
-            "basketball", "football", "hockey", "baseball", 
-            " vs ", "premier league", "champions league"
-        ]
-        for sport in EXCLUDE_SPORTS:
-            if sport in question or sport in description:
-                return False
-        
-        return True
+        # Excludes 15-min crypto (fees), esports and sports keywords in one pass
+        return not (
+            _EXCLUDE_RE.search(market.get("question") or "")
+            or _EXCLUDE_RE.search(market.get("description") or "")
+        )
 
     def get_fee_free_markets(self, limit=50) -> List[Dict]:
         """Fetch active fee-free markets from Polymarket (future events only)."""
@@ -275,20 +291,22 @@ class SmartTrader:
                     except:
                         pass  # If parsing fails, include the market
                 
-                # Parse tokens
-                clob_ids = m.get("clobTokenIds")
-                if not clob_ids or clob_ids == "[]":
-                    continue
-                
-                try:
-                    import ast
-                    tokens = ast.literal_eval(clob_ids) if isinstance(clob_ids, str) else clob_ids
-                    if len(tokens) >= 2:
-                        m["yes_token"] = tokens[0]
-                        m["no_token"] = tokens[1]
-                        fee_free.append(m)
-                except:
-                    continue
+                # Parse tokens (once per market id; a market's token pair never changes)
+                market_id = m.get("id")
+                tokens = self.market_tokens.get(market_id) if market_id else None
+                if tokens is None:
+                    clob_ids = m.get("clobTokenIds")
+                    if not clob_ids or clob_ids == "[]":
+                        continue
+                    try:
+                        parsed = _parse_list(clob_ids)
+                        tokens = (parsed[0], parsed[1])
+                    except (ValueError, SyntaxError, TypeError, IndexError):
+                        continue
+                    if market_id:
+                        self.market_tokens[market_id] = tokens
+                m["yes_token"], m["no_token"] = tokens
+                fee_free.append(m)
             
             return fee_free[:limit]
             
@@ -323,10 +341,7 @@ class SmartTrader:
         """Get current YES and NO prices for a market."""
         try:
             # Try to get from market data
-            outcomes = market.get("outcomePrices", "[0.5, 0.5]")
-            if isinstance(outcomes, str):
-                import ast
-                outcomes = ast.literal_eval(outcomes)
+            outcomes = _parse_list(market.get("outcomePrices", "[0.5, 0.5]"))
             
             yes_price = float(outcomes[0]) if outcomes else 0.5
             no_price = float(outcomes[1]) if len(outcomes) > 1 else 1 - yes_price
@@ -740,7 +755,7 @@ Only output the JSON, nothing else."""
                 pass
             
             with open(state_file, "w") as f:
-                json.dump(state, f, indent=2)
+                json.dump(state, f)
                 
         except Exception as e:
             print(f"Error saving state: {e}")
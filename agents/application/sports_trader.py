@@ -8,6 +8,7 @@ import time
 import json
 import requests
 import datetime
+import numpy as np
 from typing import Optional, Dict, List, Tuple
 from dotenv import load_dotenv
 
@@ -50,6 +51,35 @@ from agents.utils.config import load_config
 from agents.application.smart_context import SmartContext
 from agents.utils.TradeRecorder import record_trade, update_agent_activity
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+def _parse_list(raw) -> list:
+    """Parse a Gamma JSON-array field (clobTokenIds, outcomePrices); literal_eval only for non-JSON reprs."""
+    if not isinstance(raw, str):
+        return raw
+    try:
+        return _json_loads(raw)
+    except ValueError:
+        import ast
+        return ast.literal_eval(raw)
+
+
+FAVORITE_MIN_PRICE = 0.55  # FILTER 1: must have a clear favorite (>55% implied), not 50/50
+FAVORITE_MAX_PRICE = 0.95  # FILTER 2: skip very high prices (>95c, low upside)
+
+
+def _favorite_filter(yes: np.ndarray, no: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per market: (YES is favorite, favorite price, passes both price filters)."""
+    yes_is_fav = yes >= no
+    fav = np.where(yes_is_fav, yes, no)
+    return yes_is_fav, fav, (fav >= FAVORITE_MIN_PRICE) & (fav <= FAVORITE_MAX_PRICE)
+
+
 # Polymarket Sports Series IDs (for direct Gamma API)
 SPORTS_SERIES = {
     "NBA": 10345,
@@ -128,6 +158,7 @@ class SportsTrader:
         
         # State
         self.positions = {}
+        self.market_tokens: Dict[str, Tuple[str, str]] = {}  # market id -> (yes_token, no_token)
         self.trades_made = 0
         self.total_invested = 0.0
         
@@ -197,6 +228,22 @@ class SportsTrader:
             return True
         return state.get("sports_trader_running", True)
 
+    def _market_tokens(self, m: Dict) -> Optional[Tuple[str, str]]:
+        """(yes_token, no_token) for a Gamma market, parsed once per market id across scans."""
+        market_id = m.get("id")
+        tokens = self.market_tokens.get(market_id)
+        if tokens:
+            return tokens
+        clob_ids = m.get("clobTokenIds", "[]")
+        try:
+            parsed = _parse_list(clob_ids)
+            tokens = (parsed[0], parsed[1])
+        except (ValueError, SyntaxError, TypeError, IndexError):
+            return None
+        if market_id:
+            self.market_tokens[market_id] = tokens
+        return tokens
+
     def get_live_polymarket_sports(self, series_id: int = None) -> List[Dict]:
         """
         Fetch LIVE sports markets directly from Polymarket Gamma API.
@@ -230,19 +277,14 @@ class SportsTrader:
                 
                 for m in event_markets:
                     # Parse token IDs
-                    clob_ids = m.get("clobTokenIds", "[]")
-                    try:
-                        import ast
-                        tokens = ast.literal_eval(clob_ids) if isinstance(clob_ids, str) else clob_ids
-                        if len(tokens) < 2:
-                            continue
-                    except:
+                    tokens = self._market_tokens(m)
+                    if not tokens:
                         continue
                     
                     # Parse prices
                     outcomes = m.get("outcomePrices", "[0.5, 0.5]")
                     if isinstance(outcomes, str):
-                        outcomes = ast.literal_eval(outcomes)
+                        outcomes = _parse_list(outcomes)
                     
                     yes_price = float(outcomes[0]) if outcomes else 0.5
                     no_price = float(outcomes[1]) if len(outcomes) > 1 else 1 - yes_price
@@ -333,15 +375,13 @@ class SportsTrader:
                     if any(team.lower() in question for team in [home_team, away_team]) or \
                        'winner' in question or 'moneyline' in question or 'win' in question:
                         # Extract token IDs properly (same as get_live_polymarket_sports)
-                        clob_ids = market.get("clobTokenIds", "[]")
                         try:
-                            import ast
-                            tokens = ast.literal_eval(clob_ids) if isinstance(clob_ids, str) else clob_ids
-                            if len(tokens) >= 2:
+                            tokens = self._market_tokens(market)
+                            if tokens:
                                 # Parse prices
                                 outcomes = market.get("outcomePrices", "[0.5, 0.5]")
                                 if isinstance(outcomes, str):
-                                    outcomes = ast.literal_eval(outcomes)
+                                    outcomes = _parse_list(outcomes)
 
                                 yes_price = float(outcomes[0]) if outcomes else 0.5
                                 no_price = float(outcomes[1]) if len(outcomes) > 1 else 1 - yes_price
@@ -366,14 +406,12 @@ class SportsTrader:
 
                 # Fallback: return first market if no specific match found
                 market = best_match['markets'][0]
-                clob_ids = market.get("clobTokenIds", "[]")
                 try:
-                    import ast
-                    tokens = ast.literal_eval(clob_ids) if isinstance(clob_ids, str) else clob_ids
-                    if len(tokens) >= 2:
+                    tokens = self._market_tokens(market)
+                    if tokens:
                         outcomes = market.get("outcomePrices", "[0.5, 0.5]")
                         if isinstance(outcomes, str):
-                            outcomes = ast.literal_eval(outcomes)
+                            outcomes = _parse_list(outcomes)
                         yes_price = float(outcomes[0]) if outcomes else 0.5
                         no_price = float(outcomes[1]) if len(outcomes) > 1 else 1 - yes_price
 
@@ -548,7 +586,14 @@ class SportsTrader:
         trades_this_scan = 0
         max_trades_per_scan = 1  # Only allow 1 trade per scan cycle
 
-        for market in markets:
+        # Favorite side/price filters for the whole panel in one NumPy pass
+        yes_is_fav, fav_prices, tradeable = _favorite_filter(
+            np.fromiter((m.get("yes_price", 0.5) for m in markets), dtype=np.float64, count=len(markets)),
+            np.fromiter((m.get("no_price", 0.5) for m in markets), dtype=np.float64, count=len(markets)),
+        )
+
+        for i in np.flatnonzero(tradeable):
+            market = markets[i]
             if trades_this_scan >= max_trades_per_scan:
                 print(f"   ⏸️  Reached max trades per scan ({max_trades_per_scan}). Stopping.")
                 break
@@ -561,27 +606,16 @@ class SportsTrader:
                 print(f"   ⏭️  Skipping {market.get('question')[:20]}... (Active Order Exists)")
                 continue
             question = market.get("question", "")
-            yes_price = market.get("yes_price", 0.5)
-            no_price = market.get("no_price", 0.5)
-            
-            # FILTER 1: Must have a clear favorite (>55% implied)
-            if yes_price < 0.55 and no_price < 0.55:
-                continue  # Too close to 50/50
             
-            # Determine which side is favorite
-            if yes_price >= no_price:
+            # Favorite side (FILTER 1 and FILTER 2 already applied by _favorite_filter)
+            favorite_price = float(fav_prices[i])
+            if yes_is_fav[i]:
                 favorite_side = "YES"
-                favorite_price = yes_price
                 token_id = market.get("yes_token")
             else:
                 favorite_side = "NO"
-                favorite_price = no_price
                 token_id = market.get("no_token")
             
-            # FILTER 2: Skip very high prices (>95c, low upside)
-            if favorite_price > 0.95:
-                continue
-            
             print(f"\n   🔎 Analyzing: {question[:60]}...")
             print(f"      Market: {favorite_side} @ ${favorite_price:.2f}")
             
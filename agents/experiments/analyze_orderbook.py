@@ -1,5 +1,6 @@
 
 import os
+import re
 import sys
 import time
 import requests
@@ -9,6 +10,9 @@ from dotenv import load_dotenv
 sys.path.append(os.getcwd())
 load_dotenv()
 
+# 15-min crypto markets: "Up or Down" plus an asset name anywhere in the question (one regex pass)
+TARGET_RE = re.compile(r"^(?=.*Up or Down)(?=.*(?:Bitcoin|Ethereum|Solana|XRP|BTC|ETH|SOL))")
+
 def get_active_markets():
     """Fetch active 15-min crypto markets."""
     url = "https://gamma-api.polymarket.com/markets"
@@ -26,13 +30,7 @@ def get_active_markets():
         if markets:
             print("SAMPLE MARKET DATA:", markets[0])
         
-        valid = []
-        for m in markets:
-            q = m.get("question", "")
-            # Keywords for 15-min crypto markets
-            if "Up or Down" in q and any(x in q for x in ["Bitcoin", "Ethereum", "Solana", "XRP", "BTC", "ETH", "SOL"]):
-                 valid.append(m)
-        return valid
+        return [m for m in markets if TARGET_RE.search(m.get("question") or "")]
     except Exception as e:
         print(f"Error fetching markets: {e}")
         return []
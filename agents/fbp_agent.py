@@ -7,12 +7,26 @@ Uses Perplexity API with custom tool execution layer.
 
 import os
 import re
+import copy
 import json
+import time
+import atexit
+import asyncio
+import functools
 import logging
+import threading
 import requests
-from typing import List, Dict, Any, Optional, Tuple, Union
-from datetime import datetime
+import httpx
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Callable, List, Dict, Any, Optional, Tuple, Union
+from datetime import datetime, timezone
 from dotenv import load_dotenv
+from web3 import Web3
+from py_clob_client.clob_types import OrderArgs
+from py_clob_client.order_builder.constants import BUY, SELL
 
 # Try to import OpenAI for the main chat loop
 try:
@@ -41,13 +55,28 @@ try:
     from agents.application.smart_context import SmartContext
     from agents.application.hedge_fund_analyst import HedgeFundAnalyst
     from agents.utils.config import load_config, save_config, update_section
+    from agents.application.universal_analyst import UniversalAnalyst
     HAS_INTELLIGENCE = True
 except ImportError:
     HAS_INTELLIGENCE = False
     SmartContext = None
     HedgeFundAnalyst = None
+    UniversalAnalyst = None
     load_config = None
 
+# orjson is a drop-in C parser/serializer; fall back to stdlib json if missing.
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    _dumps = json.dumps
+    _loads = json.loads
+
 load_dotenv()
 logger = logging.getLogger("FBP")
 
@@ -81,12 +110,252 @@ def _get_context():
         _context = get_context()
     return _context
 
+# One pooled session for every external HTTP call (Polymarket, Binance,
+# Perplexity) so repeat calls reuse TCP/TLS connections.
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[429, 502, 503]),
+)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+
+class _SingleFlight:
+    """
+    Collapse concurrent identical calls into one in-flight request.
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait on the same Future instead of issuing their own.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, fn, *args, **kwargs):
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._calls[key] = Future()
+        if not leader:
+            return fut.result()
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            fut.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return fut.result()
+
+
+_single_flight = _SingleFlight()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+
+class _CircuitBreaker:
+    """
+    Fail fast on a degraded dependency.
+    After `max_failures` consecutive errors the breaker opens and calls raise
+    CircuitOpenError immediately for `reset_after` seconds; the next call is
+    then let through as a half-open probe that closes or re-opens it.
+    """
+    def __init__(self, name: str, max_failures: int = 3, reset_after: float = 30.0):
+        self.name = name
+        self.max_failures = max_failures
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failure_count = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_after:
+                    raise CircuitOpenError(self.name)
+                self.state = "half-open"
+
+    def _record(self, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self.state = "closed"
+                self.failure_count = 0
+                return
+            self.failure_count += 1
+            if self.state == "half-open" or self.failure_count >= self.max_failures:
+                if self.state != "open":
+                    logger.warning(f"Circuit '{self.name}' opened after {self.failure_count} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def call(self, fn, *args, **kwargs):
+        self._before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._record(False)
+            raise
+        self._record(True)
+        return result
+
+    async def acall(self, fn, *args, **kwargs):
+        self._before_call()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception:
+            self._record(False)
+            raise
+        self._record(True)
+        return result
+
+
+_perplexity_breaker = _CircuitBreaker("perplexity")
+_binance_breaker = _CircuitBreaker("binance")
+
+# Async counterpart of _SESSION for callers running on an event loop (the API
+# chat handler). The API registers its app.state.http client at startup so the
+# pool lives and dies with the loop; otherwise one is created lazily.
+_async_client: Optional[httpx.AsyncClient] = None
+
+def set_async_client(client: Optional[httpx.AsyncClient]) -> None:
+    global _async_client
+    _async_client = client
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _async_client
+
+# USDC.e contract on Polygon (same as dashboard). Checksumming and ABI parsing
+# are deterministic, so do them once at import instead of per balance call.
+USDC_ADDRESS = Web3.to_checksum_address("0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174")
+USDC_BALANCE_ABI = _loads('[{"constant":true,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"balance","type":"uint256"}],"type":"function"}]')
+POLYGON_RPC_URL = "https://polygon-rpc.com"
+DEFAULT_DASHBOARD_WALLET = "0xdb1f88Ab5B531911326788C018D397d352B7265c"
+_wallet_checksums: Dict[str, str] = {}
+_usdc_contract = None
+
+def _get_dashboard_wallet() -> Tuple[str, str]:
+    """Return (raw, checksummed) dashboard wallet; re-checksums only if the env var changes."""
+    raw = os.getenv("POLYMARKET_PROXY_ADDRESS", DEFAULT_DASHBOARD_WALLET)
+    checksummed = _wallet_checksums.get(raw)
+    if checksummed is None:
+        checksummed = _wallet_checksums[raw] = Web3.to_checksum_address(raw)
+    return raw, checksummed
+
+def _get_usdc_contract():
+    global _usdc_contract
+    if _usdc_contract is None:
+        # Use public RPC to query balance (same as dashboard)
+        w3 = Web3(Web3.HTTPProvider(POLYGON_RPC_URL))
+        _usdc_contract = w3.eth.contract(address=USDC_ADDRESS, abi=USDC_BALANCE_ABI)
+    return _usdc_contract
+
 # Backwards compat - these are now lazy
 pm = None
 config = None
 validator = None
 context = None
 
+# bot_state.json is read by several tools on every chat turn; keep the parsed
+# dict in memory and only re-read it when the file changes on disk.
+BOT_STATE_FILE = "bot_state.json"
+_STATE_CACHE = {"mtime": 0, "data": None}
+
+def _load_state() -> Dict[str, Any]:
+    """Return the parsed bot_state.json, re-reading only when its mtime changes."""
+    st = os.stat(BOT_STATE_FILE)
+    mtime = (st.st_mtime_ns, st.st_size)
+    if _STATE_CACHE["data"] is None or _STATE_CACHE["mtime"] != mtime:
+        with open(BOT_STATE_FILE, "rb") as f:
+            _STATE_CACHE["data"] = _loads(f.read())
+        _STATE_CACHE["mtime"] = mtime
+    return _STATE_CACHE["data"]
+
+def _load_state_or_empty() -> Dict[str, Any]:
+    """_load_state(), but {} when bot_state.json doesn't exist (e.g. a Supabase-only deploy)."""
+    try:
+        return _load_state()
+    except FileNotFoundError:
+        return {}
+
+def _save_state(state: Dict[str, Any]) -> None:
+    """Write bot_state.json and refresh the in-memory cache."""
+    if orjson is not None:
+        with open(BOT_STATE_FILE, "wb") as f:
+            f.write(orjson.dumps(state, option=orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(BOT_STATE_FILE, "w") as f:
+            json.dump(state, f)
+    st = os.stat(BOT_STATE_FILE)
+    _STATE_CACHE["data"] = state
+    _STATE_CACHE["mtime"] = (st.st_mtime_ns, st.st_size)
+
+
+class _StateWriter:
+    """
+    Write-behind buffer for bot_state.json and the Supabase dry-run flag.
+    Updates are visible through _load_state() immediately; the disk write and
+    Supabase call happen once per `delay` window, so a burst of toggles from
+    chat costs one write instead of one per toggle.
+    """
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Any] = {}
+        self._pending_dry_run: Optional[bool] = None
+        self._timer: Optional[threading.Timer] = None
+
+    def update(self, updates: Dict[str, Any], global_dry_run: Optional[bool] = None) -> None:
+        with self._lock:
+            self._pending.update(updates)
+            if global_dry_run is not None:
+                self._pending_dry_run = global_dry_run
+            # Arm the flush first: a failed cache refresh must not strand the update
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            try:
+                _STATE_CACHE["data"] = {**_load_state_or_empty(), **self._pending}
+            except Exception as e:
+                logger.warning(f"Could not refresh bot_state cache: {e}")
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, {}
+            dry_run, self._pending_dry_run = self._pending_dry_run, None
+            if pending:
+                try:
+                    # Re-read so writes from other processes since the last flush survive
+                    _STATE_CACHE["mtime"] = 0
+                    state = dict(_load_state_or_empty())
+                    state.update(pending)
+                    _save_state(state)
+                except Exception as e:
+                    logger.error(f"Failed to update local state: {e}")
+        if dry_run is not None and HAS_SUPABASE:
+            try:
+                get_supabase_state().set_global_dry_run(dry_run)
+            except Exception as e:
+                logger.error(f"Failed to update Supabase: {e}")
+
+
+_state_writer = _StateWriter()
+atexit.register(_state_writer.flush)
+
 
 # =============================================================================
 # TOOL DEFINITIONS
@@ -95,11 +364,13 @@ context = None
 TOOLS = {
     "get_balance": {
         "description": "Get current USDC balance and wallet address",
-        "params": []
+        "params": [],
+        "terminal": True
     },
     "get_positions": {
         "description": "Get all open positions with current value and P&L",
-        "params": []
+        "params": [],
+        "terminal": True
     },
     "get_agents": {
         "description": "Get status of all 3 trading agents (safe, scalper, copyTrader)",
@@ -147,7 +418,8 @@ TOOLS = {
     },
     "get_scalper_metrics": {
         "description": "Get specialized metrics for the Smart Maker-Only Scalper, including instant scalp profits, maker rebates, and compounding velocity.",
-        "params": []
+        "params": [],
+        "terminal": True
     },
     "get_trade_history": {
         "description": "Fetch list of past executed trades.",
@@ -198,25 +470,19 @@ TOOLS = {
 # TOOL IMPLEMENTATIONS
 # =============================================================================
 
+def _get_balance(wallet_checksum: str) -> float:
+    """Read USDC balance for a wallet via the public Polygon RPC."""
+    raw_balance = _get_usdc_contract().functions.balanceOf(wallet_checksum).call()
+    return raw_balance / 10**6  # USDC has 6 decimals
+
+
 def tool_get_balance() -> str:
     """Get USDC balance from live deployment wallet."""
     try:
-        # Use same balance fetching as live deployment dashboard
-        import requests
-        from web3 import Web3
-
-        # USDC.e contract on Polygon (same as dashboard)
-        USDC_ADDRESS = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
-        dashboard_wallet = os.getenv("POLYMARKET_PROXY_ADDRESS", "0xdb1f88Ab5B531911326788C018D397d352B7265c")
+        dashboard_wallet, wallet_checksum = _get_dashboard_wallet()
+        balance = _single_flight.do(f"balance:{wallet_checksum}", _get_balance, wallet_checksum)
 
-        # Use public RPC to query balance (same as dashboard)
-        w3 = Web3(Web3.HTTPProvider("https://polygon-rpc.com"))
-        usdc_abi = '[{"constant":true,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"balance","type":"uint256"}],"type":"function"}]'
-        usdc_contract = w3.eth.contract(address=Web3.to_checksum_address(USDC_ADDRESS), abi=usdc_abi)
-        raw_balance = usdc_contract.functions.balanceOf(Web3.to_checksum_address(dashboard_wallet)).call()
-        balance = raw_balance / 10**6  # USDC has 6 decimals
-
-        return json.dumps({
+        return _dumps({
             "balance_usdc": round(balance, 2),
             "wallet": dashboard_wallet[:10] + "..." + dashboard_wallet[-4:]
         })
@@ -226,72 +492,171 @@ def tool_get_balance() -> str:
             pm = _get_pm()
             balance = pm.get_usdc_balance()
             address = pm.get_address_for_private_key()
-            return json.dumps({
+            return _dumps({
                 "balance_usdc": round(balance, 2),
                 "wallet": address[:10] + "..." + address[-4:]
             })
         except Exception as fallback_e:
-            return json.dumps({"error": f"Both methods failed: Web3({e}), Fallback({fallback_e})"})
+            return _dumps({"error": f"Both methods failed: Web3({e}), Fallback({fallback_e})"})
+
+
+# Positions only change when the wallet trades (plus price drift), so the
+# Data API result is cached and invalidated by CLOB user-channel websocket
+# events. If the websocket is down we fall back to polling REST every call.
+POSITIONS_MAX_AGE = 30  # seconds; bounds staleness of currentValue/P&L
+# "gen" is bumped by every event so a REST fetch that raced one stays dirty.
+_POSITIONS_CACHE: Dict[str, Any] = {"wallet": None, "data": None, "fetched_at": 0.0, "dirty": True, "gen": 0}
+_positions_ws_started = False
+
+def _on_user_ws_event(data: Any) -> None:
+    """Any trade/order event on the user channel invalidates cached positions."""
+    _POSITIONS_CACHE["gen"] += 1
+    _POSITIONS_CACHE["dirty"] = True
+
+def _store_positions(wallet: str, positions: List[Dict], gen: int) -> None:
+    """Cache a REST result; it only counts as clean if no event arrived since `gen`."""
+    cache = _POSITIONS_CACHE
+    cache.update(wallet=wallet, data=positions, fetched_at=time.time())
+    if cache["gen"] == gen:
+        cache["dirty"] = False
+
+def _ensure_positions_ws() -> bool:
+    """Start the user-channel websocket once; returns True if it is connected."""
+    global _positions_ws_started
+    if not _positions_ws_started:
+        _positions_ws_started = True
+        try:
+            pm = _get_pm()
+            pm.add_ws_callback("user", _on_user_ws_event)
+            pm.connect_websocket("user")
+        except Exception as e:
+            logger.warning(f"Positions websocket unavailable, polling REST: {e}")
+    return _pm is not None and _pm.ws_connection is not None
+
+def _fetch_positions(wallet: str) -> List[Dict]:
+    """Return raw Data API positions, served from cache while the websocket is live."""
+    cache = _POSITIONS_CACHE
+    ws_live = _ensure_positions_ws()
+    if (ws_live and not cache["dirty"] and cache["wallet"] == wallet
+            and time.time() - cache["fetched_at"] < POSITIONS_MAX_AGE):
+        return cache["data"]
+    return _single_flight.do(f"positions:{wallet}", _fetch_positions_rest, wallet)
+
+def _fetch_positions_rest(wallet: str) -> List[Dict]:
+    gen = _POSITIONS_CACHE["gen"]
+    url = f"https://data-api.polymarket.com/positions?user={wallet}"
+    resp = _SESSION.get(url, timeout=10)
+    positions = resp.json()
+    _store_positions(wallet, positions, gen)
+    return positions
+
+
+# Last successful result per status tool. When a fetch fails we serve this
+# (flagged stale) instead of an error so chat keeps working through outages.
+_LAST_GOOD_POSITIONS: Dict[str, Any] = {"data": None, "at": 0.0}
+_LAST_GOOD_AGENTS: Dict[str, Any] = {"data": None, "at": 0.0}
+_LAST_GOOD_LOCK = threading.Lock()
+
+def _remember_good(slot: Dict[str, Any], result: Dict[str, Any]) -> str:
+    # Deep copy: callers may pass a shared, later-mutated dict (e.g. _AGENTS_TEMPLATE)
+    snapshot = copy.deepcopy(result)
+    with _LAST_GOOD_LOCK:
+        slot.update(data=snapshot, at=time.time())
+    return _dumps(snapshot)
+
+def _last_good_or_error(slot: Dict[str, Any], e: Exception) -> str:
+    with _LAST_GOOD_LOCK:
+        data, at = slot["data"], slot["at"]
+    if data is None:
+        return _dumps({"error": str(e)})
+    logger.warning(f"Serving last-good state after fetch failure: {e}")
+    return _dumps({"stale": True, "age_s": round(time.time() - at, 1), **data})
+
+
+PositionRow = Tuple[str, str, float, float, float, str]
+
+def _parse_position(p: Dict) -> PositionRow:
+    """Validate one Data API position into (title, outcome, size, cost, value, conditionId)."""
+    title = p["title"] if "title" in p else p.get("question", "Unknown")
+    value = p["currentValue"] if "currentValue" in p else p.get("value")
+    return (
+        str(title or ""),
+        str(p.get("outcome") or "?"),
+        float(p.get("size") or 0),
+        float(p["cost"] or 0) if "cost" in p else 0.0,
+        float(value or 0),
+        str(p.get("conditionId") or ""),
+    )
+
+
+def _summarize_positions(positions: List[Dict]) -> Dict[str, Any]:
+    """Reduce raw Data API positions to the tool's summary payload."""
+    # Malformed payloads raise here and surface as a tool error rather than
+    # being silently dropped row by row.
+    rows = [_parse_position(p) for p in positions if isinstance(p, dict)]
+
+    # Column-wise arithmetic: one vector op instead of a per-row Python loop
+    n = len(rows)
+    sizes = np.fromiter((r[2] for r in rows), dtype=np.float64, count=n)
+    costs = np.fromiter((r[3] for r in rows), dtype=np.float64, count=n)
+    values = np.fromiter((r[4] for r in rows), dtype=np.float64, count=n)
+    pnls = values - costs
+
+    result = [
+        {
+            "title": r[0][:50],
+            "outcome": r[1],
+            "size": size,
+            "value": val,
+            "pnl": pnl,
+            "market_id": r[5][:12]
+        }
+        for r, size, val, pnl in zip(rows, sizes.round(2).tolist(), values.round(2).tolist(), pnls.round(2).tolist())
+    ]
+    total_value = float(values.sum())
+    total_pnl = float(pnls.sum())
+
+    return {
+        "positions": result,
+        "total_value": round(total_value, 2),
+        "total_pnl": round(total_pnl, 2),
+        "count": len(result)
+    }
 
 
 def tool_get_positions() -> str:
     """Get all open positions from live deployment wallet."""
     try:
         # Use DASHBOARD_WALLET for consolidated view (same as live deployment)
-        dashboard_wallet = os.getenv("POLYMARKET_PROXY_ADDRESS", "0xdb1f88Ab5B531911326788C018D397d352B7265c")
-        url = f"https://data-api.polymarket.com/positions?user={dashboard_wallet}"
-        resp = requests.get(url, timeout=10)
-        positions = resp.json()
-
-        result = []
-        total_value = 0
-        total_pnl = 0
-
-        for p in positions:
-            try:
-                market = p.get("title", p.get("question", "Unknown"))
-                side = p.get("outcome", "?")
-                cost = float(p.get("cost", 0))
-                val = float(p.get("currentValue", p.get("value", 0)))
-                pnl = val - cost
-                total_value += val
-                total_pnl += pnl
-
-                result.append({
-                    "title": market[:50],
-                    "outcome": side,
-                    "size": round(float(p.get("size", 0)), 2),
-                    "value": round(val, 2),
-                    "pnl": round(pnl, 2),
-                    "market_id": p.get("conditionId", "")[:12]
-                })
-            except Exception as e:
-                logger.warning(f"Error processing position: {e}")
-                continue
-
-        return json.dumps({
-            "positions": result,
-            "total_value": round(total_value, 2),
-            "total_pnl": round(total_pnl, 2),
-            "count": len(result)
-        })
+        dashboard_wallet, _ = _get_dashboard_wallet()
+        positions = _fetch_positions(dashboard_wallet)
+        return _remember_good(_LAST_GOOD_POSITIONS, _summarize_positions(positions))
     except Exception as e:
-        return json.dumps({"error": str(e)})
-
+        return _last_good_or_error(_LAST_GOOD_POSITIONS, e)
+
+
+# (response key, agent_state name, activity when running, activity when stopped)
+_ACTIVE, _IDLE, _OFF = "Active", "Idle", "Off"
+_AGENT_SLOTS = (
+    ("safe", "safe", _ACTIVE, "Paused"),
+    ("scalper", "scalper", "HFT Arbitrage", _IDLE),
+    ("copyTrader", "copy", "Monitoring whales", "None"),
+    ("smartTrader", "smart", _IDLE, _OFF),
+    ("esportsTrader", "esports", _ACTIVE, _OFF),
+    ("sportsTrader", "sport", _ACTIVE, _OFF),
+)
+_AGENTS_TEMPLATE: Dict[str, Any] = {key: {"running": False, "activity": ""} for key, _, _, _ in _AGENT_SLOTS}
+_AGENTS_TEMPLATE["dry_run"] = True
+_AGENTS_TEMPLATE_LOCK = threading.Lock()
 
 def tool_get_agents() -> str:
     """Get status of all trading agents from live deployment with heartbeat check."""
     try:
-        import time
-        from datetime import datetime
-
-        def is_active(agent_name: str, supa_state, local_state) -> bool:
+        def is_active(agent_name: str, supa_rows, local_state) -> bool:
             """Check if agent is active based on heartbeat."""
-            hb = None
-            if supa_state:
-                try:
-                    hb = supa_state.get_agent_heartbeat(agent_name)
-                except: pass
+            # Missing rows fall back to running, matching SupabaseState.get_agent_state
+            row = supa_rows.get(agent_name, {}) if supa_rows is not None else None
+            hb = row.get("heartbeat") if row else None
             
             if not hb and local_state:
                 hb = local_state.get(f"{agent_name}_heartbeat")
@@ -302,68 +667,51 @@ def tool_get_agents() -> str:
                         if time.time() - hb < 60: return True
                     elif isinstance(hb, str):
                         hb_dt = datetime.fromisoformat(hb.replace('Z', '+00:00'))
-                        import datetime as dt
-                        if (dt.datetime.now(dt.timezone.utc) - hb_dt).total_seconds() < 60: return True
+                        if (datetime.now(timezone.utc) - hb_dt).total_seconds() < 60: return True
                 except: pass
             
             # Fallback
-            if supa_state:
-                try: return supa_state.is_agent_running(agent_name)
-                except: pass
+            if row is not None:
+                return row.get("is_running", True)
             
             if local_state:
                 return local_state.get(f"{agent_name}_running", False)
             
             return False
 
-        supa = None
+        supa_rows = None
         state = {}
         if HAS_SUPABASE:
-            try: supa = get_supabase_state()
+            # One batched agent_state query instead of two REST calls per agent
+            try: supa_rows = get_supabase_state().get_all_agent_states()
             except: pass
             
         try:
-            with open("bot_state.json", "r") as f:
-                state = json.load(f)
+            state = _load_state()
         except: pass
 
-        safe_running = is_active("safe", supa, state)
-        scalper_running = is_active("scalper", supa, state)
-        copy_running = is_active("copy", supa, state)
-        smart_running = is_active("smart", supa, state)
-        esports_running = is_active("esports", supa, state)
-        sports_running = is_active("sport", supa, state)
-        dry_run = state.get("dry_run", True)
-
-        return json.dumps({
-            "safe": {
-                "running": safe_running,
-                "activity": "Active" if safe_running else "Paused"
-            },
-            "scalper": {
-                "running": scalper_running,
-                "activity": "HFT Arbitrage" if scalper_running else "Idle"
-            },
-            "copyTrader": {
-                "running": copy_running,
-                "activity": "Monitoring whales" if copy_running else "None"
-            },
-            "smartTrader": {
-                "running": smart_running,
-                "activity": "Idle" if smart_running else "Off"
-            },
-            "esportsTrader": {
-                "running": esports_running,
-                "activity": "Active" if esports_running else "Off"
-            },
-            "sportsTrader": {
-                "running": sports_running,
-                "activity": "Active" if sports_running else "Off"
-            },
-            "dry_run": dry_run
-        })
+        running = [is_active(name, supa_rows, state) for _, name, _, _ in _AGENT_SLOTS]
+
+        # Fill the shared template in place rather than building fresh dicts
+        with _AGENTS_TEMPLATE_LOCK:
+            for (key, _, on, off), is_on in zip(_AGENT_SLOTS, running):
+                slot = _AGENTS_TEMPLATE[key]
+                slot["running"] = is_on
+                slot["activity"] = on if is_on else off
+            _AGENTS_TEMPLATE["dry_run"] = state.get("dry_run", True)
+            return _remember_good(_LAST_GOOD_AGENTS, _AGENTS_TEMPLATE)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _last_good_or_error(_LAST_GOOD_AGENTS, e)
+
+
+def _yes_price(m: Dict) -> float:
+    """Parse the YES price out of a Gamma market's outcomePrices JSON string."""
+    try:
+        raw = m.get("outcomePrices")
+        prices = _loads(raw) if raw else []
+        return float(prices[0]) if prices else 0
+    except:
+        return 0
 
 
 def tool_search_markets(query: str) -> str:
@@ -376,68 +724,81 @@ def tool_search_markets(query: str) -> str:
             "active": "true",
             "closed": "false"
         }
-        resp = requests.get(url, params=params, timeout=10)
+        resp = _SESSION.get(url, params=params, timeout=10)
         markets = resp.json()
         
-        # Filter by query
+        # Filter by query first (C-level substring find), then parse
+        # outcomePrices only for the markets we actually return.
         query_lower = query.lower()
-        matches = []
-        
-        # 1. Exact/Substring match in filtered list
-        for m in markets:
-            q = m.get("question", "").lower()
-            if query_lower in q:
-                try:
-                    prices = json.loads(m.get("outcomePrices", "[]")) if m.get("outcomePrices") else []
-                    yes_price = float(prices[0]) if prices else 0
-                except:
-                    yes_price = 0
-                
-                matches.append({
+        hits = [m for m in markets if m.get("question", "").lower().find(query_lower) != -1]
+
+        if hits:
+            matches = [
+                {
                     "id": m.get("id", "")[:12],
                     "question": m.get("question", "")[:80],
-                    "yes_price": round(yes_price, 3),
+                    "yes_price": round(_yes_price(m), 3),
                     "volume": m.get("volume", 0)
-                })
-        
-        # 2. If no matches, try generic popular markets
-        if not matches:
-             matches.append({"note": "No direct matches found. Showing popular markets instead."})
-             for m in markets[:5]:
-                try:
-                    prices = json.loads(m.get("outcomePrices", "[]"))
-                    yes_price = float(prices[0]) if prices else 0
-                except: yes_price = 0
-                matches.append({
+                }
+                for m in hits[:10]
+            ]
+            count = len(hits)
+        else:
+            # If no matches, try generic popular markets
+            matches = [{"note": "No direct matches found. Showing popular markets instead."}]
+            matches.extend(
+                {
                     "id": m.get("id", "")[:12],
                     "question": m.get("question", "")[:80],
-                    "yes_price": round(yes_price, 3)
-                })
+                    "yes_price": round(_yes_price(m), 3)
+                }
+                for m in markets[:5]
+            )
+            count = len(matches)
 
-        return json.dumps({
+        return _dumps({
             "markets": matches[:10],
-            "count": len(matches)
+            "count": count
         })
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
+
+
+def _fetch_market_rest(market_id: str) -> Dict:
+    url = f"https://gamma-api.polymarket.com/markets/{market_id}"
+    resp = _SESSION.get(url, timeout=10)
+    return resp.json()
+
+def _fetch_market(market_id: str) -> Dict:
+    """Fetch a Gamma market, sharing the request with concurrent callers."""
+    return _single_flight.do(f"market:{market_id}", _fetch_market_rest, market_id)
+
+MARKET_DETAILS_TTL = 30  # seconds per cache bucket
+
+@functools.lru_cache(maxsize=256)
+def _fetch_market_bucketed(market_id: str, bucket: int) -> Dict:
+    # `bucket` only rotates the cache key every MARKET_DETAILS_TTL seconds
+    return _fetch_market(market_id)
+
+def _fetch_market_cached(market_id: str) -> Dict:
+    """Market details memoized for up to MARKET_DETAILS_TTL seconds (read-only callers)."""
+    return _fetch_market_bucketed(market_id, int(time.time() // MARKET_DETAILS_TTL))
 
 
 def tool_get_market_details(market_id: str) -> str:
     """Get detailed market info."""
     try:
-        url = f"https://gamma-api.polymarket.com/markets/{market_id}"
-        resp = requests.get(url, timeout=10)
-        m = resp.json()
+        m = _fetch_market_cached(market_id)
         
         try:
-            prices = json.loads(m.get("outcomePrices", "[]")) if m.get("outcomePrices") else []
+            prices = _loads(m.get("outcomePrices", "[]")) if m.get("outcomePrices") else []
             yes_price = float(prices[0]) if prices else 0
             no_price = float(prices[1]) if len(prices) > 1 else 1 - yes_price
         except:
             yes_price = 0
             no_price = 0
         
-        return json.dumps({
+        return _dumps({
             "question": m.get("question", ""),
             "yes_price": round(yes_price, 3),
             "no_price": round(no_price, 3),
@@ -447,7 +808,7 @@ def tool_get_market_details(market_id: str) -> str:
             "condition_id": m.get("conditionId", "")
         })
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 def tool_research(topic: str) -> str:
@@ -455,7 +816,7 @@ def tool_research(topic: str) -> str:
     try:
         api_key = _get_config().PERPLEXITY_API_KEY
         if not api_key:
-            return json.dumps({"error": "No Perplexity API key"})
+            return _dumps({"error": "No Perplexity API key"})
         
         headers = {
             "Authorization": f"Bearer {api_key}",
@@ -470,18 +831,24 @@ def tool_research(topic: str) -> str:
             "max_tokens": 300
         }
         
-        resp = requests.post(
-            "https://api.perplexity.ai/chat/completions",
-            json=payload,
-            headers=headers,
-            timeout=30
-        )
-        result = resp.json()
+        def _post():
+            resp = _SESSION.post(
+                "https://api.perplexity.ai/chat/completions",
+                json=payload,
+                headers=headers,
+                timeout=30
+            )
+            resp.raise_for_status()
+            return resp.json()
+
+        result = _perplexity_breaker.call(_post)
         content = result["choices"][0]["message"]["content"]
         
-        return json.dumps({"research": content})
+        return _dumps({"research": content})
+    except CircuitOpenError:
+        return _dumps({"error": "circuit_open", "service": "perplexity"})
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 def tool_analyze_market(market_question: str, current_price: float) -> str:
@@ -491,7 +858,7 @@ def tool_analyze_market(market_question: str, current_price: float) -> str:
             market_question, "YES", current_price
         )
         
-        return json.dumps({
+        return _dumps({
             "recommendation": "BET" if is_valid else "PASS",
             "reason": reason,
             "confidence": round(confidence, 2),
@@ -499,36 +866,31 @@ def tool_analyze_market(market_question: str, current_price: float) -> str:
             "edge": round((confidence - current_price) * 100, 1) if is_valid else 0
         })
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 def tool_open_trade(market_id: str, outcome: str, amount_usd: float) -> str:
     """Open a new trade."""
     try:
         # Get market details first
-        url = f"https://gamma-api.polymarket.com/markets/{market_id}"
-        resp = requests.get(url, timeout=10)
-        market = resp.json()
+        market = _fetch_market(market_id)
         
         clob_ids = market.get("clobTokenIds")
         if not clob_ids:
-            return json.dumps({"error": "Market has no CLOB tokens"})
+            return _dumps({"error": "Market has no CLOB tokens"})
         
-        tokens = json.loads(clob_ids) if isinstance(clob_ids, str) else clob_ids
+        tokens = _loads(clob_ids) if isinstance(clob_ids, str) else clob_ids
         token_id = tokens[0] if outcome.upper() == "YES" else tokens[1]
         
         # Get current price
-        prices = json.loads(market.get("outcomePrices", "[]"))
+        prices = _loads(market.get("outcomePrices", "[]"))
         price = float(prices[0]) if outcome.upper() == "YES" else float(prices[1])
         
         # Calculate size
-        if price <= 0: return json.dumps({"error": "Price is 0 or invalid"})
+        if price <= 0: return _dumps({"error": "Price is 0 or invalid"})
         size = amount_usd / price
         
         # Place order
-        from py_clob_client.clob_types import OrderArgs
-        from py_clob_client.order_builder.constants import BUY
-        
         pm = _get_pm()
         order_args = OrderArgs(
             token_id=str(token_id),
@@ -541,7 +903,7 @@ def tool_open_trade(market_id: str, outcome: str, amount_usd: float) -> str:
         result = pm.client.post_order(signed)
         
         if result.get("success") or result.get("status") == "matched":
-            return json.dumps({
+            return _dumps({
                 "status": "success",
                 "market": market.get("question", "")[:50],
                 "outcome": outcome,
@@ -550,10 +912,10 @@ def tool_open_trade(market_id: str, outcome: str, amount_usd: float) -> str:
                 "shares": round(size, 2)
             })
         else:
-            return json.dumps({"error": f"Order failed: {result.get('status', 'unknown')}"})
+            return _dumps({"error": f"Order failed: {result.get('status', 'unknown')}"})
             
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 def tool_close_position(market_id: str) -> str:
@@ -563,7 +925,7 @@ def tool_close_position(market_id: str) -> str:
         # Get current positions
         address = pm.get_address_for_private_key()
         url = f"https://data-api.polymarket.com/positions?user={address}"
-        resp = requests.get(url, timeout=10)
+        resp = _SESSION.get(url, timeout=10)
         positions = resp.json()
         
         # Find the position
@@ -574,7 +936,7 @@ def tool_close_position(market_id: str) -> str:
                 break
         
         if not position:
-            return json.dumps({"error": f"Position not found for {market_id}"})
+            return _dumps({"error": f"Position not found for {market_id}"})
         
         # Get token to sell
         token_id = position.get("asset")
@@ -583,10 +945,10 @@ def tool_close_position(market_id: str) -> str:
         
         # Check if position has any value
         if size <= 0:
-            return json.dumps({"error": "No shares to sell", "size": size})
+            return _dumps({"error": "No shares to sell", "size": size})
         
         if current_value <= 0.01:
-            return json.dumps({
+            return _dumps({
                 "status": "worthless",
                 "message": "Position is worthless (value ~$0). Nothing to recover.",
                 "market": position.get("title", "")[:50],
@@ -602,7 +964,7 @@ def tool_close_position(market_id: str) -> str:
                 sell_price = max(0.01, best_bid - 0.01)
             else:
                 # No bids = can't sell
-                return json.dumps({
+                return _dumps({
                     "status": "no_buyers",
                     "message": "No buyers in orderbook. Market may be resolved or illiquid.",
                     "market": position.get("title", "")[:50]
@@ -616,9 +978,6 @@ def tool_close_position(market_id: str) -> str:
         sell_price = max(0.001, min(0.999, sell_price))
         
         # Place sell order
-        from py_clob_client.clob_types import OrderArgs
-        from py_clob_client.order_builder.constants import SELL
-        
         order_args = OrderArgs(
             token_id=str(token_id),
             price=sell_price,
@@ -630,7 +989,7 @@ def tool_close_position(market_id: str) -> str:
         result = pm.client.post_order(signed)
         
         if result.get("success") or result.get("status") == "matched":
-            return json.dumps({
+            return _dumps({
                 "status": "success",
                 "market": position.get("title", "")[:50],
                 "shares_sold": round(size, 2),
@@ -638,14 +997,14 @@ def tool_close_position(market_id: str) -> str:
                 "expected_return": round(size * sell_price, 2)
             })
         else:
-            return json.dumps({
+            return _dumps({
                 "status": "pending",
                 "message": f"Order placed at ${sell_price:.3f}. May fill when buyer matches.",
                 "order_status": result.get("status", "unknown")
             })
             
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 def tool_toggle_agent(agent: str, enabled: bool) -> str:
@@ -653,33 +1012,16 @@ def tool_toggle_agent(agent: str, enabled: bool) -> str:
     try:
         # Handle Global Dry Run
         if agent.lower() in ["dry_run", "dryrun", "simulation"]:
-            # Update local state
-            try:
-                with open("bot_state.json", "r") as f:
-                    state = json.load(f)
-                state["dry_run"] = enabled
-                with open("bot_state.json", "w") as f:
-                    json.dump(state, f, indent=2)
-            except Exception as e:
-                logger.error(f"Failed to update local state: {e}")
-
-            # Update Supabase
-            try:
-                supa = get_supabase_state()
-                supa.set_global_dry_run(enabled)
-            except Exception as e:
-                logger.error(f"Failed to update Supabase: {e}")
+            # Local state + Supabase are flushed together by the write-behind buffer
+            _state_writer.update({"dry_run": enabled}, global_dry_run=enabled)
             
             mode = "DRY RUN (Simulation)" if enabled else "LIVE TRADING (Real Money)"
-            return json.dumps({
+            return _dumps({
                 "status": "success",
                 "mode": mode,
                 "message": f"System switched to {mode}"
             })
 
-        with open("bot_state.json", "r") as f:
-            state = json.load(f)
-        
         key_map = {
             "safe": "safe_running",
             "scalper": "scalper_running",
@@ -687,38 +1029,41 @@ def tool_toggle_agent(agent: str, enabled: bool) -> str:
         }
         
         if agent not in key_map:
-            return json.dumps({"error": f"Unknown agent: {agent}"})
+            return _dumps({"error": f"Unknown agent: {agent}"})
         
-        state[key_map[agent]] = enabled
+        _state_writer.update({key_map[agent]: enabled})
         
-        with open("bot_state.json", "w") as f:
-            json.dump(state, f, indent=2)
-        
-        return json.dumps({
+        return _dumps({
             "status": "success",
             "agent": agent,
             "enabled": enabled
         })
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
+
+
+PRICE_SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT"]
+
+def _round_price(price: float) -> float:
+    return round(price, 2) if price < 1000 else round(price, 0)
 
 
 def tool_get_prices() -> str:
     """Get current crypto prices from Binance."""
     try:
-        symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT"]
         prices = {}
         
-        for symbol in symbols:
+        for symbol in PRICE_SYMBOLS:
             url = f"https://api.binance.com/api/v3/ticker/price?symbol={symbol}"
-            resp = requests.get(url, timeout=5)
+            resp = _binance_breaker.call(_SESSION.get, url, timeout=5)
             data = resp.json()
-            price = float(data.get("price", 0))
-            prices[symbol.replace("USDT", "")] = round(price, 2) if price < 1000 else round(price, 0)
+            prices[symbol.replace("USDT", "")] = _round_price(float(data.get("price", 0)))
         
-        return json.dumps(prices)
+        return _dumps(prices)
+    except CircuitOpenError:
+        return _dumps({"error": "circuit_open", "service": "binance"})
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 def tool_get_llm_activity(limit: int = 10) -> str:
@@ -737,9 +1082,9 @@ def tool_get_llm_activity(limit: int = 10) -> str:
                 "time": a.get("timestamp", "")[:19]
             })
         
-        return json.dumps({"activities": result})
+        return _dumps({"activities": result})
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 def tool_broadcast_command(message: str, target: str) -> str:
@@ -747,13 +1092,13 @@ def tool_broadcast_command(message: str, target: str) -> str:
     try:
         # Use 'USER' as sender so agents know it's an imperative command
         _get_context().broadcast("USER", message, {"type": "command", "target": target})
-        return json.dumps({
+        return _dumps({
             "status": "success",
             "message": f"Command sent to {target}: {message}",
             "timestamp": datetime.now().isoformat()
         })
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 def tool_get_trade_history(limit: int = 20) -> str:
@@ -764,17 +1109,17 @@ def tool_get_trade_history(limit: int = 20) -> str:
         summary = []
         for t in trades:
             summary.append(f"{t.get('side')} {t.get('size')} shares of {t.get('price')} (ID: {t.get('asset_id')})")
-        return json.dumps({"trades": summary if summary else trades})
+        return _dumps({"trades": summary if summary else trades})
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 def tool_redeem_winnings() -> str:
     """Trigger redemption."""
     try:
         res = _get_pm().redeem_all_winnings()
-        return json.dumps(res)
+        return _dumps(res)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 def tool_get_scalper_metrics() -> str:
     """Get specialized HFT metrics for the Smart Maker-Only Scalper."""
@@ -788,11 +1133,10 @@ def tool_get_scalper_metrics() -> str:
         total_volume_24h = sum(t.get('amount', 0) for t in trades)
         estimated_rebate = total_volume_24h * 0.00035  # 3.5bps Maker Rebate
             
-        with open("bot_state.json", "r") as f:
-            state = json.load(f)
+        state = _load_state()
         trade_count = state.get("stats", {}).get("tradeCount", len(trades))
         
-        return json.dumps({
+        return _dumps({
             "instant_scalp_total": round(instant_scalp_total, 2),
             "estimated_rebate": round(estimated_rebate, 2),
             "compounding_velocity": trade_count,
@@ -801,7 +1145,7 @@ def tool_get_scalper_metrics() -> str:
             "net_roi": round((instant_scalp_total / 150.0) * 100, 2)
         })
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 # =============================================================================
 # NEW INTELLIGENCE LAYER TOOL IMPLEMENTATIONS
@@ -810,18 +1154,18 @@ def tool_get_scalper_metrics() -> str:
 def tool_get_smart_context() -> str:
     """Get smart context snapshot."""
     if not HAS_INTELLIGENCE:
-        return json.dumps({"error": "Intelligence layer (SmartContext) not available"})
+        return _dumps({"error": "Intelligence layer (SmartContext) not available"})
     try:
         ctx = SmartContext()
         snapshot = ctx.get_snapshot()
-        return json.dumps(snapshot)
+        return _dumps(snapshot)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 def tool_analyze_trade_opportunity(market_question: str, outcome: str, proposed_size_usd: float, current_price: float) -> str:
     """Ask Hedge Fund Analyst."""
     if not HAS_INTELLIGENCE:
-        return json.dumps({"error": "Intelligence layer (HedgeFundAnalyst) not available"})
+        return _dumps({"error": "Intelligence layer (HedgeFundAnalyst) not available"})
     try:
         analyst = HedgeFundAnalyst()
         decision = analyst.analyze_opportunity(
@@ -830,9 +1174,9 @@ def tool_analyze_trade_opportunity(market_question: str, outcome: str, proposed_
             odds=current_price,
             size_usd=proposed_size_usd
         )
-        return json.dumps(decision)
+        return _dumps(decision)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 def tool_manual_override(action: str, market_id: str, amount_usd: float, reason: str) -> str:
     """Queue a manual command."""
@@ -847,15 +1191,15 @@ def tool_manual_override(action: str, market_id: str, amount_usd: float, reason:
             "reason": reason
         }
         _get_context().broadcast("USER_OVERRIDE", f"MANUAL OVERRIDE: {action}", payload)
-        return json.dumps({"status": "queued", "message": f"Queued {action} on {market_id}"})
+        return _dumps({"status": "queued", "message": f"Queued {action} on {market_id}"})
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 def tool_update_config(agent_name: str, setting_key: str, setting_value: Any) -> str:
     """Update config."""
     try:
         if not HAS_INTELLIGENCE:
-             return json.dumps({"error": "Config management not loaded"})
+             return _dumps({"error": "Config management not loaded"})
         
         # Determine value type
         try:
@@ -867,9 +1211,9 @@ def tool_update_config(agent_name: str, setting_key: str, setting_value: Any) ->
             elif val.lower() == "false": val = False
             
         new_conf = update_section(agent_name, {setting_key: val})
-        return json.dumps({"status": "updated", "new_config": new_conf.get(agent_name, {})})
+        return _dumps({"status": "updated", "new_config": new_conf.get(agent_name, {})})
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 # =============================================================================
 # ALPHA RESEARCH TOOL IMPLEMENTATIONS
@@ -879,20 +1223,19 @@ def tool_analyze_sentiment(token: str) -> str:
     """Analyze sentiment velocity for a token."""
     try:
         if not HAS_INTELLIGENCE:
-            return json.dumps({"error": "Universal Analyst not available"})
+            return _dumps({"error": "Universal Analyst not available"})
         
-        from agents.application.universal_analyst import UniversalAnalyst
         analyst = UniversalAnalyst()
         result = analyst.analyze_sentiment_velocity(token)
-        return json.dumps(result)
+        return _dumps(result)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 def tool_scan_narratives(sectors: str) -> str:
     """Scan sector narratives."""
     try:
         if not HAS_INTELLIGENCE:
-            return json.dumps({"error": "Universal Analyst not available"})
+            return _dumps({"error": "Universal Analyst not available"})
         
         # Parse sectors list from string if needed
         sector_list = []
@@ -902,43 +1245,208 @@ def tool_scan_narratives(sectors: str) -> str:
             else:
                 sector_list = [s.strip() for s in sectors.split(",")]
 
-        from agents.application.universal_analyst import UniversalAnalyst
         analyst = UniversalAnalyst()
         result = analyst.scan_sector_narratives(sector_list)
-        return json.dumps(result)
+        return _dumps(result)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 def tool_build_exit_plan(token: str, entry_price: float, current_price: float) -> str:
     """Build exit strategy."""
     try:
         if not HAS_INTELLIGENCE:
-            return json.dumps({"error": "Universal Analyst not available"})
+            return _dumps({"error": "Universal Analyst not available"})
             
-        from agents.application.universal_analyst import UniversalAnalyst
         analyst = UniversalAnalyst()
         result = analyst.build_exit_strategy(token, float(entry_price), float(current_price))
-        return json.dumps(result)
+        return _dumps(result)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 def tool_rug_check(project: str) -> str:
     """Execute rug check."""
     try:
         if not HAS_INTELLIGENCE:
-            return json.dumps({"error": "Universal Analyst not available"})
+            return _dumps({"error": "Universal Analyst not available"})
             
-        from agents.application.universal_analyst import UniversalAnalyst
         analyst = UniversalAnalyst()
         result = analyst.deception_audit(project)
-        return json.dumps(result)
+        return _dumps(result)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 # =============================================================================
 # FBP AGENT CLASS (CHAT HANDLER)
 # =============================================================================
 
+# =============================================================================
+# ASYNC TOOL VARIANTS
+# =============================================================================
+# Non-blocking versions of the network-bound tools for use from the API's
+# event loop, e.g. asyncio.gather(atool_get_balance(), atool_get_positions(),
+# atool_get_prices()) finishes in max(RTT) instead of sum(RTT).
+
+async def _aget_balance(wallet_checksum: str) -> float:
+    """balanceOf via a raw eth_call so the RPC round-trip doesn't block the loop."""
+    call_data = "0x70a08231" + wallet_checksum[2:].lower().rjust(64, "0")
+    resp = await _get_async_client().post(POLYGON_RPC_URL, json={
+        "jsonrpc": "2.0", "id": 1, "method": "eth_call",
+        "params": [{"to": USDC_ADDRESS, "data": call_data}, "latest"],
+    })
+    result = _loads(resp.content)["result"]
+    return int(result, 16) / 10**6  # USDC has 6 decimals
+
+
+async def atool_get_balance() -> str:
+    """Async tool_get_balance."""
+    try:
+        dashboard_wallet, wallet_checksum = _get_dashboard_wallet()
+        balance = await _aget_balance(wallet_checksum)
+        return _dumps({
+            "balance_usdc": round(balance, 2),
+            "wallet": dashboard_wallet[:10] + "..." + dashboard_wallet[-4:]
+        })
+    except Exception as e:
+        logger.warning(f"Async balance fetch failed, using sync fallback: {e}")
+        return await asyncio.to_thread(tool_get_balance)
+
+
+async def atool_get_positions() -> str:
+    """Async tool_get_positions; shares the websocket-invalidated cache."""
+    try:
+        dashboard_wallet, _ = _get_dashboard_wallet()
+        cache = _POSITIONS_CACHE
+        if (_ensure_positions_ws() and not cache["dirty"] and cache["wallet"] == dashboard_wallet
+                and time.time() - cache["fetched_at"] < POSITIONS_MAX_AGE):
+            positions = cache["data"]
+        else:
+            gen = cache["gen"]
+            url = f"https://data-api.polymarket.com/positions?user={dashboard_wallet}"
+            resp = await _get_async_client().get(url, timeout=10)
+            positions = _loads(resp.content)
+            _store_positions(dashboard_wallet, positions, gen)
+        return _remember_good(_LAST_GOOD_POSITIONS, _summarize_positions(positions))
+    except Exception as e:
+        return _last_good_or_error(_LAST_GOOD_POSITIONS, e)
+
+
+async def atool_get_prices() -> str:
+    """Async tool_get_prices; all symbols are requested concurrently."""
+    try:
+        client = _get_async_client()
+        responses = await asyncio.gather(*(
+            _binance_breaker.acall(client.get, f"https://api.binance.com/api/v3/ticker/price?symbol={symbol}", timeout=5)
+            for symbol in PRICE_SYMBOLS
+        ))
+        prices = {}
+        for symbol, resp in zip(PRICE_SYMBOLS, responses):
+            prices[symbol.replace("USDT", "")] = _round_price(float(_loads(resp.content).get("price", 0)))
+        return _dumps(prices)
+    except CircuitOpenError:
+        return _dumps({"error": "circuit_open", "service": "binance"})
+    except Exception as e:
+        return _dumps({"error": str(e)})
+
+
+ASYNC_TOOLS = {
+    "get_balance": atool_get_balance,
+    "get_positions": atool_get_positions,
+    "get_prices": atool_get_prices,
+}
+
+
+# Chat context bounds: once history passes SUMMARY_TRIGGER messages, everything
+# but the system prompt and the last ~MAX_HISTORY_MESSAGES is folded into a summary.
+MAX_HISTORY_MESSAGES = 40
+SUMMARY_TRIGGER = 60
+SUMMARY_MODEL = "gpt-4o-mini"
+
+def _assistant_dict(msg: Any) -> Dict[str, Any]:
+    """
+    Flatten an OpenAI ChatCompletionMessage into a plain dict once, so later
+    requests don't re-serialize the pydantic object on every turn.
+    """
+    out: Dict[str, Any] = {"role": "assistant", "content": msg.content}
+    if msg.tool_calls:
+        out["tool_calls"] = [
+            {
+                "id": tc.id,
+                "type": "function",
+                "function": {"name": tc.function.name, "arguments": tc.function.arguments},
+            }
+            for tc in msg.tool_calls
+        ]
+    return out
+
+# Formatters for tools marked "terminal" in TOOLS: a single such call is
+# answered directly from its JSON, skipping the interpretation LLM call.
+def _fmt_balance(r: Dict[str, Any]) -> str:
+    return f"Balance: ${r['balance_usdc']:,.2f} USDC (wallet {r['wallet']})"
+
+def _fmt_positions(r: Dict[str, Any]) -> str:
+    lines = [f"{r['count']} open positions, total value ${r['total_value']:,.2f}, P&L ${r['total_pnl']:+,.2f}"]
+    if r.get("stale"):
+        lines[0] += f" (last known, {r['age_s']:.0f}s old)"
+    for p in r["positions"]:
+        lines.append(f"- {p['title']} [{p['outcome']}]: ${p['value']:,.2f} (P&L ${p['pnl']:+,.2f})")
+    return "\n".join(lines)
+
+def _fmt_scalper_metrics(r: Dict[str, Any]) -> str:
+    return (
+        f"Scalper: instant scalp ${r['instant_scalp_total']:,.2f}, "
+        f"est. maker rebates ${r['estimated_rebate']:,.2f}, "
+        f"velocity {r['compounding_velocity']} trades, ROI {r['net_roi']}% "
+        f"(daily goal ${r['daily_goal']:,.0f}, bankroll ${r['bankroll']:,.0f})"
+    )
+
+_TERMINAL_FORMATTERS = {
+    "get_balance": _fmt_balance,
+    "get_positions": _fmt_positions,
+    "get_scalper_metrics": _fmt_scalper_metrics,
+}
+
+def _run_tool(func_name: str, args: Dict[str, Any]) -> str:
+    """Dispatch one model tool call; errors come back as a JSON error payload."""
+    try:
+        tool_func = globals().get(f"tool_{func_name}")
+        if tool_func and func_name in TOOLS:
+            # TOOLS declares each tool's accepted params; drop anything else
+            valid_args = {k: args[k] for k in TOOLS[func_name]["params"] if k in args}
+            return tool_func(**valid_args)
+        return _dumps({"error": f"Tool {func_name} not implemented"})
+    except Exception as e:
+        return _dumps({"error": str(e)})
+
+# Tool params declared as JSON numbers in the OpenAI schema; all others are strings
+_NUMBER_PARAMS = frozenset({"amount_usd", "current_price"})
+
+
+def _build_tool_definitions() -> List[Dict[str, Any]]:
+    """OpenAI function schemas for TOOLS in a fixed (sorted) order."""
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": name,
+                "description": TOOLS[name]["description"],
+                "parameters": {
+                    "type": "object",
+                    "properties": dict([
+                        (p, {"type": "number" if p in _NUMBER_PARAMS else "string"})
+                        for p in TOOLS[name]["params"]
+                    ]),
+                    "required": list(TOOLS[name]["params"])
+                }
+            }
+        }
+        for name in sorted(TOOLS)
+    ]
+
+# TOOLS is static: build the schema once so the serialized prompt prefix
+# (system prompt + tools) is identical on every call and hits OpenAI's prompt cache.
+TOOL_DEFINITIONS = _build_tool_definitions()
+
+
 class FBPAgent:
     """
     Stateful interface for the FBP Agent Chat.
@@ -973,15 +1481,88 @@ Style:
 """}
         ]
         
+        # Same list object for every turn keeps the cached prompt prefix byte-identical
+        self._tool_definitions = TOOL_DEFINITIONS
+        
         if HAS_OPENAI:
             self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         else:
             self.client = None
             logger.warning("OpenAI client not initialized (missing import or key)")
 
-    def process_message(self, user_message: str) -> Dict[str, Any]:
+    def _compact_history(self) -> None:
+        """Fold old turns into one summary message so context stays bounded."""
+        if len(self.history) <= SUMMARY_TRIGGER:
+            return
+        # Cut on a user message so no tool result is separated from its tool call
+        cut = len(self.history) - MAX_HISTORY_MESSAGES
+        while cut < len(self.history) - 1 and self.history[cut]["role"] != "user":
+            cut += 1
+        old = self.history[1:cut]
+        # Tool payloads are the bulk of the context and are stale by now; summarize the dialogue only
+        transcript = "\n".join(
+            f"{m['role']}: {m['content']}"
+            for m in old
+            if m["role"] != "tool" and m.get("content")
+        )
+        try:
+            resp = self.client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": "Summarize this prior trading session in <=300 tokens. Keep positions, trades, market ids, agent/config changes and open questions."},
+                    {"role": "user", "content": transcript},
+                ],
+                max_tokens=400,
+            )
+            summary = resp.choices[0].message.content
+        except Exception as e:
+            logger.warning(f"History summary failed, dropping old turns: {e}")
+            summary = "(earlier conversation omitted)"
+        # history[0] stays untouched so the prompt prefix remains cacheable
+        self.history = [
+            self.history[0],
+            {"role": "system", "content": f"Summary of prior turns: {summary}"},
+        ] + self.history[cut:]
+
+    def _complete(self, on_token: Optional[Callable[[str], None]] = None, **kwargs) -> Any:
+        """
+        One chat completion. With on_token, the response is streamed: content
+        deltas are passed to on_token as they arrive and tool_calls are
+        accumulated across chunks into a plain assistant message dict.
+        """
+        if on_token is None:
+            return _assistant_dict(self.client.chat.completions.create(**kwargs).choices[0].message)
+
+        content: List[str] = []
+        calls: Dict[int, Dict[str, Any]] = {}
+        for chunk in self.client.chat.completions.create(stream=True, **kwargs):
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content.append(delta.content)
+                on_token(delta.content)
+            for tc in delta.tool_calls or ():
+                slot = calls.setdefault(tc.index, {
+                    "id": None, "type": "function",
+                    "function": {"name": "", "arguments": ""},
+                })
+                if tc.id:
+                    slot["id"] = tc.id
+                if tc.function:
+                    slot["function"]["name"] += tc.function.name or ""
+                    slot["function"]["arguments"] += tc.function.arguments or ""
+
+        msg: Dict[str, Any] = {"role": "assistant", "content": "".join(content) or None}
+        if calls:
+            msg["tool_calls"] = [calls[i] for i in sorted(calls)]
+        return msg
+
+    def process_message(self, user_message: str,
+                        on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Process a user message, execute tools, and return response.
+        If on_token is given, the reply text is streamed to it as generated.
         Returns: {
             "response": str,
             "tool_calls": List[Dict]  # For UI display
@@ -992,87 +1573,83 @@ Style:
 
         # Add user message
         self.history.append({"role": "user", "content": user_message})
+        self._compact_history()
         
-        tool_definitions = []
-        for name, tool in TOOLS.items():
-            tool_definitions.append({
-                "type": "function",
-                "function": {
-                    "name": name,
-                    "description": tool["description"],
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            p: {"type": "string" if p != "amount_usd" and p != "current_price" else "number"} 
-                            for p in tool["params"]
-                        },
-                        "required": tool["params"]
-                    }
-                }
-            })
+        tool_definitions = self._tool_definitions
 
         # 1. First LLM Call
         try:
-            response = self.client.chat.completions.create(
+            msg = self._complete(
+                on_token,
                 model="gpt-4o", # Use high intelligence model
                 messages=self.history,
                 tools=tool_definitions,
-                tool_choice="auto"
+                tool_choice="auto",
+                user=self.session_id
             )
-            
-            msg = response.choices[0].message
             self.history.append(msg)
             
             executed_tools = []
             
             # 2. Handle Tool Calls
-            if msg.tool_calls:
-                for tc in msg.tool_calls:
-                    func_name = tc.function.name
-                    args = json.loads(tc.function.arguments)
-                    
+            if msg.get("tool_calls"):
+                calls = []
+                for tc in msg["tool_calls"]:
+                    call_id, func_name = tc["id"], tc["function"]["name"]
+                    args = _loads(tc["function"]["arguments"])
                     logger.info(f"FBP Tool Call: {func_name}({args})")
-                    
-                    # Execute
-                    result_str = ""
-                    try:
-                        # Dynamic dispatch
-                        tool_func = globals().get(f"tool_{func_name}")
-                        if tool_func:
-                            # Introspect params to pass correctly
-                            # Simple approach: pass kwargs
-                            import inspect
-                            sig = inspect.signature(tool_func)
-                            # call with kwargs that match signature
-                            valid_args = {k: v for k, v in args.items() if k in sig.parameters}
-                            result_str = tool_func(**valid_args)
-                        else:
-                            result_str = json.dumps({"error": f"Tool {func_name} not implemented"})
-                    except Exception as e:
-                        result_str = json.dumps({"error": str(e)})
+                    calls.append((call_id, func_name, args))
+
+                # Tools are I/O bound; run independent calls concurrently
+                if len(calls) == 1:
+                    results = [_run_tool(calls[0][1], calls[0][2])]
+                else:
+                    with ThreadPoolExecutor(max_workers=min(8, len(calls))) as ex:
+                        results = list(ex.map(lambda c: _run_tool(c[1], c[2]), calls))
 
+                # Record in tool_call order so the model sees a deterministic sequence
+                for (call_id, func_name, args), result_str in zip(calls, results):
                     # Record execution for UI
                     executed_tools.append({
                         "tool": func_name,
                         "params": args,
-                        "result": json.loads(result_str) if result_str.startswith("{") or result_str.startswith("[") else result_str
+                        "result": _loads(result_str) if result_str[:1] in ("{", "[") else result_str
                     })
                     
                     # Append result to history
                     self.history.append({
                         "role": "tool",
-                        "tool_call_id": tc.id,
+                        "tool_call_id": call_id,
                         "content": result_str
                     })
                 
+                # Single self-describing tool result: answer directly, no second LLM call
+                if len(executed_tools) == 1 and TOOLS.get(executed_tools[0]["tool"], {}).get("terminal"):
+                    result = executed_tools[0]["result"]
+                    if isinstance(result, dict) and "error" not in result:
+                        try:
+                            final_content = _TERMINAL_FORMATTERS[executed_tools[0]["tool"]](result)
+                        except (KeyError, TypeError, ValueError) as e:
+                            logger.warning(f"Terminal formatter failed, falling back to LLM: {e}")
+                        else:
+                            self.history.append({"role": "assistant", "content": final_content})
+                            if on_token:
+                                on_token(final_content)
+                            return {
+                                "response": final_content,
+                                "tool_calls": executed_tools
+                            }
+
                 # 3. Second LLM Call (Interpret results)
-                response2 = self.client.chat.completions.create(
+                msg2 = self._complete(
+                    on_token,
                     model="gpt-4o",
                     messages=self.history,
+                    user=self.session_id
                     # No tools needed for final response usually, but keep simple
                 )
-                final_content = response2.choices[0].message.content
-                self.history.append(response2.choices[0].message)
+                final_content = msg2["content"]
+                self.history.append(msg2)
                 
                 return {
                     "response": final_content,
@@ -1081,7 +1658,7 @@ Style:
             
             else:
                 return {
-                    "response": msg.content,
+                    "response": msg["content"],
                     "tool_calls": []
                 }
                 
@@ -1,93 +1,221 @@
 """
-5-Agent Orchestrator with Auto-Restart
-Runs: Safe, Scalper, Copy, Sports, Esports
+Multi-Agent Orchestrator with Auto-Restart
+Runs the agents listed in the manifest (AGENT_MANIFEST, JSON) or DEFAULT_AGENTS:
+Safe, Scalper, Copy, Smart, Sports, Esports
 """
+import atexit
 import multiprocessing
 import os
+import json
+import runpy
 import signal
+import selectors
 import sys
 print("   🚀 AGENT STARTING... PYTHONPATH=" + str(sys.path))
 
 import time
+import importlib
+import traceback
 import subprocess
+from collections import deque
 from datetime import datetime
 
-# Agent configs: (module, args, restart_delay)
+# Agent manifest: name -> module, args, restart_delay, startup_delay.
+# startup_delay staggers launches (seconds after the previous agent) to avoid API rate limits.
 # NOTE: pyml_trader uses --dry-run (inverted), others use --live
-AGENTS = {
+DEFAULT_AGENTS = {
     "SafeAgent": {
         "module": "agents.application.pyml_trader",
         "args": ["--dry-run"],  # Enforce dry run
         "restart_delay": 5,
+        "startup_delay": 0,
     },
     "ScalperAgent": {
         "module": "agents.application.pyml_scalper",
         "args": [], # Removed --live
         "restart_delay": 3,
+        "startup_delay": 2,
     },
     "CopyTrader": {
         "module": "agents.application.pyml_copy_trader",
         "args": [], # Removed --live
         "restart_delay": 5,
+        "startup_delay": 4,
     },
     "SmartAgent": {
         "module": "agents.application.smart_trader",
         "args": [], # Removed --live
         "restart_delay": 10,
+        "startup_delay": 6,
     },
     "SportsAgent": {
         "module": "agents.application.sports_trader",
         "args": [], # Removed --live
         "restart_delay": 10,
+        "startup_delay": 8,
     },
     "EsportsAgent": {
         "module": "agents.application.esports_trader",
         "args": ["--growth"], # Removed --live
         "restart_delay": 10,
+        "startup_delay": 10,
     },
 }
 
-# Staggered startup delays (seconds) to avoid API rate limits
-STARTUP_DELAYS = {
-    "SafeAgent": 0,
-    "ScalperAgent": 2,
-    "CopyTrader": 4,
-    "SmartAgent": 6,
-    "SportsAgent": 8,
-    "EsportsAgent": 10,
-}
+
+def load_manifest(path: str) -> dict:
+    """Agent manifest from a JSON file if present, else DEFAULT_AGENTS."""
+    if not os.path.exists(path):
+        return DEFAULT_AGENTS
+    with open(path) as f:
+        agents = json.load(f)
+    for name, config in agents.items():
+        config.setdefault("args", [])
+        config.setdefault("restart_delay", 5)
+        config.setdefault("startup_delay", 0)
+    return agents
+
+
+AGENTS = load_manifest(os.getenv("AGENT_MANIFEST", "agents_manifest.json"))
 
 MAX_RESTARTS = 5  # Max restarts per agent per hour
-restart_counts = {name: [] for name in AGENTS}  # Track restart timestamps
+# Last MAX_RESTARTS restart timestamps per agent; the oldest decides the limit.
+restart_counts = {name: deque(maxlen=MAX_RESTARTS) for name in AGENTS}
 
 
-def run_agent(name: str, module: str, args: list):
-    """Run a single agent as subprocess."""
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting {name}...")
+# Heavy shared dependencies imported once per worker before forking, so
+# each (re)start of an agent inherits them instead of paying the import cost.
+WARM_IMPORTS = (
+    "requests",
+    "httpx",
+    "web3",
+    "py_clob_client.client",
+    "agents.polymarket.polymarket",
+    "agents.polymarket.gamma",
+)
+
+
+def warm_imports():
+    """Pre-import WARM_IMPORTS in the worker; failures are left to the agent."""
+    for mod in WARM_IMPORTS:
+        try:
+            importlib.import_module(mod)
+        except Exception:
+            pass
+
+
+def fork_agent(module: str, args: list):
+    """Fork and run `module` as __main__ in the child. Returns (pid, read_fd).
+
+    The child gets default SIGINT/SIGTERM handling and runs the agent's own
+    atexit handlers (state flushes, log queue drain) before exiting.
+    """
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            # Not the orchestrator: don't inherit its signal handlers or exit hooks
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            atexit._clear()
+            os.close(r)
+            os.dup2(w, 1)
+            os.dup2(w, 2)
+            os.close(w)
+            sys.stdout.reconfigure(line_buffering=True)
+            sys.stderr.reconfigure(line_buffering=True)
+            sys.argv = [module] + list(args)
+            runpy.run_module(module, run_name="__main__", alter_sys=True)
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            try:
+                atexit._run_exitfuncs()  # os._exit below skips them
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(code)
+    os.close(w)
+    return pid, r
+
+
+def spawn_agent(module: str, args: list):
+    """Fallback without os.fork: run the agent as a subprocess."""
     cmd = ["python3", "-m", module] + args
     env = os.environ.copy()
     env["PYTHONPATH"] = "."
     env["PYTHONUNBUFFERED"] = "1"
-    
-    # Use Popen for non-blocking execution
-    proc = subprocess.Popen(
+    return subprocess.Popen(
         cmd,
         env=env,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
+        bufsize=0,
     )
-    
-    # Stream output with agent prefix
+
+
+def run_agent(name: str, module: str, args: list):
+    """Run a single agent in a forked child (subprocess where fork is unavailable)."""
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting {name}...")
+    proc = None
+    status = None
+    if hasattr(os, "fork"):
+        pid, fd = fork_agent(module, args)
+    else:
+        proc = spawn_agent(module, args)
+        fd = proc.stdout.fileno()
+
+    def exited() -> bool:
+        nonlocal status
+        if proc is not None:
+            return proc.poll() is not None
+        if status is None:
+            done, st = os.waitpid(pid, os.WNOHANG)
+            if done:
+                status = st
+        return status is not None
+
+    # Stream output with agent prefix. Non-blocking reads behind a selector
+    # with a 1s timeout, so the exit is noticed even if a grandchild still
+    # holds the pipe open.
+    os.set_blocking(fd, False)
+    sel = selectors.DefaultSelector()
+    sel.register(fd, selectors.EVENT_READ)
+    pending = b""
     try:
-        for line in proc.stdout:
-            print(f"[{name}] {line.rstrip()}")
+        while True:
+            events = sel.select(timeout=1.0)
+            if not events:
+                if exited():
+                    break
+                continue
+            try:
+                chunk = os.read(fd, 65536)
+            except BlockingIOError:
+                continue
+            if not chunk:
+                break  # EOF
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                print(f"[{name}] {line.decode(errors='replace').rstrip()}")
+        if pending:
+            print(f"[{name}] {pending.decode(errors='replace').rstrip()}")
     except:
         pass
-    
-    proc.wait()
-    return proc.returncode
+    finally:
+        sel.close()
+
+    if proc is not None:
+        proc.wait()
+        return proc.returncode
+    os.close(fd)
+    if status is None:
+        _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
 
 
 def should_restart(name: str) -> bool:
@@ -95,19 +223,18 @@ def should_restart(name: str) -> bool:
     now = time.time()
     hour_ago = now - 3600
     
-    # Clean old entries
-    restart_counts[name] = [t for t in restart_counts[name] if t > hour_ago]
-    
-    if len(restart_counts[name]) >= MAX_RESTARTS:
+    dq = restart_counts[name]
+    if len(dq) == MAX_RESTARTS and dq[0] > hour_ago:
         print(f"⚠️ {name} hit restart limit ({MAX_RESTARTS}/hour). Pausing restarts.")
         return False
     
-    restart_counts[name].append(now)
+    dq.append(now)
     return True
 
 
 def agent_worker(name: str, config: dict):
     """Worker that runs agent and auto-restarts on crash."""
+    warm_imports()
     while True:
         exit_code = run_agent(name, config["module"], config["args"])
         
@@ -148,13 +275,13 @@ def main():
     
     # Staggered startup
     print("=" * 60)
-    print("🚀 POLYAGENT 5-AGENT ORCHESTRATOR")
+    print(f"🚀 POLYAGENT {len(AGENTS)}-AGENT ORCHESTRATOR")
     print("=" * 60)
     print(f"Agents: {', '.join(AGENTS.keys())}")
     print("=" * 60)
     
     for name, config in AGENTS.items():
-        delay = STARTUP_DELAYS.get(name, 0)
+        delay = config.get("startup_delay", 0)
         if delay > 0:
             print(f"⏳ Waiting {delay}s before starting {name}...")
             time.sleep(delay)
@@ -169,19 +296,41 @@ def main():
         print(f"✅ {name} started (PID: {p.pid})")
     
     print("\n" + "=" * 60)
-    print("🟢 All 5 agents running. Press Ctrl+C to stop.")
+    print(f"🟢 All {len(AGENTS)} agents running. Press Ctrl+C to stop.")
     print("=" * 60 + "\n")
     
-    # Monitor loop
+    # Wake the monitor as soon as a worker exits instead of polling. The
+    # SIGCHLD handler does nothing itself: the interpreter writes the signal
+    # number to the wakeup pipe, so no lock is ever taken in signal context.
+    # Installed after the workers fork so they don't inherit it; the first
+    # pass runs immediately to cover any worker that died during startup.
+    has_sigchld = hasattr(signal, "SIGCHLD")
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    if has_sigchld:
+        signal.signal(signal.SIGCHLD, lambda sig, frame: None)
+    wake_sel = selectors.DefaultSelector()
+    wake_sel.register(wake_r, selectors.EVENT_READ)
+    
+    # Monitor loop: block until SIGCHLD (30s poll only where SIGCHLD is unavailable)
+    reported_dead = set()
+    first_pass = True
     while not shutdown_flag:
-        time.sleep(30)
+        if not first_pass and wake_sel.select(None if has_sigchld else 30):
+            try:
+                while os.read(wake_r, 512):
+                    pass
+            except BlockingIOError:
+                pass
+        first_pass = False
         
-        dead_agents = []
-        for name, p in processes.items():
-            if not p.is_alive():
-                dead_agents.append(name)
+        dead_agents = [name for name, p in processes.items()
+                       if name not in reported_dead and not p.is_alive()]
         
         if dead_agents:
+            reported_dead.update(dead_agents)
             print(f"\n⚠️ Dead agents: {dead_agents}")
             # Workers handle their own restarts, so just log
 
@@ -41,6 +41,19 @@ def main():
     losses = 0
     pending = 0
     
+    # Two batched lookups for every tracked token instead of two requests per trade
+    token_ids = [t["token_id"] for t in trades if t.get("token_id")]
+    try:
+        markets = pm.get_markets_by_token_ids(token_ids)
+    except Exception as e:
+        print(f"⚠️ Market lookup failed: {e}")
+        markets = {}
+    try:
+        prices = pm.get_midpoints(token_ids)
+    except Exception as e:
+        print(f"⚠️ Price lookup failed, using entry prices: {e}")
+        prices = {}
+
     print(f"{'AGENT':<15} {'MARKET':<40} {'SIDE':<10} {'ENTRY':<8} {'CURR':<8} {'PnL':<10}")
     print("-" * 100)
 
@@ -61,26 +74,20 @@ def main():
         # Check current price
         curr_price = entry_price # Default to entry if lookup fails
         status = "OPEN"
-        try:
-            # 1. Check if resolved
-            m = pm.get_market(token_id)
-            if m and getattr(m, "closed", False):
-                # Resolved
-                # How to get winner? 
-                # Simplified: Check if token index matches winner
-                # This is complex without full market object, assume 0 or 100 for now based on 'winner' field if it exists
-                status = "RESOLVED"
-                # For now, let's just get the price. If resolved, price should be 0 or 1.
-                # Polymarket 'price' usually reflects this.
-            
-            # Get latest price
-            # We can use get_mid_price or fetch active markets
-            price_data = pm.get_price(token_id)
-            if price_data:
-                curr_price = float(price_data)
-                
-        except Exception as e:
-            pass # Keep entry price
+        # 1. Check if resolved
+        m = markets.get(token_id)
+        if m and getattr(m, "closed", False):
+            # Resolved
+            # How to get winner? 
+            # Simplified: Check if token index matches winner
+            # This is complex without full market object, assume 0 or 100 for now based on 'winner' field if it exists
+            status = "RESOLVED"
+            # For now, let's just get the price. If resolved, price should be 0 or 1.
+            # Polymarket 'price' usually reflects this.
+        
+        # Get latest price
+        if token_id in prices:
+            curr_price = prices[token_id]
             
         # Calculate PnL
         shares = amount / entry_price if entry_price > 0 else 0
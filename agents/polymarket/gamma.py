@@ -1,34 +1,47 @@
 import httpx
 import json
-import requests
+import time
 import datetime
 
-from agents.polymarket.polymarket import Polymarket
+from agents.polymarket.polymarket import Polymarket, _SESSION
 from agents.utils.objects import Market, PolymarketEvent, ClobReward, Tag
 
+# Keep-alive clients shared by every GammaMarketClient: discovery and the
+# scripts built on it make many back-to-back calls to the same hosts.
+_HTTPX = httpx.Client(limits=httpx.Limits(max_connections=32, max_keepalive_connections=16))
+
 
 class GammaMarketClient:
+    DISCOVERY_TTL = 60  # seconds
     def __init__(self):
         self.gamma_url = "https://gamma-api.polymarket.com"
         self.gamma_markets_endpoint = self.gamma_url + "/markets"
         self.gamma_events_endpoint = self.gamma_url + "/events"
+        # 15-min discovery is polled every few seconds; the market set only
+        # changes at window boundaries and fee rates never change per token.
+        self._discovery_cache = (None, 0.0, [])  # (window boundary ts, fetched_at, markets)
+        self._fee_cache = {}  # token_id -> fee_bps
 
     def discover_15min_crypto_markets(self):
         """
         CENTRALIZED: Discovers 15-minute crypto markets using slug-based pattern.
         This is the CORRECT method that all agents should use.
         """
-        print(f"🔍 [Gamma] Discovering 15-minute crypto markets (slug-based)...")
-
-        found_markets = []
-
         # Calculate current valid 15-minute time windows dynamically
-        import datetime
         now = datetime.datetime.now(datetime.timezone.utc)
         current_minute = now.minute
         rounded_minute = (current_minute // 15) * 15
         current_boundary = now.replace(minute=rounded_minute, second=0, microsecond=0)
 
+        # Reuse the last result within the same window for up to DISCOVERY_TTL seconds
+        cached_boundary, fetched_at, cached_markets = self._discovery_cache
+        if cached_boundary == current_boundary and time.time() - fetched_at < self.DISCOVERY_TTL:
+            return cached_markets
+
+        print(f"🔍 [Gamma] Discovering 15-minute crypto markets (slug-based)...")
+
+        found_markets = []
+
         time_windows = [
             int(current_boundary.timestamp()),                                    # Current window
             int((current_boundary + datetime.timedelta(minutes=15)).timestamp()), # Next window
@@ -46,7 +59,7 @@ class GammaMarketClient:
                     slug = f"{asset}-updown-15m-{timestamp}"
                     params = {"slug": slug}
 
-                    resp = requests.get(self.gamma_events_endpoint, params=params, timeout=5)
+                    resp = _SESSION.get(self.gamma_events_endpoint, params=params, timeout=5)
                     events = resp.json()
 
                     if events:
@@ -75,15 +88,18 @@ class GammaMarketClient:
                             }.get(asset, asset)
 
                             # Get fee rate for the market
-                            fee_bps = 1000  # Default for 15-minute markets
-                            try:
-                                # Try to fetch actual fee rate
-                                resp = requests.get("https://clob.polymarket.com/fee-rate", params={"token_id": clob_ids[0]}, timeout=2)
-                                if resp.status_code == 200:
-                                    data = resp.json()
-                                    fee_bps = int(data.get("base_fee", 1000))
-                            except:
-                                pass  # Use default if API fails
+                            fee_bps = self._fee_cache.get(clob_ids[0])
+                            if fee_bps is None:
+                                fee_bps = 1000  # Default for 15-minute markets
+                                try:
+                                    # Try to fetch actual fee rate
+                                    resp = _SESSION.get("https://clob.polymarket.com/fee-rate", params={"token_id": clob_ids[0]}, timeout=2)
+                                    if resp.status_code == 200:
+                                        data = resp.json()
+                                        fee_bps = int(data.get("base_fee", 1000))
+                                        self._fee_cache[clob_ids[0]] = fee_bps
+                                except:
+                                    pass  # Use default if API fails
 
                             print(f"      ✅ {m['question']} (Fee: {fee_bps} bps)")
 
@@ -103,6 +119,7 @@ class GammaMarketClient:
                     continue
 
         print(f"   🎯 Found {len(found_markets)} valid 15-minute crypto markets.")
+        self._discovery_cache = (current_boundary, time.time(), found_markets)
         return found_markets
 
     def parse_pydantic_market(self, market_object: dict) -> Market:
@@ -170,7 +187,7 @@ class GammaMarketClient:
                 'Cannot use "parse_pydantic" and "local_file" params simultaneously.'
             )
 
-        response = httpx.get(self.gamma_markets_endpoint, params=querystring_params)
+        response = _HTTPX.get(self.gamma_markets_endpoint, params=querystring_params)
         if response.status_code == 200:
             data = response.json()
             if local_file_path is not None:
@@ -195,7 +212,7 @@ class GammaMarketClient:
                 'Cannot use "parse_pydantic" and "local_file" params simultaneously.'
             )
 
-        response = httpx.get(self.gamma_events_endpoint, params=querystring_params)
+        response = _HTTPX.get(self.gamma_events_endpoint, params=querystring_params)
         if response.status_code == 200:
             data = response.json()
             if local_file_path is not None:
@@ -271,7 +288,7 @@ class GammaMarketClient:
     def get_market(self, market_id: int) -> dict():
         url = self.gamma_markets_endpoint + "/" + str(market_id)
         print(url)
-        response = httpx.get(url)
+        response = _HTTPX.get(url)
         return response.json()
 
 
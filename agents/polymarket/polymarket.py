@@ -2,16 +2,31 @@
 # https://github.com/Polymarket/py-clob-client/tree/main/examples
 
 import os
+import re
 import pdb
 import time
 import ast
 import json
 import base64
+import queue
+import random
 import requests
-import websocket
-import threading
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Optional, Callable, Any
 
+# Websocket book updates are parsed per frame; orjson takes the raw bytes/str directly.
+try:
+    import orjson
+    from orjson import loads as _ws_loads
+
+    def _ws_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()  # websocket-client sends str as a text frame
+except ImportError:
+    from json import loads as _ws_loads, dumps as _ws_dumps
+import asyncio
+import websockets
+import threading
+
 from dotenv import load_dotenv
 
 from web3 import Web3
@@ -36,6 +51,7 @@ from py_clob_client.clob_types import (
     MarketOrderArgs,
     OrderType,
     OrderBookSummary,
+    BookParams,
 )
 from py_clob_client.order_builder.constants import BUY
 
@@ -43,9 +59,112 @@ from agents.utils.objects import SimpleMarket, SimpleEvent
 
 load_dotenv()
 
+_QUOTES_RE = re.compile(r"[\"']")
+
+# L2 API creds derived from the wallet key, per (key, signature_type, funder).
+# Deriving is a signed network round-trip; every agent/tool that builds a
+# Polymarket() in the same process reuses the first result.
+_DERIVED_CREDS: Dict[tuple, ApiCreds] = {}
+
+# Wallet address per private key. from_key is an elliptic-curve derivation and
+# get_address_for_private_key() is called on every positions/balance lookup.
+_KEY_ADDRESSES: Dict[str, str] = {}
+
+
+def _book_mid(book: Dict) -> Optional[float]:
+    """Mid of a websocket "book" event (levels are not guaranteed best-first)."""
+    try:
+        best_bid = max(float(l["price"]) for l in book["bids"])
+        best_ask = min(float(l["price"]) for l in book["asks"])
+    except (KeyError, TypeError, ValueError):  # also empty sides
+        return None
+    return (best_bid + best_ask) / 2
+
+
+def skip_unchanged_mid(callback: Callable, min_change: float = 0.0005) -> Callable:
+    """
+    Wrap a market-channel callback so "book" events reach it only when the
+    asset's mid moved by at least `min_change` since the last one it saw.
+    Sub-tick book churn is the bulk of market-channel traffic. Other events
+    always pass through.
+    """
+    last_mid: Dict[str, float] = {}
+
+    def wrapper(data: Any) -> None:
+        if isinstance(data, dict) and data.get("event_type") == "book":
+            mid = _book_mid(data)
+            asset = data.get("asset_id")
+            if mid is not None:
+                prev = last_mid.get(asset)
+                # Compare against the last delivered mid so slow drift still adds up
+                if prev is not None and abs(mid - prev) < min_change:
+                    return
+                last_mid[asset] = mid
+        callback(data)
+
+    return wrapper
+
+
+def _clean_env(var: str) -> str:
+    """Env var with whitespace and stray quotes stripped (common .env mangling)."""
+    val = _QUOTES_RE.sub("", os.getenv(var, "").strip())
+    # Fix base64 padding for CLOB_SECRET (must be multiple of 4)
+    if var == "CLOB_SECRET" and val and len(val) % 4 != 0:
+        val = val + '=' * (4 - len(val) % 4)
+    return val
+
+
+# Market-channel assets per socket; larger subscriptions are split across extra sockets
+MAX_ASSETS_PER_WEBSOCKET = 500
+
+# Market-channel event types that are never dropped under backpressure. The other
+# market events ("book", "price_change") are superseded by the next one anyway.
+_WS_RELIABLE_MARKET_EVENTS = ("last_trade_price", "tick_size_change")
+
+
+def _ws_droppable(channel_type: str, message) -> bool:
+    """True for market-channel book/price_change frames, the only ones safe to drop."""
+    if channel_type != "market":
+        return False  # user-channel order/trade events must all be delivered
+    if isinstance(message, bytes):
+        return not any(e.encode() in message for e in _WS_RELIABLE_MARKET_EVENTS)
+    return not any(e in message for e in _WS_RELIABLE_MARKET_EVENTS)
+
+# One keep-alive pool shared by every Polymarket instance in the process, so
+# repeat Gamma/CLOB REST calls skip the TCP/TLS handshake.
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+
+class _WsSocket:
+    """One websocket task on Polymarket's event loop and the ids it subscribes on every connect.
+
+    send() and close() are safe to call from any thread.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, channel_type: str, ids: set) -> None:
+        self.loop = loop
+        self.channel_type = channel_type
+        self.ids = ids
+        self.ws = None  # set while connected
+        self.future = None  # concurrent.futures.Future of the run task
+
+    def send(self, message: str) -> None:
+        ws = self.ws
+        if ws is None:
+            raise ConnectionError("WS not open")
+        asyncio.run_coroutine_threadsafe(ws.send(message), self.loop).result(timeout=5)
+
+    def close(self) -> None:
+        if self.future:
+            self.future.cancel()
+
 
 class Polymarket:
     def __init__(self) -> None:
+        self._session = _SESSION
         self.gamma_url = "https://gamma-api.polymarket.com"
         self.gamma_markets_endpoint = self.gamma_url + "/markets"
         self.gamma_events_endpoint = self.gamma_url + "/events"
@@ -57,7 +176,7 @@ class Polymarket:
 
         # --- KEY FIX START ---
         # Fetch key, strip whitespace/newlines, remove quotes
-        pk = os.getenv("POLYGON_WALLET_PRIVATE_KEY", "").strip().replace('"', '').replace("'", "")
+        pk = _clean_env("POLYGON_WALLET_PRIVATE_KEY")
         # Ensure '0x' prefix is present (standardizes Hex format)
         if pk and not pk.startswith("0x"):
             pk = "0x" + pk
@@ -104,19 +223,26 @@ class Polymarket:
             'user': [],
             'market': []
         }
-        self.ws_thread = None
+        self.ws_thread = None  # runs self._ws_loop; every socket is a task on it
+        self._ws_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ws_primary: Optional["_WsSocket"] = None
+        self._ws_shards: List["_WsSocket"] = []  # market assets past the per-socket cap
+        self._ws_stop = threading.Event()
+        # Subscription sets are mutated by callers and read by the loop on reconnect
+        self._ws_lock = threading.Lock()
+        # (channel_type, raw frame). Book/price_change frames go to the bounded queue,
+        # which drops its oldest frame when full; everything else (user order/trade
+        # events in particular) to the unbounded one, which never drops.
+        self._ws_queue: "queue.Queue" = queue.Queue(maxsize=1024)
+        self._ws_reliable_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._ws_ready = threading.Event()  # set after every put, cleared by the dispatcher
+        self._ws_worker = None
+        self._clob_warm_thread = None
 
     def _init_api_keys(self) -> None:
         # SANITIZE ALL ENV VARS: Strip whitespace and quotes
-        def clean_env(var): 
-            val = os.getenv(var, '').strip().replace('"', '').replace("'", "")
-            # Fix base64 padding for CLOB_SECRET (must be multiple of 4)
-            if var == "CLOB_SECRET" and val and len(val) % 4 != 0:
-                val = val + '=' * (4 - len(val) % 4)
-            return val
-
-        self.private_key = clean_env("POLYGON_WALLET_PRIVATE_KEY")
-        self.funder_address = clean_env("POLYMARKET_PROXY_ADDRESS") or clean_env("POLYMARKET_FUNDER")
+        self.private_key = _clean_env("POLYGON_WALLET_PRIVATE_KEY")
+        self.funder_address = _clean_env("POLYMARKET_PROXY_ADDRESS") or _clean_env("POLYMARKET_FUNDER")
 
         # CRITICAL: Checksum the funder address to prevent base64 encoding errors
         if self.funder_address:
@@ -130,24 +256,26 @@ class Polymarket:
         )
 
         # Sanitize L2 Credentials
-        user_api_key = clean_env("CLOB_API_KEY")
-        user_secret = clean_env("CLOB_SECRET")
-        user_passphrase = clean_env("CLOB_PASS_PHRASE")
+        user_api_key = _clean_env("CLOB_API_KEY")
+        user_secret = _clean_env("CLOB_SECRET")
+        user_passphrase = _clean_env("CLOB_PASS_PHRASE")
 
         if user_api_key and len(user_secret) > 30 and user_passphrase:  # Valid secrets are ~44 chars
             print(f"   🔑 Loading sanitized L2 credentials...")
-            from py_clob_client.clob_types import ApiCreds
             self.credentials = ApiCreds(api_key=user_api_key, api_secret=user_secret, api_passphrase=user_passphrase)
             print("   ✅ User credentials loaded and set successfully")
         else:
-            print(f"   🔐 Corrupt or missing L2 keys. Re-deriving from wallet...")
-            self.credentials = self.client.create_or_derive_api_creds()
-            # Log these so you can save them properly
-            print(f"   ✅ NEW API KEY: {self.credentials.api_key}")
-            print(f"   ✅ NEW SECRET: {self.credentials.api_secret[:20]}...")
-            print(f"   ✅ NEW PASSPHRASE: {self.credentials.api_passphrase}")
-            print("   🔐 No User credentials found, deriving from private key...")
-            self.credentials = self.client.create_or_derive_api_creds()
+            creds_key = (self.private_key, signature_type, self.funder_address)
+            cached = _DERIVED_CREDS.get(creds_key)
+            if cached is not None:
+                self.credentials = cached
+            else:
+                print(f"   🔐 Corrupt or missing L2 keys. Re-deriving from wallet...")
+                self.credentials = _DERIVED_CREDS[creds_key] = self.client.create_or_derive_api_creds()
+                # Log these so you can save them properly
+                print(f"   ✅ NEW API KEY: {self.credentials.api_key}")
+                print(f"   ✅ NEW SECRET: {self.credentials.api_secret[:20]}...")
+                print(f"   ✅ NEW PASSPHRASE: {self.credentials.api_passphrase}")
 
 
         # Ensure funder_address is set even for derived credentials
@@ -333,7 +461,7 @@ class Polymarket:
         markets = []
         params = {"limit": limit}
         params.update(kwargs)
-        res = httpx.get(self.gamma_markets_endpoint, params=params)
+        res = self._session.get(self.gamma_markets_endpoint, params=params, timeout=10)
         if res.status_code == 200:
             for market in res.json():
                 try:
@@ -353,12 +481,32 @@ class Polymarket:
 
     def get_market(self, token_id: str) -> SimpleMarket:
         params = {"clob_token_ids": token_id}
-        res = httpx.get(self.gamma_markets_endpoint, params=params)
+        res = self._session.get(self.gamma_markets_endpoint, params=params, timeout=10)
         if res.status_code == 200:
             data = res.json()
             market = data[0]
             return self.map_api_to_market(market, token_id)
 
+    def get_markets_by_token_ids(self, token_ids: List[str]) -> Dict[str, SimpleMarket]:
+        """One Gamma request for many tokens; returns token_id -> market."""
+        if not token_ids:
+            return {}
+        wanted = list(set(token_ids))
+        markets = {}
+        # Token ids are ~77 chars; chunk to keep the query string a sane length
+        for i in range(0, len(wanted), 50):
+            chunk = wanted[i:i + 50]
+            params = [("clob_token_ids", t) for t in chunk]
+            res = self._session.get(self.gamma_markets_endpoint, params=params, timeout=10)
+            if res.status_code != 200:
+                continue
+            for market in res.json():
+                ids = market.get("clobTokenIds") or "[]"
+                ids = json.loads(ids) if isinstance(ids, str) else ids
+                for t in set(chunk).intersection(ids):
+                    markets[t] = self.map_api_to_market(market, t)
+        return markets
+
     def map_api_to_market(self, market, token_id: str = "") -> SimpleMarket:
         market_data = {
             "id": int(market["id"]),
@@ -387,7 +535,7 @@ class Polymarket:
 
     def get_all_events(self) -> "list[SimpleEvent]":
         events = []
-        res = httpx.get(self.gamma_events_endpoint)
+        res = self._session.get(self.gamma_events_endpoint, timeout=10)
         if res.status_code == 200:
             print(len(res.json()))
             for event in res.json():
@@ -451,9 +599,19 @@ class Polymarket:
     def get_orderbook_price(self, token_id: str) -> float:
         return float(self.client.get_price(token_id))
 
+    def get_midpoints(self, token_ids: List[str]) -> Dict[str, float]:
+        """Midpoint prices for many tokens in a single CLOB request."""
+        if not token_ids:
+            return {}
+        res = self.client.get_midpoints([BookParams(token_id=t) for t in set(token_ids)])
+        return {t: float(p) for t, p in (res or {}).items() if p is not None}
+
     def get_address_for_private_key(self):
-        account = self.w3.eth.account.from_key(str(self.private_key))
-        return account.address
+        key = str(self.private_key)
+        address = _KEY_ADDRESSES.get(key)
+        if address is None:
+            address = _KEY_ADDRESSES[key] = self.w3.eth.account.from_key(key).address
+        return address
 
     def build_order(
         self,
@@ -548,6 +706,27 @@ class Polymarket:
         print("Done!")
         return resp
 
+    def keep_clob_warm(self, interval: float = 4.0) -> None:
+        """Ping the CLOB in the background so order posts reuse a live connection.
+
+        py_clob_client's shared httpx client drops connections idle for 5s, so
+        without this the first order after a quiet spell pays a fresh TCP+TLS
+        handshake.
+        """
+        if self._clob_warm_thread and self._clob_warm_thread.is_alive():
+            return
+
+        def ping():
+            while True:
+                try:
+                    self.client.get_ok()
+                except Exception:
+                    pass
+                time.sleep(interval)
+
+        self._clob_warm_thread = threading.Thread(target=ping, daemon=True)
+        self._clob_warm_thread.start()
+
     def get_usdc_balance(self) -> float:
         # Use POLYMARKET_FUNDER or POLYMARKET_PROXY_ADDRESS (Proxy wallet) if set
         funder_address = os.getenv("POLYMARKET_FUNDER") or os.getenv("POLYMARKET_PROXY_ADDRESS")
@@ -566,7 +745,7 @@ class Polymarket:
             address = self.funder_address or self.get_address_for_private_key()
             url = f"https://data-api.polymarket.com/positions?user={address}"
             
-            resp = requests.get(url, timeout=10)
+            resp = self._session.get(url, timeout=10)
             if resp.status_code == 200:
                 raw = resp.json()
                 return raw
@@ -590,6 +769,10 @@ class Polymarket:
         """
         Connect to Polymarket websocket for real-time updates.
         Fixed to avoid conflicts with trade execution.
+        Each socket is an asyncio task on one background event loop and
+        reconnects with jittered exponential backoff until close_websocket()
+        is called. Market assets beyond
+        MAX_ASSETS_PER_WEBSOCKET are spread over extra sockets.
 
         Args:
             channel_type: "user" or "market"
@@ -597,90 +780,226 @@ class Polymarket:
             assets: List of asset IDs (token IDs) for market channel
         """
         try:
-            # Check if already connected to this channel
-            if self.ws_connection and self.ws_channel_type == channel_type:
+            # Check if already connected (or reconnecting) to this channel
+            if self._ws_primary and not self._ws_primary.future.done() and self._ws_primary.channel_type == channel_type:
                 print(f"WS already connected to {channel_type} channel")
                 return True
 
             auth_token = self._get_ws_auth_token()
+            with self._ws_lock:
+                if markets:
+                    self.subscribed_markets.update(markets)
+                if assets:
+                    self.subscribed_assets.update(assets)
+
+                overflow = []
+                if channel_type == "user":
+                    ids = self.subscribed_markets
+                else:
+                    chunks = self._chunk_assets(list(self.subscribed_assets))
+                    ids = set(chunks[0]) if chunks else set()
+                    overflow = chunks[1:]
+
+                self._ws_stop.clear()
+                self._ensure_ws_loop()
+                # ws_connection is only set once the socket is open (see _run_websocket)
+                self._ws_primary = self._spawn_ws(channel_type, auth_token, ids, primary=True)
+                for chunk in overflow:
+                    self._ws_shards.append(self._spawn_ws(channel_type, auth_token, set(chunk)))
+            if not (self._ws_worker and self._ws_worker.is_alive()):
+                self._ws_worker = threading.Thread(target=self._dispatch_ws_messages, daemon=True)
+                self._ws_worker.start()
 
-            def on_message(ws, message):
-                try:
-                    data = json.loads(message)
-                    # Call registered callbacks
-                    for callback in self.ws_callbacks.get(channel_type, []):
-                        callback(data)
-                except Exception as e:
-                    print(f"WS message parse error: {e}")
+            # Store channel type
+            self.ws_channel_type = channel_type
 
-            def on_error(ws, error):
-                print(f"WS error: {error}")
+            return True
+        except Exception as e:
+            print(f"WS connection failed: {e}")
+            return False
 
-            def on_close(ws, close_status_code, close_msg):
-                print(f"WS closed: {close_status_code} - {close_msg}")
-                # Reset connection state
-                self.ws_connection = None
-                self.ws_channel_type = None
+    @staticmethod
+    def _chunk_assets(assets: List[str]) -> List[List[str]]:
+        return [assets[i:i + MAX_ASSETS_PER_WEBSOCKET] for i in range(0, len(assets), MAX_ASSETS_PER_WEBSOCKET)]
 
-            def on_open(ws):
-                try:
-                    # Send subscription message
+    def _ensure_ws_loop(self) -> None:
+        """Start the one background event loop that all websocket tasks share."""
+        if self._ws_loop and self.ws_thread and self.ws_thread.is_alive():
+            return
+        self._ws_loop = asyncio.new_event_loop()
+        self.ws_thread = threading.Thread(target=self._ws_loop.run_forever, daemon=True)
+        self.ws_thread.start()
+
+    def _spawn_ws(self, channel_type: str, auth_token: Any, ids: set, primary: bool = False) -> "_WsSocket":
+        sock = _WsSocket(self._ws_loop, channel_type, ids)
+        sock.future = asyncio.run_coroutine_threadsafe(
+            self._run_websocket(sock, auth_token, primary), self._ws_loop
+        )
+        return sock
+
+    async def _run_websocket(self, sock: "_WsSocket", auth_token: Any, primary: bool) -> None:
+        """Connect, subscribe to sock.ids and feed frames to the dispatcher; reconnect with jittered backoff."""
+        channel_type = sock.channel_type
+        backoff = 1
+        while not self._ws_stop.is_set():
+            try:
+                # Built-in pings replace a separate keep-alive thread
+                async with websockets.connect(
+                    f"{self.ws_url}/ws/{channel_type}", ping_interval=20, ping_timeout=10
+                ) as ws:
+                    # Auth and the initial (or restored, after a reconnect) subscriptions in one frame
                     subscription_msg = {
                         "auth": auth_token,
                         "type": channel_type.upper(),
                         "custom_feature_enabled": False
                     }
-                    ws.send(json.dumps(subscription_msg))
-                    print(f"WS connected and subscribed to {channel_type} channel")
-                    self.ws_channel_type = channel_type
-                except Exception as e:
-                    print(f"WS subscription error: {e}")
-
-            # Use correct channel URL
-            channel_url = f"{self.ws_url}/ws/{channel_type}"
-
-            self.ws_connection = websocket.WebSocketApp(
-                channel_url,
-                on_message=on_message,
-                on_error=on_error,
-                on_close=on_close,
-                on_open=on_open
-            )
+                    with self._ws_lock:
+                        ids = list(sock.ids)
+                    if ids:
+                        subscription_msg["assets_ids"] = ids
+                        if channel_type == "user":
+                            subscription_msg["markets"] = ids
+                    await ws.send(_ws_dumps(subscription_msg))
+                    print(f"WS connected and subscribed to {channel_type} channel ({len(ids)} ids)")
+                    sock.ws = ws
+                    if primary:
+                        self.ws_connection = sock
+                        self.ws_channel_type = channel_type
+                    backoff = 1
+
+                    async for message in ws:
+                        # Hand off to the dispatch worker so the reader goes straight back to recv
+                        self._enqueue_ws_frame(channel_type, message)
+                print(f"WS closed: {ws.close_code} - {ws.close_reason}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"WS error: {e}")
+            finally:
+                # Reset connection state; the loop reconnects unless stopped
+                sock.ws = None
+                if primary:
+                    self.ws_connection = None
+                    self.ws_channel_type = None
+            if self._ws_stop.is_set():
+                break
+            delay = random.uniform(0, backoff)
+            print(f"WS reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            backoff = min(60, backoff * 2)
+
+    def _enqueue_ws_frame(self, channel_type: str, message) -> None:
+        """Queue a raw frame for the dispatcher without ever blocking the reader."""
+        item = (channel_type, message)
+        if not _ws_droppable(channel_type, message):
+            self._ws_reliable_queue.put(item)
+        else:
+            try:
+                self._ws_queue.put_nowait(item)
+            except queue.Full:
+                # Drop the oldest book frame rather than block the reader
+                try:
+                    self._ws_queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._ws_queue.put_nowait(item)
+        self._ws_ready.set()
 
-            # Start websocket in background thread - NON-BLOCKING
-            self.ws_thread = threading.Thread(target=self.ws_connection.run_forever, daemon=True)
-            self.ws_thread.start()
+    def _dispatch_ws_messages(self) -> None:
+        """Parse queued frames and run the registered callbacks, off the reader thread.
 
-            # Store channel type
-            self.ws_channel_type = channel_type
+        Each wakeup drains whatever is already queued (undroppable frames
+        first), so a burst of book snapshots for one asset reaches the
+        callbacks only once (the newest).
+        """
+        while not self._ws_stop.is_set():
+            if not self._ws_ready.wait(timeout=1):
+                continue
+            self._ws_ready.clear()  # before draining, so a put racing the drain re-arms it
+            batch = []
+            for q in (self._ws_reliable_queue, self._ws_queue):
+                while True:
+                    try:
+                        batch.append(q.get_nowait())
+                    except queue.Empty:
+                        break
+            if not batch:
+                continue
+
+            events = []
+            for channel_type, message in batch:
+                try:
+                    events.append((channel_type, _ws_loads(message)))
+                except Exception as e:
+                    print(f"WS message parse error: {e}")
 
-            return True
-        except Exception as e:
-            print(f"WS connection failed: {e}")
-            return False
+            for channel_type, data in self._coalesce_books(events):
+                try:
+                    # Call registered callbacks
+                    for callback in self.ws_callbacks.get(channel_type, []):
+                        callback(data)
+                except Exception as e:
+                    print(f"WS callback error: {e}")
+
+    @staticmethod
+    def _coalesce_books(events: List[tuple]) -> List[tuple]:
+        """Drop "book" snapshots superseded by a later one for the same asset; order is kept."""
+        newest = {}
+        for i, (channel_type, data) in enumerate(events):
+            if isinstance(data, dict) and data.get("event_type") == "book":
+                newest[(channel_type, data.get("asset_id"))] = i
+        return [
+            event for i, event in enumerate(events)
+            if not (isinstance(event[1], dict) and event[1].get("event_type") == "book")
+            or newest[(event[0], event[1].get("asset_id"))] == i
+        ]
 
     def subscribe_to_assets(self, assets: List[str], channel_type: str = "market"):
         """Subscribe to additional assets after connection."""
-        if not self.ws_connection:
+        # Market ids are tracked per socket and sent on open, so a socket that
+        # is still connecting can take them; the user channel needs it open.
+        if not (self.ws_connection if channel_type == "user" else self._ws_primary):
             print("WS not connected")
             return False
 
         try:
-            msg = {
-                "assets_ids": assets,
-                "operation": "subscribe",
-                "custom_feature_enabled": False
-            }
             if channel_type == "user":
-                msg["markets"] = assets
-
-            self.ws_connection.send(json.dumps(msg))
+                msg = {
+                    "assets_ids": assets,
+                    "markets": assets,
+                    "operation": "subscribe",
+                    "custom_feature_enabled": False
+                }
+                self.ws_connection.send(_ws_dumps(msg))
+                with self._ws_lock:
+                    self.subscribed_markets.update(assets)
+                return True
 
-            if channel_type == "user":
-                self.subscribed_markets.update(assets)
-            else:
+            # Fill sockets up to the cap, then open new ones for the rest. Ids are
+            # assigned under the lock; frames go out after it is released.
+            sends = []
+            with self._ws_lock:
+                new = [a for a in dict.fromkeys(assets) if a not in self.subscribed_assets]
+                for sock in [self._ws_primary] + self._ws_shards:
+                    room = MAX_ASSETS_PER_WEBSOCKET - len(sock.ids)
+                    if not new or room <= 0:
+                        continue
+                    take, new = new[:room], new[room:]
+                    sock.ids.update(take)
+                    sends.append((sock, take))
+                if new:
+                    auth_token = self._get_ws_auth_token()
+                    for chunk in self._chunk_assets(new):
+                        self._ws_shards.append(self._spawn_ws(channel_type, auth_token, set(chunk)))
                 self.subscribed_assets.update(assets)
 
+            for sock, take in sends:
+                try:
+                    sock.send(_ws_dumps({"assets_ids": take, "operation": "subscribe", "custom_feature_enabled": False}))
+                except Exception:
+                    if sock is self._ws_primary:
+                        raise
+                    # Shard still connecting: it subscribes sock.ids once open
             return True
         except Exception as e:
             print(f"WS subscribe failed: {e}")
@@ -688,46 +1007,63 @@ class Polymarket:
 
     def unsubscribe_from_assets(self, assets: List[str], channel_type: str = "market"):
         """Unsubscribe from assets."""
-        if not self.ws_connection:
+        if not (self.ws_connection if channel_type == "user" else self._ws_primary):
             return False
 
         try:
-            msg = {
-                "assets_ids": assets,
-                "operation": "unsubscribe",
-                "custom_feature_enabled": False
-            }
             if channel_type == "user":
-                msg["markets"] = assets
-
-            self.ws_connection.send(json.dumps(msg))
+                msg = {
+                    "assets_ids": assets,
+                    "markets": assets,
+                    "operation": "unsubscribe",
+                    "custom_feature_enabled": False
+                }
+                self.ws_connection.send(_ws_dumps(msg))
+                with self._ws_lock:
+                    self.subscribed_markets.difference_update(assets)
+                return True
 
-            if channel_type == "user":
-                self.subscribed_markets.difference_update(assets)
-            else:
+            with self._ws_lock:
+                drops = [(sock, sock.ids.intersection(assets)) for sock in [self._ws_primary] + self._ws_shards]
+                for sock, drop in drops:
+                    sock.ids.difference_update(drop)
                 self.subscribed_assets.difference_update(assets)
 
+            for sock, drop in drops:
+                if drop:
+                    sock.send(_ws_dumps({"assets_ids": list(drop), "operation": "unsubscribe", "custom_feature_enabled": False}))
             return True
         except Exception as e:
             print(f"WS unsubscribe failed: {e}")
             return False
 
-    def add_ws_callback(self, channel_type: str, callback: Callable):
-        """Add callback function for websocket messages."""
+    def add_ws_callback(self, channel_type: str, callback: Callable,
+                        min_mid_change: Optional[float] = 0.0005):
+        """Add callback function for websocket messages.
+
+        Market-channel callbacks are wrapped in skip_unchanged_mid, so "book"
+        events whose mid moved less than `min_mid_change` are not delivered.
+        Pass min_mid_change=None to receive every book.
+        """
+        if channel_type == "market" and min_mid_change is not None:
+            callback = skip_unchanged_mid(callback, min_mid_change)
         if channel_type not in self.ws_callbacks:
             self.ws_callbacks[channel_type] = []
         self.ws_callbacks[channel_type].append(callback)
 
     def close_websocket(self):
         """Close websocket connection."""
-        if self.ws_connection:
-            self.ws_connection.close()
+        self._ws_stop.set()
+        with self._ws_lock:
+            socks = ([self._ws_primary] if self._ws_primary else []) + self._ws_shards
+            self._ws_primary = None
+            self._ws_shards = []
             self.ws_connection = None
             self.ws_channel_type = None
             self.subscribed_markets.clear()
             self.subscribed_assets.clear()
-        if self.ws_thread and self.ws_thread.is_alive():
-            self.ws_thread.join(timeout=1)
+        for sock in socks:
+            sock.close()
 
     def execute_market_sell(self, token_id: str, size: float) -> str:
         """
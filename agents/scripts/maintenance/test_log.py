@@ -4,23 +4,29 @@ sys.path.append(os.getcwd())
 from agents.utils.supabase_client import get_supabase_state
 from agents.utils.context import LLMActivity
 import uuid
+import time
 import datetime
 
+BULK_ROWS = 50
+
 print("Testing Supabase Connectivity...")
 try:
     supa = get_supabase_state()
-    # Attempt to log
-    success = supa.log_llm_activity(
-        agent="TEST_BOT",
-        action_type="CONNECTIVITY_CHECK",
-        market_question="Can we write to DB?",
-        prompt_summary="Testing write permissions",
-        reasoning="Diagnostics",
-        conclusion="TEST",
-        confidence=1.0,
-        duration_ms=100
-    )
-    print(f"Write Result: {success}")
+    # Attempt to log (one bulk insert, timed)
+    rows = [{
+        "agent": "TEST_BOT",
+        "action_type": "CONNECTIVITY_CHECK",
+        "market_question": "Can we write to DB?",
+        "prompt_summary": f"Testing write permissions ({i + 1}/{BULK_ROWS})",
+        "reasoning": "Diagnostics",
+        "conclusion": "TEST",
+        "confidence": 1.0,
+        "duration_ms": 100
+    } for i in range(BULK_ROWS)]
+    start = time.perf_counter()
+    success = supa.bulk_log_llm_activity(rows)
+    elapsed = time.perf_counter() - start
+    print(f"Write Result: {success} ({BULK_ROWS} rows in {elapsed * 1000:.0f}ms)")
     
     # Attempt to read
     print("Testing Read...")
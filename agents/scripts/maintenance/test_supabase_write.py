@@ -2,11 +2,14 @@
 """Test Supabase write and read operations."""
 import sys
 import os
+import time
 sys.path.append(os.getcwd())
 
 from agents.utils.supabase_client import get_supabase_state
 import logging
 
+BULK_ROWS = 50
+
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
 print('Testing Supabase connection...')
@@ -16,17 +19,20 @@ print(f'Key present: {bool(supa.key)}')
 print(f'Use local fallback: {supa.use_local_fallback}')
 print(f'Client initialized: {bool(supa.client)}')
 
-print('\nTesting write...')
-result = supa.log_llm_activity(
-    agent='test',
-    action_type='test',
-    market_question='Test connection',
-    prompt_summary='Testing Supabase write',
-    reasoning='Verifying connection works',
-    conclusion='TEST',
-    confidence=1.0
-)
-print(f'Write result: {result}')
+print(f'\nTesting bulk write ({BULK_ROWS} rows)...')
+rows = [{
+    'agent': 'test',
+    'action_type': 'test',
+    'market_question': 'Test connection',
+    'prompt_summary': f'Testing Supabase write ({i + 1}/{BULK_ROWS})',
+    'reasoning': 'Verifying connection works',
+    'conclusion': 'TEST',
+    'confidence': 1.0
+} for i in range(BULK_ROWS)]
+start = time.perf_counter()
+result = supa.bulk_log_llm_activity(rows)
+elapsed = time.perf_counter() - start
+print(f'Write result: {result} ({elapsed * 1000:.0f}ms, {elapsed * 1000 / BULK_ROWS:.1f}ms/row)')
 
 print('\nTesting read...')
 activities = supa.get_llm_activity(limit=5, agent='test')
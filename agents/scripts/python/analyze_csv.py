@@ -1,62 +1,46 @@
-import csv
 import datetime
 import os
 
+import pandas as pd
+from dateutil.tz import tzlocal
+
+COLUMNS = ["timestamp", "action", "marketName", "usdcAmount", "tokenName", "hash"]
+
 def analyze_csv():
     csv_path = "/Users/farzad/Downloads/Polymarket-Transaction-History-Sun Jan 18 2026 10_31_46 GMT+0100 (Central European Standard Time).csv"
     report_path = "/Users/farzad/polyagent/agents/trade_report_2026_01_17_csv.md"
     
     target_date = datetime.date(2026, 1, 17)
     
-    trades = []
-    redeems = []
-    
     print(f"Reading CSV: {csv_path}")
     
     try:
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:  # Use utf-8-sig to handle BOM
-            reader = csv.DictReader(f)
-            # Normalize headers just in case
-            reader.fieldnames = [name.strip().strip('"') for name in reader.fieldnames] if reader.fieldnames else []
-            
-            for row in reader:
-                try:
-                    # Clean up row keys if needed
-                    row = {k.strip().strip('"'): v for k, v in row.items()}
-                    
-                    ts = int(row['timestamp'])
-                    dt = datetime.datetime.fromtimestamp(ts)
-                    
-                    if dt.date() == target_date:
-                        action = row['action']
-                        market = row['marketName']
-                        amount = float(row['usdcAmount'])
-                        token_outcome = row['tokenName']
-                        
-                        item = {
-                            "time": dt.strftime("%H:%M:%S"),
-                            "market": market,
-                            "action": action,
-                            "outcome": token_outcome,
-                            "amount": amount,
-                            "hash": row['hash']
-                        }
-                        
-                        if action == "Buy":
-                            trades.append(item)
-                        elif action == "Redeem":
-                            redeems.append(item)
-                            
-                except ValueError:
-                    continue
-                    
+        # Parse only the columns we report on; headers may carry stray quotes/spaces
+        df = pd.read_csv(
+            csv_path,
+            encoding='utf-8-sig',  # Use utf-8-sig to handle BOM
+            usecols=lambda c: c.strip().strip('"') in COLUMNS,
+            dtype=str,
+        )
     except FileNotFoundError:
         print("CSV file not found!")
         return
 
+    df.columns = [c.strip().strip('"') for c in df.columns]
+    df["timestamp"] = pd.to_numeric(df["timestamp"], errors="coerce")
+    df["amount"] = pd.to_numeric(df["usdcAmount"], errors="coerce")
+    df = df.dropna(subset=["timestamp", "amount"])  # malformed rows were skipped before too
+
+    # Local wall-clock time, as datetime.fromtimestamp gave (tzlocal applies each
+    # timestamp's own DST offset, not today's)
+    dt = pd.to_datetime(df["timestamp"].astype("int64"), unit="s", utc=True).dt.tz_convert(tzlocal())
+    day = df[dt.dt.date == target_date].assign(time=dt.dt.strftime("%H:%M:%S"))
+    day = day.rename(columns={"marketName": "market", "tokenName": "outcome"})
+
     # Sort by time
-    trades.sort(key=lambda x: x['time'], reverse=True)
-    redeems.sort(key=lambda x: x['time'], reverse=True)
+    day = day.sort_values("time", ascending=False, kind="stable")
+    trades = day[day["action"] == "Buy"].to_dict("records")
+    redeems = day[day["action"] == "Redeem"].to_dict("records")
     
     total_spend = sum(t['amount'] for t in trades)
     total_redeemed = sum(r['amount'] for r in redeems)
@@ -1,68 +1,90 @@
+import os
+import pickle
 import re
 from datetime import datetime
 
-def parse_ledger_value(val_str):
-    if not val_str or val_str == "-": return 0.0
-    return float(val_str.replace('$', '').replace(',', ''))
+import pandas as pd
+
+# Esports market keywords, matched in one pass over the whole Market column
+_KW_RE = re.compile(r"LoL:|Dota 2:|CS2:|Counter-Strike:|Valorant:|\(BO[135]\)")
+
+# Ledger rows are "| Date | Type | Market | Side | Outcome | Size | Price | Value (USDC) | Hash |",
+# i.e. 11 pipe-separated fields counting the empty ones at each end
+LEDGER_FIELDS = 11
+COLUMNS = {1: "date", 2: "type", 3: "market", 4: "side", 5: "outcome", 8: "value"}
+
+_STRIP = str.maketrans('', '', '$,')  # "$1,234.56" -> "1234.56" in one pass
+
+def parse_ledger_values(values):
+    """'$1,234.56' / '-' strings -> float amounts (0.0 for '-' or blanks)."""
+    cleaned = values.str.translate(_STRIP).replace("-", "0")
+    return pd.to_numeric(cleaned, errors="coerce").fillna(0.0)
+
+def load_esports_rows(ledger_path):
+    """
+    2026 esports rows of the ledger (date, type, market, side, outcome, amount).
+    Cached in esports_cache.pkl keyed by the ledger's mtime and size, so re-runs
+    on an unchanged ledger skip parsing. Raises FileNotFoundError if it's missing.
+    """
+    st = os.stat(ledger_path)
+    sig = (st.st_mtime_ns, st.st_size)
+    cache_path = os.path.join(os.path.dirname(ledger_path), "esports_cache.pkl")
+    try:
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+        if cached.get("sig") == sig:
+            return cached["esports"]
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+        pass  # missing/stale/corrupt cache -> reparse
+
+    # Markdown table == pipe-delimited CSV; the C parser splits every line at once.
+    # Title/header lines just come back as rows that fail the date filter below.
+    df = pd.read_csv(
+        ledger_path,
+        sep="|",
+        engine="c",
+        header=None,
+        names=range(LEDGER_FIELDS),
+        dtype=str,
+        skip_blank_lines=True,
+        on_bad_lines="skip",
+        encoding="utf-8",
+    )
+    # Select after parsing: usecols rejects a ledger with no full-width rows
+    df = df[list(COLUMNS)].rename(columns=COLUMNS)
+    # Date and keyword decide which rows survive; strip the other columns after filtering.
+    # Most 2026 rows aren't esports, so the keyword match runs before any per-cell work.
+    df = df[df["date"].str.strip().str.startswith("2026", na=False)]
+    df = df[df["market"].str.contains(_KW_RE, regex=True, na=False)]
+    esports = df.apply(lambda col: col.str.strip())
+    esports["amount"] = parse_ledger_values(esports["value"])
+
+    try:
+        with open(cache_path, "wb") as f:
+            pickle.dump({"sig": sig, "esports": esports}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"Could not write {cache_path}: {e}")
+    return esports
 
 def analyze_esports():
     ledger_path = "/Users/farzad/polyagent/agents/full_ledger.md"
     
-    esports_trades = []
-    redemptions = []
-    
-    # Keywords for esports markets
-    keywords = ["LoL:", "Dota 2:", "CS2:", "Counter-Strike:", "Valorant:", "(BO1)", "(BO3)", "(BO5)"]
-    
     print(f"Analyzing {ledger_path} for Esports activity...")
     
     try:
-        with open(ledger_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-        for line in lines:
-            if not line.startswith("| 2026"): continue
-            
-            parts = [p.strip() for p in line.split('|')]
-            if len(parts) < 8: continue
-            
-            # Extract fields (indexes shifted by +1 because startswith |)
-            date_str = parts[1]
-            txn_type = parts[2]
-            market = parts[3]
-            side = parts[4]
-            outcome = parts[5]
-            value_str = parts[8] # Value (USDC) column
-            
-            # Filter for Esports
-            is_esports = any(k in market for k in keywords)
-            
-            if is_esports:
-                amount = parse_ledger_value(value_str)
-                
-                item = {
-                    "date": date_str,
-                    "market": market,
-                    "type": txn_type,
-                    "side": side,
-                    "outcome": outcome,
-                    "amount": amount
-                }
-                
-                if txn_type == "TRADE":
-                    esports_trades.append(item)
-                elif txn_type == "REDEEM":
-                    redemptions.append(item)
-                    
+        esports = load_esports_rows(ledger_path)
     except FileNotFoundError:
         print("Ledger file not found!")
         return
 
-    # Sort
-    esports_trades.sort(key=lambda x: x['date'], reverse=True)
-    
-    total_invested = sum(t['amount'] for t in esports_trades if t['side'] == "BUY") # Only buy side costs money
-    money_redeemed = sum(r['amount'] for r in redemptions)
+    trades = esports[esports["type"] == "TRADE"].sort_values("date", ascending=False, kind="stable")
+    redeems = esports[esports["type"] == "REDEEM"]
+
+    total_invested = float(trades.loc[trades["side"] == "BUY", "amount"].sum()) # Only buy side costs money
+    money_redeemed = float(redeems["amount"].sum())
+
+    esports_trades = trades.to_dict("records")
+    redemptions = redeems.to_dict("records")
     
     # Generate Report
     report_path = "/Users/farzad/polyagent/agents/esports_report.md"
@@ -86,8 +108,11 @@ def analyze_esports():
         if esports_trades:
             f.write("| Date | Market | Side | Outcome | Value |\n")
             f.write("| :--- | :--- | :--- | :--- | :--- |\n")
-            for t in esports_trades[:20]: # Show last 20
-                f.write(f"| {t['date']} | {t['market']} | {t['side']} | {t['outcome']} | ${t['amount']:.2f} |\n")
+            # One write per section: rows are joined first
+            f.write("".join(
+                f"| {t['date']} | {t['market']} | {t['side']} | {t['outcome']} | ${t['amount']:.2f} |\n"
+                for t in esports_trades[:20] # Show last 20
+            ))
         else:
             f.write("No esports trades found.\n")
             
@@ -95,8 +120,10 @@ def analyze_esports():
         if redemptions:
             f.write("| Date | Market | Value |\n")
             f.write("| :--- | :--- | :--- |\n")
-            for r in redemptions:
-                f.write(f"| {r['date']} | {r['market']} | ${r['amount']:.2f} |\n")
+            f.write("".join(
+                f"| {r['date']} | {r['market']} | ${r['amount']:.2f} |\n"
+                for r in redemptions
+            ))
         else:
             f.write("No redemptions found.\n")
 
@@ -1,9 +1,16 @@
 import os
 import sys
-import requests
-import time
+import asyncio
+import heapq
+import httpx
+from collections import defaultdict
 from dotenv import load_dotenv
 
+try:
+    from orjson import loads as json_loads  # faster decode of large API pages
+except ImportError:
+    from json import loads as json_loads
+
 # Setup path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, "../../.."))
@@ -19,6 +26,60 @@ except ImportError:
          print("Failed to import Polymarket")
          sys.exit(1)
 
+DATA_API = "https://data-api.polymarket.com"
+PAGE_LIMIT = 100
+MAX_IN_FLIGHT = 8     # concurrent activity pages, kept under the Data API burst limit
+PAGE_PAUSE = 0.05     # per-slot pause instead of a serial sleep between pages
+RATE_LIMIT_RETRIES = 3
+
+# market_stats value layout: [invested, proceeds, net]
+INVESTED, PROCEEDS, NET = 0, 1, 2
+
+async def fetch_page(client, sem, address, offset):
+    params = {"user": address, "limit": PAGE_LIMIT, "offset": offset}
+    async with sem:
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            resp = await client.get(f"{DATA_API}/activity", params=params)
+            if resp.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+                break
+            await asyncio.sleep(0.2 * 2 ** attempt)  # back off, holding the slot
+        await asyncio.sleep(PAGE_PAUSE)
+        return json_loads(resp.content)
+
+async def fetch_activity(client, address):
+    """All activity pages, MAX_IN_FLIGHT offsets at a time, until a short page comes back."""
+    sem = asyncio.Semaphore(MAX_IN_FLIGHT)
+    all_activities = []
+    offset = 0
+    while True:
+        offsets = [offset + i * PAGE_LIMIT for i in range(MAX_IN_FLIGHT)]
+        try:
+            pages = await asyncio.gather(*(fetch_page(client, sem, address, o) for o in offsets))
+        except Exception as e:
+            print(f"Error fetching activity: {e}")
+            break
+        for data in pages:  # gather keeps offset order
+            if not data:
+                return all_activities
+            all_activities.extend(data)
+            if len(data) < PAGE_LIMIT:
+                return all_activities
+        offset = offsets[-1] + PAGE_LIMIT
+    return all_activities
+
+async def fetch_positions(client, address):
+    try:
+        resp = await client.get(f"{DATA_API}/positions", params={"user": address})
+        return json_loads(resp.content)
+    except Exception as e:
+        print(f"Error fetching positions: {e}")
+        return []
+
+async def fetch_history(address):
+    """Activity history and open positions, fetched concurrently."""
+    async with httpx.AsyncClient(timeout=30) as client:
+        return await asyncio.gather(fetch_activity(client, address), fetch_positions(client, address))
+
 def main():
     load_dotenv()
     
@@ -33,37 +94,15 @@ def main():
     # ---------------------------------------------------------
     # 1. Fetch ALL Activity (Trades + Redemptions)
     # ---------------------------------------------------------
-    all_activities = []
-    limit = 100
-    offset = 0
-    
     print("Fetching full history from Data API...")
-    
-    while True:
-        url = f"https://data-api.polymarket.com/activity?user={address}&limit={limit}&offset={offset}"
-        try:
-            resp = requests.get(url)
-            data = resp.json()
-            if not data:
-                break
-            
-            all_activities.extend(data)
-            
-            if len(data) < limit:
-                break
-            
-            offset += limit
-            time.sleep(0.2) # Rate limit friendly
-        except Exception as e:
-            print(f"Error fetching activity: {e}")
-            break
+    all_activities, positions = asyncio.run(fetch_history(address))
             
     # ---------------------------------------------------------
     # 2. Calculate Realized PnL (from historical flows)
     # ---------------------------------------------------------
     
     # Group by Market Title for detailed stats
-    market_stats = {}
+    market_stats = defaultdict(lambda: [0.0, 0.0, 0.0])
     
     total_invested = 0.0
     total_proceeds = 0.0
@@ -72,38 +111,31 @@ def main():
         act_type = act.get('type')
         side = act.get('side')
         usdc_size = float(act.get('usdcSize', 0) or 0)
-        title = act.get('title', 'Unknown Market')
-        
-        if title not in market_stats:
-            market_stats[title] = {"invested": 0.0, "proceeds": 0.0, "net": 0.0}
+        stats = market_stats[act.get('title', 'Unknown Market')]
         
         if act_type == "TRADE":
             if side == "BUY":
                 total_invested += usdc_size
-                market_stats[title]["invested"] += usdc_size
-                market_stats[title]["net"] -= usdc_size
+                stats[INVESTED] += usdc_size
+                stats[NET] -= usdc_size
             elif side == "SELL":
                 total_proceeds += usdc_size
-                market_stats[title]["proceeds"] += usdc_size
-                market_stats[title]["net"] += usdc_size
+                stats[PROCEEDS] += usdc_size
+                stats[NET] += usdc_size
                 
         elif act_type == "REDEEM":
             # Redemptions are proceeds
             total_proceeds += usdc_size
-            market_stats[title]["proceeds"] += usdc_size
-            market_stats[title]["net"] += usdc_size
+            stats[PROCEEDS] += usdc_size
+            stats[NET] += usdc_size
 
     # ---------------------------------------------------------
-    # 3. Fetch Open Positions (Unrealized Value)
+    # 3. Open Positions (Unrealized Value)
     # ---------------------------------------------------------
-    positions_url = f"https://data-api.polymarket.com/positions?user={address}"
     current_portfolio_value = 0.0
     open_positions_count = 0
     
     try:
-        p_resp = requests.get(positions_url)
-        positions = p_resp.json()
-        
         for p in positions:
             val = float(p.get("currentValue", 0) or 0)
             current_portfolio_value += val
@@ -112,16 +144,12 @@ def main():
             # Adjust market net calculation:
             # Net PnL = (Proceeds + Redemption + CurrentValue) - Invested
             # So we add CurrentValue to the 'net' tracker for that market
+            # A market missing from activity (transferred in?) starts at invested 0
             title = p.get('title', p.get('question', 'Unknown Market'))
-            if title in market_stats:
-                market_stats[title]["net"] += val
-            else:
-                # Might be a market we bought but activity API missed? Or transferred in?
-                # Assume invested 0 if not found in activity (should not happen usually)
-                market_stats[title] = {"invested": 0.0, "proceeds": 0.0, "net": val}
+            market_stats[title][NET] += val
                 
     except Exception as e:
-        print(f"Error fetching positions: {e}")
+        print(f"Error processing positions: {e}")
 
     # ---------------------------------------------------------
     # 4. Final Calculations
@@ -161,12 +189,12 @@ def main():
     print("         🏆 Top Performers (By Net PnL)            ")
     print("---------------------------------------------------")
     
-    # Sort by Net PnL
-    sorted_markets = sorted(market_stats.items(), key=lambda x: x[1]['net'], reverse=True)
+    # Only the extremes are shown, so select them instead of sorting every market
+    by_net = lambda kv: kv[1][NET]
     
     # Show Top 5
-    for m_title, stats in sorted_markets[:5]:
-        net = stats['net']
+    for m_title, stats in heapq.nlargest(5, market_stats.items(), key=by_net):
+        net = stats[NET]
         if net > 0.01: # Filter tiny dust
             print(f"✅ +${net:,.2f} | {m_title[:60]}...")
             
@@ -174,9 +202,9 @@ def main():
     print("         💀 Worst Performers                       ")
     print("---------------------------------------------------")
     
-    # Show Bottom 5
-    for m_title, stats in sorted_markets[-5:]:
-        net = stats['net']
+    # Show Bottom 5 (same order as before: least bad first)
+    for m_title, stats in reversed(heapq.nsmallest(5, market_stats.items(), key=by_net)):
+        net = stats[NET]
         if net < -0.01: # Filter tiny dust
             print(f"🔻 -${abs(net):,.2f} | {m_title[:60]}...")
             
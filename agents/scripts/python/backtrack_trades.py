@@ -6,39 +6,93 @@ Usage:
     python agents/scripts/python/backtrack_trades.py
 """
 
+import io
+import sys
+import time
 import requests
-import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from orjson import loads as json_loads  # faster decode of large API pages
+except ImportError:
+    from json import loads as json_loads
 
 # WALLET TO ANALYZE (Proxy)
 TARGET_WALLET = "0xdb1f88Ab5B531911326788C018D397d352B7265c"
 ADDITIONAL_WALLETS = ["0x3C5179f63E580c890950ac7dfCf96e750fB2D046"]
 
-def fetch_trades(wallet):
-    print(f"📡 Fetching fills for {wallet[:10]}...")
+# One pooled session per script: keep-alive across calls, backoff on 429/5xx
+session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504)),
+)
+session.mount("http://", _adapter)
+session.mount("https://", _adapter)
+
+ROW_FMT = "{date:<20} | {side:<5} | {asset}... | {size:<10.2f} | {price:<6.3f} | ${value:<10.2f}\n"
+
+def fetch_side(wallet, role):
+    """Every page of fills where `wallet` is the maker or the taker (role = "maker" / "taker")."""
+    field = f"{role}_address"
+    wallet_lc = wallet.lower()
     trades = []
     cursor = ""
     
     while True:
-        url = f"https://data-api.polymarket.com/trades?maker_address={wallet}&limit=100&after={cursor}"
+        url = f"https://data-api.polymarket.com/trades?{field}={wallet}&limit=100&after={cursor}"
         try:
-            resp = requests.get(url, timeout=10)
-            data = resp.json()
+            resp = session.get(url, timeout=10)
+            data = json_loads(resp.content)
             if not data: break
             
-            chunk = [t for t in data if t.get("maker_address", "").lower() == wallet.lower() or t.get("taker_address", "").lower() == wallet.lower()]
-            trades.extend(chunk)
+            # Server filters by {field}; this only guards against it being ignored
+            trades.extend(t for t in data if (t.get(field) or "").lower() == wallet_lc)
             
             if len(data) < 100: break
             cursor = data[-1].get("timestamp", "")
             if not cursor: break
         except Exception as e:
-            print(f"❌ Error: {e}")
+            print(f"❌ Error ({role}): {e}")
             break
+    return trades
+
+def trade_key(t):
+    return t.get("trade_id") or t.get("id") or (t.get("transactionHash"), t.get("asset"), t.get("side"), t.get("size"), t.get("price"))
+
+def fetch_trades(wallet):
+    print(f"📡 Fetching fills for {wallet[:10]}...")
+    
+    # Maker and taker fills are separate queries; paginate both at once
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        maker, taker = ex.map(lambda role: fetch_side(wallet, role), ("maker", "taker"))
+    
+    # Self-matched fills come back from both queries
+    seen = set()
+    trades = []
+    for t in maker + taker:
+        key = trade_key(t)
+        if key in seen: continue
+        seen.add(key)
+        trades.append(t)
             
     print(f"   Has {len(trades)} trades.")
     return trades
 
+def local_minutes(ts):
+    """Epoch seconds -> 'YYYY-MM-DD HH:MM' local-time strings, as fromtimestamp().strftime would give."""
+    # UTC offset looked up once per distinct hour (DST switches on the hour), not per trade
+    hours, inv = np.unique(ts // 3600, return_inverse=True)
+    offsets = np.array([time.localtime(int(h) * 3600).tm_gmtoff for h in hours], dtype=np.int64)
+    local = (ts + offsets[inv.reshape(-1)]).astype("datetime64[s]")
+    return np.char.replace(np.datetime_as_string(local, unit="m"), "T", " ")
+
 def analyze_timeline(trades):
     # Sort by time asc
     trades.sort(key=lambda x: x.get("timestamp", 0))
@@ -51,14 +105,21 @@ def analyze_timeline(trades):
     print(f"{'DATE':<20} | {'SIDE':<5} | {'MARKET':<40} | {'SIZE':<10} | {'PRICE':<6} | {'VALUE':<10}")
     print("-" * 110)
     
-    for t in trades:
-        ts = int(t.get("timestamp", 0))
-        date = datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M')
-        
+    # Numeric columns built once; the loop below only formats
+    n = len(trades)
+    ts = np.fromiter((int(t.get("timestamp", 0)) for t in trades), dtype=np.int64, count=n)
+    sizes = np.fromiter((float(t.get("size", 0)) for t in trades), dtype=np.float64, count=n)
+    prices = np.fromiter((float(t.get("price", 0)) for t in trades), dtype=np.float64, count=n)
+    values = sizes * prices
+    dates = local_minutes(ts) if n else []
+    
+    # Rows are formatted into one buffer and written once, not printed line by line
+    buf = io.StringIO()
+    buf_write = buf.write
+    row = ROW_FMT.format
+    
+    for t, date, size, price, value in zip(trades, dates, sizes.tolist(), prices.tolist(), values.tolist()):
         side = t.get("side", "UNK")
-        size = float(t.get("size", 0))
-        price = float(t.get("price", 0))
-        value = size * price
         
         # Determine if Buy or Sell based on maker/taker/side logic isn't perfect in API 
         # but broadly: 'BUY' side usually means spending USDC.
@@ -66,8 +127,11 @@ def analyze_timeline(trades):
         market_name = "Unknown Market" 
         # (We'd need to resolve asset_id to name, but for speed just showing basic data)
         
-        print(f"{date:<20} | {side:<5} | {t.get('asset', 'Unknown Asset')[:10]}... | {size:<10.2f} | {price:<6.3f} | ${value:<10.2f}")
+        asset = t.get('asset', 'Unknown Asset')[:10]
+        buf_write(row(date=date, side=side, asset=asset, size=size, price=price, value=value))
         
+    sys.stdout.write(buf.getvalue())
+    
     print(f"\n📊 SUMMARY for {TARGET_WALLET[:10]}...")
     print(f"   Total Trades: {len(trades)}")
     # Note: Accurate PnL requires complex asset resolution.
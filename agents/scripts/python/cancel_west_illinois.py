@@ -1,6 +1,7 @@
 import os
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 project_root = os.getcwd()
@@ -9,6 +10,23 @@ load_dotenv("agents/.env")
 
 from agents.polymarket.polymarket import Polymarket
 
+def question_text(m):
+    """Question + outcomes of a market, whether it came back as an object or a dict."""
+    q_text = ""
+    try:
+        # Try attribute access first
+        q_text = str(getattr(m, 'question', '')) + " " + str(getattr(m, 'outcomes', ''))
+    except:
+        pass
+    
+    if not q_text.strip():
+        # Try dict access
+        try:
+            q_text = str(m.get('question', '')) + " " + str(m.get('outcomes', ''))
+        except:
+            pass
+    return q_text
+
 def cancel_west_illinois():
     print("🗑️ CANCELLING WESTERN ILLINOIS ORDERS...")
     pm = Polymarket()
@@ -18,16 +36,15 @@ def cancel_west_illinois():
         orders = pm.get_open_orders()
         print(f"   📋 Found {len(orders)} open orders.")
         
-        cancelled = 0
+        # We need to identify if it's Western Illinois
+        # 'o' might be a dict or object
+        # If we can't see the market name easily, we might have to fetch it or guess
+        # But the user sent a screenshot showing "Buy Western Illinois Leathernecks"
+        
+        # Polymarket API orders usually have a 'market' or 'token_id' field.
+        # If we don't have the question string, we'll have to fetch market details for each order.
+        order_tokens = []
         for o in orders:
-            # We need to identify if it's Western Illinois
-            # 'o' might be a dict or object
-            # If we can't see the market name easily, we might have to fetch it or guess
-            # But the user sent a screenshot showing "Buy Western Illinois Leathernecks"
-            
-            # Polymarket API orders usually have a 'market' or 'token_id' field.
-            # If we don't have the question string, we'll have to fetch market details for each order.
-            
             token_id = ""
             order_id = ""
             
@@ -39,25 +56,31 @@ def cancel_west_illinois():
                 token_id = o.get('asset_id') or o.get('token_id')
                 
             if not token_id: continue
+            order_tokens.append((order_id, token_id))
 
-            # Fetch market
+        # Orders often share a market: fetch each distinct token once, 8 at a time
+        def fetch_market(token_id):
             try:
-                m = pm.get_market(token_id)
+                return pm.get_market(token_id)
+            except Exception as ex:
+                return ex
+        
+        unique_tokens = list(dict.fromkeys(t for _, t in order_tokens))
+        with ThreadPoolExecutor(max_workers=8) as ex:
+            markets = dict(zip(unique_tokens, ex.map(fetch_market, unique_tokens)))
+        questions = {}  # token_id -> question text
+
+        cancelled = 0
+        for order_id, token_id in order_tokens:
+            try:
+                m = markets[token_id]
+                if isinstance(m, Exception):
+                    raise m
                 # Check for "Western Illinois" in question or outcomes
                 # ROBUST ACCESS
-                q_text = ""
-                try:
-                    # Try attribute access first
-                    q_text = str(getattr(m, 'question', '')) + " " + str(getattr(m, 'outcomes', ''))
-                except:
-                    pass
-                
-                if not q_text.strip():
-                    # Try dict access
-                    try:
-                        q_text = str(m.get('question', '')) + " " + str(m.get('outcomes', ''))
-                    except:
-                        pass
+                if token_id not in questions:
+                    questions[token_id] = question_text(m)
+                q_text = questions[token_id]
                 
                 print(f"      Checked Type: {type(m)} -> Q: {q_text[:20]}...")
 
@@ -6,10 +6,27 @@ Check Polymarket account access and balance
 import sys
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from orjson import loads as json_loads  # faster decode of large API pages
+except ImportError:
+    from json import loads as json_loads
 
 # Setup paths
 sys.path.insert(0, '/Users/farzad/polyagent')
 
+# One pooled session per script: keep-alive across calls, backoff on 429/5xx
+session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504)),
+)
+session.mount("http://", _adapter)
+session.mount("https://", _adapter)
+
 from agents.agents.polymarket.polymarket import Polymarket
 
 def check_polymarket_account():
@@ -27,11 +44,11 @@ def check_polymarket_account():
         if pm.credentials and hasattr(pm.credentials, 'api_key'):
             headers['Authorization'] = f'Bearer {pm.credentials.api_key}'
 
-        response = requests.get(f'{gamma_url}/users/me', headers=headers, timeout=10)
+        response = session.get(f'{gamma_url}/users/me', headers=headers, timeout=10)
         print(f'Account API status: {response.status_code}')
 
         if response.status_code == 200:
-            account_data = response.json()
+            account_data = json_loads(response.content)
             print('✅ Account data retrieved:')
             for key, value in account_data.items():
                 if key in ['id', 'username', 'email', 'account']:
@@ -47,9 +64,9 @@ def check_polymarket_account():
 
     # Test market data access (this should work)
     try:
-        markets_response = requests.get(f'{gamma_url}/markets?closed=false&limit=5', timeout=10)
+        markets_response = session.get(f'{gamma_url}/markets?closed=false&limit=5', timeout=10)
         if markets_response.status_code == 200:
-            markets = markets_response.json()
+            markets = json_loads(markets_response.content)
             print(f'✅ Market data access works - found {len(markets)} markets')
 
             # Show one market
@@ -0,0 +1,73 @@
+"""
+Unit tests for the chat endpoints' per-session turn serialization.
+
+Run with: python -m pytest agents/tests/test_api_chat.py -v
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from unittest.mock import patch
+
+from agents import api
+
+
+class _SlowAgent:
+    """Stand-in FBPAgent that records whether two turns ever overlapped."""
+
+    def __init__(self, session_id=None):
+        self.history = []
+        self._active = 0
+        self._guard = threading.Lock()
+        self.overlapped = False
+
+    def process_message(self, text, on_token=None):
+        with self._guard:
+            self._active += 1
+            self.overlapped |= self._active > 1
+        time.sleep(0.05)
+        self.history.append(text)
+        with self._guard:
+            self._active -= 1
+        return {"response": f"ok {text}", "tool_calls": []}
+
+
+def _served_endpoint(path: str, method: str):
+    """The handler FastAPI dispatches to (the first route registered for path + method)."""
+    for route in api.app.routes:
+        if getattr(route, "path", None) == path and method in getattr(route, "methods", ()):
+            return route.endpoint
+    raise LookupError(path)
+
+
+class TestChatTurnLock(unittest.TestCase):
+    """Concurrent requests for one session run their turns one at a time"""
+
+    def test_same_session_turns_do_not_overlap(self):
+        chat = _served_endpoint("/api/chat/{session_id}", "POST")
+        chat_stream = _served_endpoint("/api/chat/{session_id}/stream", "POST")
+
+        async def scenario():
+            req = lambda text: api.ChatRequest(messages=[{"role": "user", "content": text}])
+            await chat("s1", req("a"))  # creates the session
+            stream = await chat_stream("s1", req("b"))
+            async def drain():
+                return [chunk async for chunk in stream.body_iterator]
+            await asyncio.gather(drain(), chat("s1", req("c")), chat("s1", req("d")))
+
+        with patch.object(api, "FBPAgent", _SlowAgent), patch.dict(api.CHAT_SESSIONS, clear=True):
+            asyncio.run(scenario())
+            agent = api.CHAT_SESSIONS["s1"]
+        self.assertFalse(agent.overlapped)
+        self.assertEqual(sorted(agent.history), ["a", "b", "c", "d"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Unit tests for CopyTrader order execution.
+
+Run with: python -m pytest agents/tests/test_copy_trader.py -v
+"""
+
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from unittest.mock import Mock, patch
+
+from agents.application import pyml_copy_trader
+from agents.application.pyml_copy_trader import CopyTrader, AGGRESSIVE_PRICE, MAX_COPY_BET_USD
+
+
+class TestExecuteTrade(unittest.TestCase):
+    """execute_trade against a mocked CLOB client"""
+
+    def setUp(self):
+        # Skip __init__: it builds live clients and reads balances
+        self.trader = CopyTrader.__new__(CopyTrader)
+        self.trader.pm = Mock()
+        self.trader.pm.get_usdc_balance.return_value = 50.0
+        self.trader.pm.client.post_order.return_value = {"success": True, "orderID": "abc"}
+        self.trader.context = Mock()
+        self.trader.LLMActivity = None
+        self.trader.save_state = Mock()
+
+    @patch.object(pyml_copy_trader, "update_agent_activity")
+    @patch.object(pyml_copy_trader, "record_trade")
+    def test_filled_order_is_recorded(self, record_trade, update_activity):
+        """A posted order returns the response and records the position at the order price"""
+        resp = self.trader.execute_trade("tok1", MAX_COPY_BET_USD, "Yes", market_id="m1", question="Q?")
+
+        self.assertEqual(resp, {"success": True, "orderID": "abc"})
+        self.trader.pm.client.post_order.assert_called_once()
+        position = self.trader.context.add_position.call_args[0][0]
+        self.assertEqual(position.entry_price, AGGRESSIVE_PRICE)
+        self.assertEqual(position.size_usd, MAX_COPY_BET_USD)
+        self.assertEqual(record_trade.call_args.kwargs["amount"], MAX_COPY_BET_USD)
+        update_activity.assert_called_once()
+        self.assertIn("last_trade", self.trader.save_state.call_args[0][0])
+
+    def test_low_balance_skips_order(self):
+        """Below the $3 floor no order is created"""
+        self.trader.pm.get_usdc_balance.return_value = 1.0
+        self.assertIsNone(self.trader.execute_trade("tok1", MAX_COPY_BET_USD, "Yes"))
+        self.trader.pm.client.create_order.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
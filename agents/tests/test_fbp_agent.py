@@ -0,0 +1,343 @@
+"""
+Unit tests for FBP Agent tool helpers.
+
+Run with: python -m pytest agents/tests/test_fbp_agent.py -v
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+import time
+import threading
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from unittest.mock import AsyncMock, Mock, patch
+
+from agents import fbp_agent
+
+
+class TestBotStateCache(unittest.TestCase):
+    """Tests for the mtime-gated bot_state.json cache"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "bot_state.json")
+        with open(self.path, "w") as f:
+            json.dump({"dry_run": True, "safe_running": False}, f)
+        self.patcher = patch.object(fbp_agent, "BOT_STATE_FILE", self.path)
+        self.patcher.start()
+        fbp_agent._STATE_CACHE.update({"mtime": 0, "data": None})
+
+    def tearDown(self):
+        self.patcher.stop()
+        fbp_agent._STATE_CACHE.update({"mtime": 0, "data": None})
+        self.tmpdir.cleanup()
+
+    def test_unchanged_file_is_not_reparsed(self):
+        """Second load should return the cached dict without re-opening the file"""
+        first = fbp_agent._load_state()
+        with patch("builtins.open", side_effect=AssertionError("re-read")):
+            second = fbp_agent._load_state()
+        self.assertIs(first, second)
+
+    def test_changed_file_is_reloaded(self):
+        """External writes should be picked up via the mtime check"""
+        fbp_agent._load_state()
+        with open(self.path, "w") as f:
+            json.dump({"dry_run": False, "safe_running": True, "extra": 1}, f)
+        self.assertEqual(fbp_agent._load_state()["extra"], 1)
+
+    def test_toggle_agent_updates_cache(self):
+        """tool_toggle_agent should write through and refresh the cache"""
+        result = json.loads(fbp_agent.tool_toggle_agent("safe", True))
+        self.assertEqual(result["status"], "success")
+        self.assertTrue(fbp_agent._load_state()["safe_running"])
+        fbp_agent._state_writer.flush()
+        with open(self.path) as f:
+            self.assertTrue(json.load(f)["safe_running"])
+
+    def test_toggle_burst_coalesces_writes(self):
+        """Toggles inside the debounce window should produce one disk write"""
+        with patch.object(fbp_agent, "_save_state", wraps=fbp_agent._save_state) as save:
+            fbp_agent.tool_toggle_agent("safe", True)
+            fbp_agent.tool_toggle_agent("scalper", True)
+            fbp_agent.tool_toggle_agent("safe", False)
+            fbp_agent._state_writer.flush()
+        self.assertEqual(save.call_count, 1)
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertFalse(saved["safe_running"])
+        self.assertTrue(saved["scalper_running"])
+
+    def test_dry_run_toggle_without_state_file(self):
+        """The live/dry-run switch must still reach Supabase when bot_state.json is missing"""
+        os.remove(self.path)
+        supa = Mock()
+        with patch.object(fbp_agent, "HAS_SUPABASE", True), \
+             patch.object(fbp_agent, "get_supabase_state", return_value=supa, create=True):
+            result = json.loads(fbp_agent.tool_toggle_agent("dry_run", False))
+            fbp_agent._state_writer.flush()
+        self.assertEqual(result["status"], "success")
+        supa.set_global_dry_run.assert_called_once_with(False)
+        with open(self.path) as f:
+            self.assertFalse(json.load(f)["dry_run"])
+        self.assertEqual(fbp_agent._state_writer._pending, {})
+
+
+class TestPositionsCache(unittest.TestCase):
+    """Tests for the websocket-invalidated positions cache"""
+
+    def setUp(self):
+        fbp_agent._POSITIONS_CACHE.update(wallet=None, data=None, fetched_at=0.0, dirty=True)
+
+    def _fake_response(self, payload):
+        resp = Mock()
+        resp.json.return_value = payload
+        return resp
+
+    def test_cached_while_ws_live(self):
+        """Live websocket + no events should serve the cached payload"""
+        with patch.object(fbp_agent, "_ensure_positions_ws", return_value=True), \
+             patch.object(fbp_agent._SESSION, "get", return_value=self._fake_response([{"title": "A"}])) as get:
+            fbp_agent._fetch_positions("0xabc")
+            fbp_agent._fetch_positions("0xabc")
+        self.assertEqual(get.call_count, 1)
+
+    def test_user_event_invalidates(self):
+        """A user-channel event should force a REST refresh"""
+        with patch.object(fbp_agent, "_ensure_positions_ws", return_value=True), \
+             patch.object(fbp_agent._SESSION, "get", return_value=self._fake_response([])) as get:
+            fbp_agent._fetch_positions("0xabc")
+            fbp_agent._on_user_ws_event({"event_type": "trade"})
+            fbp_agent._fetch_positions("0xabc")
+        self.assertEqual(get.call_count, 2)
+
+    def test_event_during_fetch_keeps_dirty(self):
+        """An event that lands while REST is in flight must not be cleared by it"""
+        def racing_get(*args, **kwargs):
+            fbp_agent._on_user_ws_event({"event_type": "trade"})
+            return self._fake_response([])
+        with patch.object(fbp_agent, "_ensure_positions_ws", return_value=True), \
+             patch.object(fbp_agent._SESSION, "get", side_effect=racing_get) as get:
+            fbp_agent._fetch_positions("0xabc")
+            self.assertTrue(fbp_agent._POSITIONS_CACHE["dirty"])
+            fbp_agent._fetch_positions("0xabc")
+        self.assertEqual(get.call_count, 2)
+
+    def test_failure_serves_last_good(self):
+        """A failed refresh should return the previous result flagged stale"""
+        fbp_agent._LAST_GOOD_POSITIONS.update(data=None, at=0.0)
+        payload = [{"title": "A", "size": 1, "cost": 0.5, "currentValue": 0.7}]
+        with patch.object(fbp_agent, "_ensure_positions_ws", return_value=False), \
+             patch.object(fbp_agent._SESSION, "get", return_value=self._fake_response(payload)):
+            fresh = json.loads(fbp_agent.tool_get_positions())
+        with patch.object(fbp_agent, "_ensure_positions_ws", return_value=False), \
+             patch.object(fbp_agent._SESSION, "get", side_effect=ConnectionError("rpc down")):
+            stale = json.loads(fbp_agent.tool_get_positions())
+        self.assertTrue(stale["stale"])
+        self.assertEqual(stale["positions"], fresh["positions"])
+
+    def test_last_good_agents_is_a_copy(self):
+        """Later template mutations must not leak into the stored fallback"""
+        fbp_agent._LAST_GOOD_AGENTS.update(data=None, at=0.0)
+        with patch.object(fbp_agent, "HAS_SUPABASE", False), \
+             patch.object(fbp_agent, "_load_state", return_value={"safe_running": True, "dry_run": False}):
+            fresh = json.loads(fbp_agent.tool_get_agents())
+        with fbp_agent._AGENTS_TEMPLATE_LOCK:
+            fbp_agent._AGENTS_TEMPLATE["safe"]["running"] = not fresh["safe"]["running"]
+            fbp_agent._AGENTS_TEMPLATE["dry_run"] = True
+        stale = json.loads(fbp_agent._last_good_or_error(fbp_agent._LAST_GOOD_AGENTS, RuntimeError("down")))
+        self.assertTrue(stale["stale"])
+        self.assertEqual(stale["safe"], fresh["safe"])
+        self.assertFalse(stale["dry_run"])
+
+    def test_polls_when_ws_down(self):
+        """Without a websocket every call should hit REST"""
+        with patch.object(fbp_agent, "_ensure_positions_ws", return_value=False), \
+             patch.object(fbp_agent._SESSION, "get", return_value=self._fake_response([])) as get:
+            fbp_agent._fetch_positions("0xabc")
+            fbp_agent._fetch_positions("0xabc")
+        self.assertEqual(get.call_count, 2)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Tests for concurrent call de-duplication"""
+
+    def test_concurrent_callers_share_one_call(self):
+        """Callers arriving while a key is in flight should reuse its result"""
+        flight = fbp_agent._SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            started.set()
+            release.wait(2)
+            return 42
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("k", slow_fetch)))
+        leader.start()
+        started.wait(2)
+        followers = [threading.Thread(target=lambda: results.append(flight.do("k", slow_fetch))) for _ in range(3)]
+        for t in followers:
+            t.start()
+        time.sleep(0.2)  # let followers park on the in-flight Future
+        release.set()
+        for t in [leader] + followers:
+            t.join(2)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [42, 42, 42, 42])
+
+    def test_errors_propagate_and_clear(self):
+        """A failed call should raise for the caller and not poison the key"""
+        flight = fbp_agent._SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+        self.assertEqual(flight.do("k", lambda: "ok"), "ok")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Tests for the external-API circuit breaker"""
+
+    def _fail(self):
+        raise ConnectionError("down")
+
+    def test_opens_after_consecutive_failures(self):
+        """Once open, calls should fail fast without touching the dependency"""
+        breaker = fbp_agent._CircuitBreaker("test", max_failures=3, reset_after=30)
+        for _ in range(3):
+            with self.assertRaises(ConnectionError):
+                breaker.call(self._fail)
+        self.assertEqual(breaker.state, "open")
+        fn = Mock()
+        with self.assertRaises(fbp_agent.CircuitOpenError):
+            breaker.call(fn)
+        fn.assert_not_called()
+
+    def test_half_open_probe_closes_on_success(self):
+        """After the cooldown a successful probe should close the breaker"""
+        breaker = fbp_agent._CircuitBreaker("test", max_failures=1, reset_after=30)
+        with self.assertRaises(ConnectionError):
+            breaker.call(self._fail)
+        breaker.opened_at -= 31
+        self.assertEqual(breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+
+class TestHistoryCompaction(unittest.TestCase):
+    """Tests for FBPAgent's bounded chat history"""
+
+    def test_old_turns_fold_into_summary(self):
+        """Past the trigger, history should shrink to prompt + summary + recent window"""
+        with patch.object(fbp_agent, "HAS_OPENAI", False):
+            agent = fbp_agent.FBPAgent()
+        agent.client = Mock()
+        agent.client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content="earlier stuff"))]
+        )
+        system_prompt = agent.history[0]
+        for i in range(fbp_agent.SUMMARY_TRIGGER):
+            agent.history.append({"role": "user", "content": f"q{i}"})
+            agent.history.append({"role": "assistant", "content": None, "tool_calls": [{"id": str(i)}]})
+            agent.history.append({"role": "tool", "tool_call_id": str(i), "content": "{}"})
+        agent._compact_history()
+
+        self.assertIs(agent.history[0], system_prompt)
+        self.assertIn("earlier stuff", agent.history[1]["content"])
+        self.assertEqual(agent.history[2]["role"], "user")
+        self.assertLessEqual(len(agent.history), fbp_agent.MAX_HISTORY_MESSAGES + 2)
+
+
+class TestTerminalTools(unittest.TestCase):
+    """Tests for skipping the interpretation call on self-describing tools"""
+
+    def _agent_with_tool_call(self, name):
+        with patch.object(fbp_agent, "HAS_OPENAI", False):
+            agent = fbp_agent.FBPAgent()
+        tc = Mock(id="call_1")
+        tc.function.name = name
+        tc.function.arguments = "{}"
+        agent.client = Mock()
+        agent.client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(tool_calls=[tc], content=None))]
+        )
+        return agent
+
+    def test_single_terminal_tool_skips_second_call(self):
+        """A lone get_balance call should be answered without re-prompting the model"""
+        agent = self._agent_with_tool_call("get_balance")
+        payload = json.dumps({"balance_usdc": 12.5, "wallet": "0xdb1f88Ab...265c"})
+        with patch.object(fbp_agent, "tool_get_balance", return_value=payload):
+            out = agent.process_message("balance?")
+        self.assertEqual(agent.client.chat.completions.create.call_count, 1)
+        self.assertIn("$12.50", out["response"])
+
+    def test_error_result_goes_to_llm(self):
+        """Errors should still be explained by the model"""
+        agent = self._agent_with_tool_call("get_balance")
+        with patch.object(fbp_agent, "tool_get_balance", return_value=json.dumps({"error": "rpc"})):
+            agent.process_message("balance?")
+        self.assertEqual(agent.client.chat.completions.create.call_count, 2)
+        # SDK message objects are flattened before they enter history
+        self.assertTrue(all(isinstance(m, dict) for m in agent.history))
+        self.assertEqual(agent.history[-3]["tool_calls"][0]["function"]["name"], "get_balance")
+
+
+class TestStreaming(unittest.TestCase):
+    """Tests for streamed completions via on_token"""
+
+    @staticmethod
+    def _chunk(content=None, tool_calls=None):
+        return Mock(choices=[Mock(delta=Mock(content=content, tool_calls=tool_calls))])
+
+    @staticmethod
+    def _tc_delta(index, id=None, name=None, arguments=None):
+        tc = Mock(index=index, id=id)
+        tc.function.name = name
+        tc.function.arguments = arguments
+        return tc
+
+    def test_tool_call_assembled_across_chunks(self):
+        """Split tool_call deltas should be joined and the reply text streamed"""
+        with patch.object(fbp_agent, "HAS_OPENAI", False):
+            agent = fbp_agent.FBPAgent()
+        agent.client = Mock()
+        agent.client.chat.completions.create.side_effect = [
+            iter([
+                self._chunk(tool_calls=[self._tc_delta(0, "call_1", "get_market_details", '{"mar')]),
+                self._chunk(tool_calls=[self._tc_delta(0, arguments='ket_id": "42"}')]),
+            ]),
+            iter([self._chunk("Market "), self._chunk("42 is open.")]),
+        ]
+        tokens = []
+        with patch.object(fbp_agent, "tool_get_market_details", return_value='{"id": "42"}') as tool:
+            out = agent.process_message("market 42?", on_token=tokens.append)
+        tool.assert_called_once_with(market_id="42")
+        self.assertEqual(tokens, ["Market ", "42 is open."])
+        self.assertEqual(out["response"], "Market 42 is open.")
+        self.assertEqual(out["tool_calls"][0]["params"], {"market_id": "42"})
+
+
+class TestAsyncTools(unittest.TestCase):
+    """Tests for the httpx.AsyncClient tool variants"""
+
+    def test_prices_fan_out(self):
+        """Every symbol should be requested through the shared async client"""
+        resp = Mock(content=b'{"price": "1234.567"}')
+        client = Mock(is_closed=False, get=AsyncMock(return_value=resp))
+        with patch.object(fbp_agent, "_async_client", client):
+            prices = json.loads(asyncio.run(fbp_agent.atool_get_prices()))
+        self.assertEqual(client.get.call_count, len(fbp_agent.PRICE_SYMBOLS))
+        self.assertEqual(prices["BTC"], 1235.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
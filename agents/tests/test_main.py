@@ -0,0 +1,68 @@
+"""
+Unit tests for the orchestrator's forked agent runner.
+
+Run with: python -m pytest agents/tests/test_main.py -v
+"""
+
+import unittest
+import sys
+import os
+import signal
+import tempfile
+import textwrap
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from agents.main import fork_agent
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "fork_agent needs os.fork")
+class TestForkAgent(unittest.TestCase):
+    """Tests for fork_agent child setup and teardown"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.marker = os.path.join(self.tmp.name, "flushed")
+        with open(os.path.join(self.tmp.name, "fake_agent.py"), "w") as f:
+            f.write(textwrap.dedent(f"""
+                import atexit
+                import signal
+                import sys
+
+                def flush():
+                    with open({self.marker!r}, "w") as f:
+                        f.write("ok")
+
+                atexit.register(flush)
+                assert signal.getsignal(signal.SIGINT) is signal.default_int_handler
+                assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
+                sys.exit(3)
+            """))
+        sys.path.insert(0, self.tmp.name)
+
+    def tearDown(self):
+        sys.path.remove(self.tmp.name)
+        self.tmp.cleanup()
+
+    def _run(self, module):
+        pid, fd = fork_agent(module, [])
+        with os.fdopen(fd, "rb") as f:
+            output = f.read()
+        _, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status), output
+
+    def test_child_runs_agent_atexit_handlers(self):
+        """Exit hooks registered by the agent run, and its exit code is kept"""
+        previous = signal.signal(signal.SIGTERM, lambda sig, frame: None)
+        try:
+            code, output = self._run("fake_agent")
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        self.assertEqual(code, 3, output)
+        with open(self.marker) as f:
+            self.assertEqual(f.read(), "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Unit tests for the Polymarket websocket frame queueing and dispatch.
+
+Run with: python -m pytest agents/tests/test_polymarket_ws.py -v
+"""
+
+import unittest
+import sys
+import os
+import json
+import queue
+import threading
+import time
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from agents.polymarket.polymarket import Polymarket, skip_unchanged_mid
+
+
+def _bare_polymarket(max_book_frames: int) -> Polymarket:
+    """A Polymarket with only the websocket dispatch state (no keys, no network)."""
+    pm = Polymarket.__new__(Polymarket)
+    pm.ws_callbacks = {"user": [], "market": []}
+    pm._ws_queue = queue.Queue(maxsize=max_book_frames)
+    pm._ws_reliable_queue = queue.SimpleQueue()
+    pm._ws_ready = threading.Event()
+    pm._ws_stop = threading.Event()
+    return pm
+
+
+class TestWsBackpressure(unittest.TestCase):
+    """Book bursts may be dropped; user and trade events may not"""
+
+    def _dispatch(self, pm, expected):
+        worker = threading.Thread(target=pm._dispatch_ws_messages, daemon=True)
+        worker.start()
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and not expected():
+            time.sleep(0.01)
+        pm._ws_stop.set()
+        worker.join(timeout=2)
+
+    def test_user_events_survive_book_burst(self):
+        pm = _bare_polymarket(max_book_frames=4)
+        user_events, market_events = [], []
+        pm.ws_callbacks["user"].append(user_events.append)
+        pm.ws_callbacks["market"].append(market_events.append)
+
+        pm._enqueue_ws_frame("user", json.dumps({"event_type": "order", "id": "o1"}))
+        for i in range(50):
+            pm._enqueue_ws_frame("market", json.dumps({"event_type": "book", "asset_id": str(i)}))
+        pm._enqueue_ws_frame("market", json.dumps({"event_type": "last_trade_price", "asset_id": "7"}))
+        pm._enqueue_ws_frame("user", json.dumps({"event_type": "trade", "id": "t1"}))
+
+        trades = lambda: [e for e in market_events if e["event_type"] == "last_trade_price"]
+        self._dispatch(pm, lambda: len(user_events) == 2 and trades())
+
+        self.assertEqual([e["id"] for e in user_events], ["o1", "t1"])
+        self.assertEqual(len(trades()), 1)
+        books = [e for e in market_events if e["event_type"] == "book"]
+        self.assertEqual([b["asset_id"] for b in books], ["46", "47", "48", "49"])
+
+
+
+def _book(asset, bid, ask):
+    return {"event_type": "book", "asset_id": asset,
+            "bids": [{"price": str(bid), "size": "10"}], "asks": [{"price": str(ask), "size": "10"}]}
+
+
+class TestSkipUnchangedMid(unittest.TestCase):
+    """Book events whose mid didn't move are not delivered to market callbacks"""
+
+    def test_unchanged_mid_is_suppressed(self):
+        seen = []
+        cb = skip_unchanged_mid(seen.append, min_change=0.001)
+        cb(_book("a", 0.40, 0.42))
+        cb(_book("a", 0.40, 0.42))      # same mid
+        cb(_book("a", 0.4004, 0.4198))  # moved 0.0001
+        cb(_book("b", 0.40, 0.42))      # other asset
+        cb(_book("a", 0.41, 0.43))      # moved 0.01
+        cb({"event_type": "last_trade_price", "asset_id": "a"})
+        self.assertEqual([(e["asset_id"], e["event_type"]) for e in seen],
+                         [("a", "book"), ("b", "book"), ("a", "book"), ("a", "last_trade_price")])
+
+    def test_market_callbacks_are_filtered_when_dispatched(self):
+        pm = _bare_polymarket(max_book_frames=16)
+        seen, raw = [], []
+        pm.add_ws_callback("market", seen.append)
+        pm.add_ws_callback("market", raw.append, min_mid_change=None)
+        worker = threading.Thread(target=pm._dispatch_ws_messages, daemon=True)
+        worker.start()
+        for n, (bid, ask) in enumerate(((0.40, 0.42), (0.40, 0.42), (0.45, 0.47)), 1):
+            pm._enqueue_ws_frame("market", json.dumps(_book("a", bid, ask)))
+            # one frame per wakeup, so book coalescing doesn't hide the filter
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and len(raw) < n:
+                time.sleep(0.01)
+        pm._ws_stop.set()
+        worker.join(timeout=2)
+        self.assertEqual(len(raw), 3)
+        self.assertEqual([b["bids"][0]["price"] for b in seen], ["0.4", "0.45"])
+
+
+
+class TestWsConnectionState(unittest.TestCase):
+    """ws_connection only reports a socket once it is actually open"""
+
+    def test_not_live_until_open(self):
+        pm = _bare_polymarket(max_book_frames=4)
+        pm.ws_connection = None
+        pm.ws_channel_type = None
+        pm.ws_auth_token = "t"
+        pm._ws_primary = None
+        pm._ws_shards = []
+        pm._ws_worker = None
+        pm._ws_lock = threading.Lock()
+        pm.subscribed_markets, pm.subscribed_assets = set(), set()
+        pm._ensure_ws_loop = lambda: None
+        pm._spawn_ws = lambda *args, **kwargs: Mock(future=Mock(done=lambda: False), channel_type="user")
+        pm.connect_websocket("user")
+        pm._ws_stop.set()
+        self.assertIsNotNone(pm._ws_primary)
+        self.assertIsNone(pm.ws_connection)
+
+
+if __name__ == "__main__":
+    unittest.main()
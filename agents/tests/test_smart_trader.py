@@ -0,0 +1,51 @@
+"""
+Unit tests for SmartTrader market discovery.
+
+Run with: python -m pytest agents/tests/test_smart_trader.py -v
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from agents.application import smart_trader
+
+
+class TestFeeFreeMarketTokens(unittest.TestCase):
+    """Tests for the per-market token cache in get_fee_free_markets"""
+
+    def setUp(self):
+        self.trader = smart_trader.SmartTrader.__new__(smart_trader.SmartTrader)
+        self.trader.market_tokens = {}
+        self.trader.traded_markets = set()
+
+    def _markets(self, payload):
+        resp = Mock(status_code=200)
+        resp.json.return_value = payload
+        return patch.object(smart_trader.requests, "get", return_value=resp)
+
+    def test_markets_without_id_are_not_cached(self):
+        """Id-less markets must not share one cache slot"""
+        payload = [
+            {"question": "Will A win?", "acceptingOrders": True, "clobTokenIds": '["a1", "a2"]'},
+            {"question": "Will B win?", "acceptingOrders": True, "clobTokenIds": '["b1", "b2"]'},
+        ]
+        with self._markets(payload):
+            markets = self.trader.get_fee_free_markets()
+        self.assertEqual([m["yes_token"] for m in markets], ["a1", "b1"])
+        self.assertEqual(self.trader.market_tokens, {})
+
+    def test_tokens_cached_by_id(self):
+        """A market's tokens are parsed once and reused on later scans"""
+        payload = [{"id": "1", "question": "Will A win?", "acceptingOrders": True, "clobTokenIds": '["a1", "a2"]'}]
+        with self._markets(payload):
+            self.trader.get_fee_free_markets()
+        self.assertEqual(self.trader.market_tokens, {"1": ("a1", "a2")})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Unit tests for per-agent state files (atomic snapshot + JSONL journal).
+
+Run with: python -m pytest tests/test_state_file.py -v
+"""
+
+import unittest
+import sys
+import os
+import glob
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.utils.state_file import load_state, write_snapshot, append_journal, journal_path, rotate_journal
+
+
+class TestStateFile(unittest.TestCase):
+    """Tests for snapshot/journal round trips"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "safe_state.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_missing_files_give_empty_state(self):
+        """No snapshot and no journal -> {}"""
+        self.assertEqual(load_state(self.path), {})
+
+    def test_journal_recovers_update_after_snapshot(self):
+        """An update journaled but not yet snapshotted should survive a restart"""
+        append_journal(self.path, {"status": "Scanning"})
+        write_snapshot(self.path, {"status": "Scanning", "arb_count": 2})
+        append_journal(self.path, {"status": "Error: boom"})
+        state = load_state(self.path)
+        self.assertEqual(state, {"status": "Error: boom", "arb_count": 2})
+        self.assertEqual(glob.glob(os.path.join(self.tmp.name, "*.tmp")), [])
+
+    def test_journal_is_one_line_per_update(self):
+        """Each append adds exactly one JSON line"""
+        for i in range(3):
+            append_journal(self.path, {"i": i})
+        with open(journal_path(self.path), "rb") as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
+
+
+    def test_every_update_after_snapshot_is_replayed(self):
+        """All journaled updates since the snapshot survive, not just the last one"""
+        write_snapshot(self.path, {"status": "Scanning"})
+        append_journal(self.path, {"arb_count": 1})
+        append_journal(self.path, {"last_trade": "YES @ $5"})
+        append_journal(self.path, {"status": "Idle"})
+        self.assertEqual(load_state(self.path), {"status": "Idle", "arb_count": 1, "last_trade": "YES @ $5"})
+
+    def test_torn_last_line_is_skipped(self):
+        """A crash mid-append leaves a partial line; earlier updates still load"""
+        append_journal(self.path, {"arb_count": 1})
+        with open(journal_path(self.path), "ab") as f:
+            f.write(b'{"status": "Err')
+        self.assertEqual(load_state(self.path), {"arb_count": 1})
+
+    def test_snapshot_truncates_rotated_journal(self):
+        """Lines rotated before a snapshot are dropped once it lands; later lines stay"""
+        append_journal(self.path, {"i": 1})
+        rotate_journal(self.path)
+        append_journal(self.path, {"i": 2})
+        write_snapshot(self.path, {"i": 1})
+        with open(journal_path(self.path), "rb") as f:
+            self.assertEqual(len(f.read().splitlines()), 1)
+        self.assertFalse(os.path.exists(journal_path(self.path) + ".prev"))
+        self.assertEqual(load_state(self.path), {"i": 2})
+
+    def test_rotated_journal_survives_failed_snapshot(self):
+        """If the snapshot never lands, rotated lines are still replayed"""
+        append_journal(self.path, {"i": 1})
+        rotate_journal(self.path)
+        append_journal(self.path, {"j": 2})
+        rotate_journal(self.path)  # second flush before the first snapshot landed
+        self.assertEqual(load_state(self.path), {"i": 1, "j": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
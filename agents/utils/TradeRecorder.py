@@ -18,6 +18,26 @@ logger = logging.getLogger("TradeRecorder")
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STATE_FILE = os.path.join(BASE_DIR, "bot_state.json")
 
+# bot_state.json is rewritten on every trade/scan by every agent; use orjson when available.
+try:
+    import orjson
+
+    def _read_state() -> Dict[str, Any]:
+        with open(STATE_FILE, "rb") as f:
+            return orjson.loads(f.read())
+
+    def _write_state(state: Dict[str, Any]) -> None:
+        with open(STATE_FILE, "wb") as f:
+            f.write(orjson.dumps(state, option=orjson.OPT_NON_STR_KEYS))
+except ImportError:
+    def _read_state() -> Dict[str, Any]:
+        with open(STATE_FILE, "r") as f:
+            return json.load(f)
+
+    def _write_state(state: Dict[str, Any]) -> None:
+        with open(STATE_FILE, "w") as f:
+            json.dump(state, f)
+
 
 def record_trade(
     agent_name: str,
@@ -50,8 +70,7 @@ def record_trade(
     try:
         # Load current state
         if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, 'r') as f:
-                state = json.load(f)
+            state = _read_state()
         else:
             state = {"recent_trades": []}
         
@@ -81,8 +100,7 @@ def record_trade(
             state["recent_trades"] = state["recent_trades"][-100:]
         
         # Save state
-        with open(STATE_FILE, 'w') as f:
-            json.dump(state, f, indent=2)
+        _write_state(state)
         
         logger.info(f"Recorded trade: {agent_name} {side} ${amount:.2f} on {market}")
         return True
@@ -107,8 +125,7 @@ def get_recent_trades(limit: int = 10, agent_name: Optional[str] = None) -> list
         if not os.path.exists(STATE_FILE):
             return []
         
-        with open(STATE_FILE, 'r') as f:
-            state = json.load(f)
+        state = _read_state()
         
         trades = state.get("recent_trades", [])
         
@@ -210,8 +227,7 @@ def update_agent_activity(agent_name: str, activity: str, extra_data: Optional[D
     """
     try:
         if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, 'r') as f:
-                state = json.load(f)
+            state = _read_state()
         else:
             state = {}
         
@@ -225,8 +241,7 @@ def update_agent_activity(agent_name: str, activity: str, extra_data: Optional[D
                 state[key] = value
         
         # Save state
-        with open(STATE_FILE, 'w') as f:
-            json.dump(state, f, indent=2)
+        _write_state(state)
             
     except Exception as e:
         logger.error(f"Failed to update agent activity: {e}")
@@ -151,7 +151,7 @@ class SharedContext:
         data["last_update"] = datetime.now().isoformat()
         with open(self.context_file, 'w') as f:
             fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-            json.dump(data, f, indent=2)
+            json.dump(data, f)
             fcntl.flock(f.fileno(), fcntl.LOCK_UN)
     
     # =========== QUERY METHODS ===========
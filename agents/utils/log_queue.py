@@ -0,0 +1,33 @@
+"""
+Queue-backed logging for the trading agents.
+
+Same output as logging.basicConfig(file + stderr), but the calling thread only
+enqueues the record; a QueueListener thread does the formatting and the
+file/console writes, so a slow terminal or disk never stalls a trading loop.
+"""
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def configure_logging(log_file: str, level: int = logging.INFO) -> None:
+    """Log to `log_file` and stderr through a queue. No-op if the root logger is already configured."""
+    root = logging.getLogger()
+    if root.handlers:
+        return  # same rule as logging.basicConfig
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.FileHandler(log_file), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()  # C implementation, no Python-level lock on put
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # drains queued records on exit
+
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
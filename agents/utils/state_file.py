@@ -0,0 +1,119 @@
+"""
+Per-agent state files (safe_state.json, copy_state.json, ...).
+
+The JSON snapshot is replaced atomically (temp file + os.replace) so a crash
+mid-write never leaves it truncated. Every update is also appended as one line
+to a sibling .jsonl journal, and load_state() replays the journal over the
+snapshot to recover updates that landed after it.
+
+The journal only has to cover updates since the last snapshot. Writers call
+rotate_journal() while taking the state copy they are about to snapshot (under
+the same lock as their appends); write_snapshot() then deletes the rotated
+part. Replaying a rotated journal that outlived a crash is harmless: its last
+value for each key is the one the snapshot holds.
+"""
+import os
+import json
+import logging
+import threading
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("StateFile")
+
+
+def journal_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".jsonl"
+
+
+def _rotated_path(path: str) -> str:
+    return journal_path(path) + ".prev"
+
+
+def _dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj) if orjson else json.dumps(obj).encode()
+
+
+def _loads(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def _replay(journal: str, state: Dict[str, Any]) -> None:
+    """Apply every journal line to `state` in order; a torn or corrupt line is skipped."""
+    if not os.path.exists(journal):
+        return
+    with open(journal, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                state.update(_loads(line))
+            except ValueError:
+                logger.warning(f"Skipping unreadable line in state journal {journal}")
+
+
+def load_state(path: str) -> Dict[str, Any]:
+    """Snapshot with every journaled update replayed over it; {} if neither exists."""
+    state: Dict[str, Any] = {}
+    try:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                state = _loads(f.read())
+    except Exception as e:
+        logger.warning(f"Unreadable state snapshot {path}: {e}")
+
+    # Older rotated lines first, then the live journal
+    for journal in (_rotated_path(path), journal_path(path)):
+        try:
+            _replay(journal, state)
+        except Exception as e:
+            logger.warning(f"Unreadable state journal {journal}: {e}")
+    return state
+
+
+def rotate_journal(path: str) -> None:
+    """
+    Set the journal aside as covered by the snapshot about to be written.
+    Call under the lock that serializes append_journal() and the state copy.
+    """
+    journal = journal_path(path)
+    rotated = _rotated_path(path)
+    if not os.path.exists(journal):
+        return
+    if os.path.exists(rotated):
+        # Previous snapshot never landed; keep its lines too
+        with open(journal, "rb") as src, open(rotated, "ab") as dst:
+            dst.write(src.read())
+        os.remove(journal)
+    else:
+        os.replace(journal, rotated)
+
+
+def write_snapshot(path: str, state: Dict[str, Any]) -> None:
+    """Atomically replace the snapshot with `state`, then drop the rotated journal it covers."""
+    # Per-thread temp name: a timer flush and an atexit flush may overlap
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_dumps(state))
+    os.replace(tmp, path)
+    try:
+        os.remove(_rotated_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def append_journal(path: str, update: Dict[str, Any]) -> None:
+    """Append one update as a JSON line in a single O_APPEND write."""
+    if orjson:
+        line = orjson.dumps(update, option=orjson.OPT_APPEND_NEWLINE)
+    else:
+        line = json.dumps(update).encode() + b"\n"
+    fd = os.open(journal_path(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
@@ -78,6 +78,23 @@ class SupabaseState:
         # Fallback
         return {"agent_name": agent_name, "is_running": True, "is_dry_run": True}
     
+    def get_all_agent_states(self) -> Dict[str, Dict[str, Any]]:
+        """Get every agent's state row in one query, keyed by agent_name."""
+        if not self.use_local_fallback:
+            try:
+                url = f"{self._rest_url('agent_state')}?select=agent_name,is_running,is_dry_run,heartbeat"
+                with httpx.Client(timeout=10) as client:
+                    resp = client.get(url, headers=self.headers)
+                    if resp.status_code == 200:
+                        return {row["agent_name"]: row for row in resp.json()}
+            except Exception as e:
+                logger.error(f"Failed to get agent states: {e}")
+        return {}
+
+    def get_all_agents_running(self) -> Dict[str, bool]:
+        """Map of agent_name -> is_running from a single query."""
+        return {name: row.get("is_running", True) for name, row in self.get_all_agent_states().items()}
+
     def is_agent_running(self, agent_name: str) -> bool:
         """Check if an agent should be running."""
         state = self.get_agent_state(agent_name)
@@ -305,6 +322,44 @@ class SupabaseState:
         logger.error(f"FAILED to log LLM activity for {agent} (no SDK, no REST)")
         return False
 
+    def bulk_log_llm_activity(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Log many LLM activity records in one insert (one HTTP round trip).
+        Each row takes the same fields as log_llm_activity's arguments.
+        Uses SDK first, REST fallback.
+        """
+        if not rows:
+            return True
+        payload = [
+            {"data_sources": [], "tokens_used": 0, "cost_usd": 0, "duration_ms": 0, **row}
+            for row in rows
+        ]
+
+        # 1. Try SDK first
+        if self.client:
+            try:
+                self.client.table("llm_activity").insert(payload).execute()
+                logger.info(f"📝 {len(payload)} LLM activities logged via SDK")
+                return True
+            except Exception as e:
+                logger.warning(f"SDK bulk insert failed, trying REST: {e}")
+
+        # 2. REST Fallback: PostgREST inserts a JSON array as one statement
+        if not self.use_local_fallback:
+            try:
+                headers = {**self.headers, "Prefer": "return=minimal"}
+                with httpx.Client(timeout=10) as client:
+                    resp = client.post(self._rest_url("llm_activity"), headers=headers, json=payload)
+                    if resp.status_code in [200, 201, 204]:
+                        logger.info(f"📝 {len(payload)} LLM activities logged via REST")
+                        return True
+                    logger.error(f"REST bulk insert failed: {resp.status_code} - {resp.text[:200]}")
+            except Exception as e:
+                logger.error(f"REST bulk insert exception: {e}")
+
+        logger.error(f"FAILED to bulk log {len(payload)} LLM activities")
+        return False
+
     def get_llm_activity(self, limit: int = 50, agent: str = None) -> List[Dict]:
         """Get recent LLM activity from Supabase. Uses SDK first, REST fallback."""
         # 1. Try SDK first